@@ -1,11 +1,20 @@
 import streamlit as st
-import random
 from datetime import datetime
 import json
 import os
+import uuid
+from agents.match_engine import simulate_match, insert_event
+from utils.ranking import RankedLeaderboard, leaderboard_points, leaderboard_goal_diff
+from utils.windowed_leaderboard import WindowedLeaderboard, window_range
 
-def update_leaderboard(username, result, user_score, opponent_score):
-    """Update leaderboard with match result"""
+# How many recent match ids are kept per user to reject repeated commits
+RECENT_MATCH_IDS = 50
+
+def update_leaderboard(username, result, user_score, opponent_score, match_id=None):
+    """
+    Update leaderboard with match result.
+    Returns False without writing anything if match_id was already committed.
+    """
     leaderboard = load_leaderboard()
     
     if username not in leaderboard:
@@ -20,6 +29,13 @@ def update_leaderboard(username, result, user_score, opponent_score):
         }
     
     stats = leaderboard[username]
+    if match_id is not None:
+        recent_ids = stats.setdefault("recent_match_ids", [])
+        if match_id in recent_ids:
+            return False
+        recent_ids.append(match_id)
+        del recent_ids[:-RECENT_MATCH_IDS]
+
     stats["matches_played"] += 1
     stats["goals_for"] += user_score
     stats["goals_against"] += opponent_score
@@ -33,6 +49,9 @@ def update_leaderboard(username, result, user_score, opponent_score):
         stats["losses"] += 1
     
     save_leaderboard(leaderboard)
+    get_ranked_leaderboard().update(username, stats)
+    get_windowed_leaderboard().record(username, result, user_score, opponent_score)
+    return True
 
 def load_leaderboard():
     """Load leaderboard from JSON file"""
@@ -53,44 +72,69 @@ def save_leaderboard(leaderboard):
         pass
 
 
-def display_leaderboard():
+@st.cache_resource
+def get_ranked_leaderboard():
+    """Ranked leaderboard index, built once per process and updated in place"""
+    return RankedLeaderboard(load_leaderboard())
+
+
+@st.cache_resource
+def get_windowed_leaderboard():
+    """Weekly/monthly/season result buckets, shared across sessions"""
+    return WindowedLeaderboard()
+
+
+LEADERBOARD_WINDOWS = {
+    "All-Time": None,
+    "This Week": "week",
+    "This Month": "month",
+    "This Season": "season",
+}
+
+
+def leaderboard_row(rank, username, stats):
+    """Format one ranked leaderboard entry for display"""
+    goal_diff = leaderboard_goal_diff(stats)
+    win_rate = (stats["wins"] / stats["matches_played"] * 100) if stats["matches_played"] > 0 else 0
+    return {
+        "Rank": rank,
+        "Player": username,
+        "Matches": stats["matches_played"],
+        "Wins": stats["wins"],
+        "Draws": stats["draws"],
+        "Losses": stats["losses"],
+        "Goals For": stats["goals_for"],
+        "Goals Against": stats["goals_against"],
+        "Goal Diff": f"{goal_diff:+d}",
+        "Points": leaderboard_points(stats),
+        "Win Rate": f"{win_rate:.1f}%",
+        "Last Played": stats["last_played"] or "Never"
+    }
+
+
+def display_leaderboard(page_size=25):
     """Display the leaderboard"""
     st.divider()
     st.subheader("🏆 Leaderboard")
+
+    window_label = st.radio("Period", list(LEADERBOARD_WINDOWS), horizontal=True, key="leaderboard_window")
+    window = LEADERBOARD_WINDOWS[window_label]
+
+    if window is None:
+        ranked = get_ranked_leaderboard()
+    else:
+        # Windowed boards only hold users active in the period, so ranking them on the fly is cheap
+        ranked = RankedLeaderboard(get_windowed_leaderboard().board(window))
+        st.caption(f"📅 {window_range(window)}")
     
-    leaderboard = load_leaderboard()
-    
-    if not leaderboard:
+    if not len(ranked):
         st.info("No matches played yet. Be the first to play!")
         return
     
-    # Calculate additional stats and sort by wins, then by goal difference
-    leaderboard_data = []
-    for username, stats in leaderboard.items():
-        goal_diff = stats["goals_for"] - stats["goals_against"]
-        points = stats["wins"] * 3 + stats["draws"] * 1  # 3 points for win, 1 for draw
-        win_rate = (stats["wins"] / stats["matches_played"] * 100) if stats["matches_played"] > 0 else 0
-        
-        leaderboard_data.append({
-            "Player": username,
-            "Matches": stats["matches_played"],
-            "Wins": stats["wins"],
-            "Draws": stats["draws"],
-            "Losses": stats["losses"],
-            "Goals For": stats["goals_for"],
-            "Goals Against": stats["goals_against"],
-            "Goal Diff": f"{goal_diff:+d}",
-            "Points": points,
-            "Win Rate": f"{win_rate:.1f}%",
-            "Last Played": stats["last_played"] or "Never"
-        })
-    
-    # Sort by points (descending), then by goal difference (descending), then by wins (descending)
-    leaderboard_data.sort(key=lambda x: (-x["Points"], -int(x["Goal Diff"]), -x["Wins"]))
-    
-    # Display top 10
+    # Ranked by points, then goal difference, then wins - only the rows on screen are formatted
     st.markdown("#### 🥇 Top Players")
-    for i, player_data in enumerate(leaderboard_data[:10], 1):
+    for i, username, stats in ranked.top(10):
+        player_data = leaderboard_row(i, username, stats)
         # Medal emojis for top 3
         medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
         
@@ -104,14 +148,50 @@ def display_leaderboard():
         with col4:
             st.markdown(f"GD: {player_data['Goal Diff']}, WR: {player_data['Win Rate']}")
     
-    # Show detailed stats in expander
+    username = st.session_state.get("username")
+    if username in ranked:
+        st.caption(f"Your rank: #{ranked.rank(username)} of {len(ranked)}")
+
+    # Show detailed stats in expander, one page at a time
     with st.expander("📊 Detailed Statistics"):
+        page = st.number_input("Page", min_value=1, max_value=ranked.page_count(page_size), value=1, step=1, key="leaderboard_page")
+        leaderboard_data = [leaderboard_row(*entry) for entry in ranked.page(page, page_size)]
         st.dataframe(leaderboard_data, use_container_width=True, hide_index=True)
 
 
-def simulate_match_with_leaderboard(user_xi, opponent_xi, username=None):
+USER_SIDE = "Your XI"
+OPPONENT_SIDE = "Opponent XI"
+
+
+def build_match_timeline(user_xi, opponent_xi, match_id, user_bench=()):
+    """Simulate the full match up front, seeded by the match id, plus the Ronaldo free-kick moment"""
+    timeline = simulate_match(
+        user_xi, opponent_xi,
+        seed=int(match_id[:12], 16),
+        home_name=USER_SIDE, away_name=OPPONENT_SIDE,
+        home_bench=user_bench
+    )
+
+    ronaldo_in_user = any(
+        player.get("name", "").lower() == "cristiano ronaldo"
+        for player in user_xi
+    )
+    if ronaldo_in_user:
+        insert_event(timeline, {
+            "minute": 80, "type": "foul", "team": OPPONENT_SIDE, "player": "", "scripted": True, "pause": True,
+            "description": "Foul on the edge of the box..."
+        }, home_name=USER_SIDE)
+        insert_event(timeline, {
+            "minute": 81, "type": "goal", "team": USER_SIDE, "player": "Cristiano Ronaldo", "scripted": True, "pause": True,
+            "description": "GOAL! Cristiano Ronaldo curls a magnificent free kick into the top corner! Unstoppable!"
+        }, home_name=USER_SIDE)
+    return timeline
+
+
+def simulate_match_with_leaderboard(user_xi, opponent_xi, username=None, user_bench=()):
     """
     Simulates a match and updates leaderboard with results.
+    Substitutes for the user's side come from ``user_bench``.
     """
     if len(user_xi) != 11 or len(opponent_xi) != 11:
         st.error("Both teams must have exactly 11 players!")
@@ -129,10 +209,16 @@ def simulate_match_with_leaderboard(user_xi, opponent_xi, username=None):
         st.session_state.opponent_score = 0
         st.session_state.match_finished = False
         st.session_state.ronaldo_goal_scored = False
+        st.session_state.match_id = None
+        st.session_state.match_committed = False
+        st.session_state.match_timeline = None
 
     if not st.session_state.match_started:
         if st.button("🚀 Start Match Simulation"):
             st.session_state.match_started = True
+            st.session_state.match_id = uuid.uuid4().hex
+            st.session_state.match_committed = False
+            st.session_state.match_timeline = build_match_timeline(user_xi, opponent_xi, st.session_state.match_id, user_bench)
             st.session_state.match_events = ["⚽ Match begins! Both teams looking sharp."]
             st.rerun()
 
@@ -142,53 +228,24 @@ def simulate_match_with_leaderboard(user_xi, opponent_xi, username=None):
         st.progress(progress, text=f"⏱️ {st.session_state.match_minute}' - Score: {st.session_state.user_score}-{st.session_state.opponent_score}")
 
         if st.button("⏭️ Next Event", key="next_event_btn"):
-            ronaldo_in_user = any(
-                player.get("name", "").lower() == "cristiano ronaldo"
-                for player in user_xi
-            )
-
-            scripted_event_triggered = False
+            # The whole match was simulated at kick-off; each click only replays the next slice of it
             target_minute = min(st.session_state.match_minute + 15, 90)
-
-            while st.session_state.match_minute < target_minute:
-                st.session_state.match_minute += 1
-
-                # Scripted Ronaldo event
-                if (ronaldo_in_user and
-                    not st.session_state.ronaldo_goal_scored and
-                    st.session_state.match_minute == 80):
-                    st.session_state.match_events.append("⚽ 80' - Foul on the edge of the box...")
-                    scripted_event_triggered = True
-                    break
-
-                elif (ronaldo_in_user and
-                      not st.session_state.ronaldo_goal_scored and
-                      st.session_state.match_minute == 81):
-                    st.session_state.match_events.append("🎉 81' - GOAL! Cristiano Ronaldo curls a magnificent free kick into the top corner! Unstoppable!")
-                    st.session_state.user_score = 1
-                    st.session_state.opponent_score = 0
-                    st.session_state.ronaldo_goal_scored = True
-                    scripted_event_triggered = True
+            for event in st.session_state.match_timeline["events"]:
+                if not st.session_state.match_minute < event["minute"] <= target_minute:
+                    continue
+                if event["type"] == "goal":
+                    if event["team"] == USER_SIDE:
+                        st.session_state.user_score += 1
+                    else:
+                        st.session_state.opponent_score += 1
+                icon = "🎉" if event["type"] == "goal" else "⚽"
+                st.session_state.match_events.append(f"{icon} {event['minute']}' - {event['description']}")
+                if event.get("scripted"):
+                    st.session_state.ronaldo_goal_scored = event["type"] == "goal"
+                if event.get("pause"):
+                    target_minute = event["minute"]
                     break
-
-                elif not (ronaldo_in_user and 80 <= st.session_state.match_minute <= 81):
-                    if random.random() < 0.4:
-                        generic_events = [
-                            "Corner kick goes wide", "Offside called on the attack",
-                            "Tactical foul in midfield", "Throw-in near halfway line",
-                            "Missed chance from close range", "Routine save by the goalkeeper",
-                            "Cross deflected out for a corner", "Scrappy play in midfield continues",
-                            "Coach shouting tactical instructions", "Yellow card for dissent",
-                            "Header over the bar", "Shot blocked by defender",
-                            "Keeper claims the cross", "Play stopped for injury"
-                        ]
-
-                        # Only include substitution in second half
-                        if st.session_state.match_minute >= 46:
-                            generic_events.append("Substitution: Fresh legs come on")
-
-                        event = random.choice(generic_events)
-                        st.session_state.match_events.append(f"⚽ {st.session_state.match_minute}' - {event}")
+            st.session_state.match_minute = target_minute
 
             if st.session_state.match_minute >= 90:
                 st.session_state.match_finished = True
@@ -227,16 +284,25 @@ def simulate_match_with_leaderboard(user_xi, opponent_xi, username=None):
             unsafe_allow_html=True
         )
 
-        if username:
+        # Commit the result once per match; later reruns only show the confirmation
+        if username and not st.session_state.match_committed:
             try:
-                update_leaderboard(username, result_type, st.session_state.user_score, st.session_state.opponent_score)
-                st.success(f"🏆 Leaderboard updated for {username}!")
+                update_leaderboard(
+                    username, result_type,
+                    st.session_state.user_score, st.session_state.opponent_score,
+                    match_id=st.session_state.match_id
+                )
+                st.session_state.match_committed = True
             except Exception as e:
                 st.warning(f"⚠️ Leaderboard update failed: {str(e)}")
+        if username and st.session_state.match_committed:
+            st.success(f"🏆 Leaderboard updated for {username}!")
 
         if st.button("🔄 Play Again"):
-            for key in ["match_started", "match_events", "match_minute", "user_score", "opponent_score", "match_finished", "ronaldo_goal_scored"]:
+            for key in ["match_started", "match_events", "match_minute", "user_score", "opponent_score", "match_finished", "ronaldo_goal_scored", "match_committed"]:
                 st.session_state[key] = False if isinstance(st.session_state[key], bool) else 0 if isinstance(st.session_state[key], int) else []
+            st.session_state.match_id = None
+            st.session_state.match_timeline = None
             st.rerun()
 
 
@@ -246,7 +312,7 @@ def reset_match_state():
     keys_to_reset = [
         "match_started", "match_events", "match_minute", 
         "user_score", "opponent_score", "match_finished", 
-        "ronaldo_goal_scored"
+        "ronaldo_goal_scored", "match_id", "match_committed", "match_timeline"
     ]
     
     for key in keys_to_reset:
@@ -0,0 +1,286 @@
+# agents/match_engine.py
+#
+# Pure-Python match engine: no Streamlit, no I/O. A whole 90-minute timeline is
+# generated in one call from the two XIs and a seed, so the UI only replays it
+# and batch jobs can simulate thousands of matches per second.
+
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence
+
+POSITION_ALIASES = {
+    "goalkeeper": "GK", "gk": "GK", "g": "GK",
+    "defender": "DEF", "def": "DEF", "d": "DEF",
+    "midfielder": "MID", "mid": "MID", "m": "MID",
+    "forward": "FWD", "fwd": "FWD", "f": "FWD", "attacker": "FWD",
+}
+
+# How much each line contributes to attacking and defensive strength.
+ATTACK_WEIGHTS = {"GK": 0.0, "DEF": 0.25, "MID": 0.7, "FWD": 1.0}
+DEFENCE_WEIGHTS = {"GK": 1.5, "DEF": 1.0, "MID": 0.45, "FWD": 0.1}
+# Relative likelihood of a line being the one to score or be booked.
+SCORER_WEIGHTS = {"GK": 0.0, "DEF": 0.15, "MID": 0.45, "FWD": 1.0}
+BOOKING_WEIGHTS = {"GK": 0.1, "DEF": 1.0, "MID": 0.9, "FWD": 0.5}
+
+BASE_GOALS = 1.35          # goals per team per 90 between equal sides
+RATING_SENSITIVITY = 0.045  # log-rate change per rating point of attack minus defence
+CHANCES_PER_GOAL = 4.0     # near-misses generated per expected goal
+YELLOWS_PER_TEAM = 1.9
+REDS_PER_TEAM = 0.08
+DEFAULT_RATING = 60.0
+
+CHANCE_DESCRIPTIONS = (
+    "Missed chance from close range", "Header over the bar",
+    "Shot blocked by defender", "Routine save by the goalkeeper",
+    "Cross deflected out for a corner", "Effort curls just wide",
+)
+
+
+def position_group(position: Any) -> str:
+    """Map the many position spellings used across the data files to GK/DEF/MID/FWD."""
+    return POSITION_ALIASES.get(str(position).strip().lower(), "MID")
+
+
+def player_rating(player: Dict[str, Any]) -> float:
+    rating = player.get("overall", player.get("Overall", DEFAULT_RATING))
+    try:
+        return float(rating)
+    except (TypeError, ValueError):
+        return DEFAULT_RATING
+
+
+class TeamProfile:
+    """
+    Ratings and sampling tables for one XI, built once and reused across
+    matches, plus the bench its substitutes come from as (name, line, rating).
+    """
+
+    __slots__ = ("name", "players", "groups", "ratings", "attack", "defence", "scorer_weights",
+                 "booking_weights", "scorer_cum", "booking_cum", "outfield", "bench")
+
+    def __init__(self, xi: Sequence[Dict[str, Any]], name: str = "Team",
+                 bench: Sequence[Dict[str, Any]] = ()):
+        self.name = name
+        self.players = [p.get("name", p.get("Player", "Unknown")) for p in xi]
+        self.groups = groups = [position_group(p.get("position", p.get("Position"))) for p in xi]
+        self.ratings = ratings = [player_rating(p) for p in xi]
+        self.bench = [(p.get("name", p.get("Player", "Unknown")), position_group(p.get("position", p.get("Position"))),
+                       player_rating(p)) for p in bench]
+
+        self.attack = _weighted_mean(ratings, [ATTACK_WEIGHTS[g] for g in groups])
+        self.defence = _weighted_mean(ratings, [DEFENCE_WEIGHTS[g] for g in groups])
+        self.scorer_weights = [SCORER_WEIGHTS[g] * r for g, r in zip(groups, ratings)]
+        self.booking_weights = [BOOKING_WEIGHTS[g] for g in groups]
+        self.scorer_cum = list(accumulate(self.scorer_weights))
+        self.booking_cum = list(accumulate(self.booking_weights))
+        self.outfield = [i for i, g in enumerate(groups) if g != "GK"] or list(range(len(xi)))
+
+    def pick(self, cumulative: List[float], rng: random.Random) -> str:
+        if not cumulative or cumulative[-1] <= 0:
+            return self.players[rng.randrange(len(self.players))] if self.players else "Unknown"
+        return self.players[bisect_right(cumulative, rng.random() * cumulative[-1])]
+
+
+class OnPitch:
+    """
+    The players of one TeamProfile on the pitch during a match. Players who
+    are substituted off or sent off leave the sampling tables, so they cannot
+    score, miss chances or be booked afterwards; substitutes who come on join
+    them at the end of ``players``.
+    """
+
+    __slots__ = ("team", "players", "scorer_weights", "booking_weights", "bench", "active",
+                 "scorer_cum", "booking_cum")
+
+    def __init__(self, team: TeamProfile):
+        self.team = team
+        self.players = list(team.players)
+        self.scorer_weights = list(team.scorer_weights)
+        self.booking_weights = list(team.booking_weights)
+        self.bench = list(team.bench)
+        self.active = list(range(len(team.players)))
+        self.scorer_cum = team.scorer_cum
+        self.booking_cum = team.booking_cum
+
+    def _rebuild(self) -> None:
+        self.scorer_cum = list(accumulate(self.scorer_weights[i] for i in self.active))
+        self.booking_cum = list(accumulate(self.booking_weights[i] for i in self.active))
+
+    def remove(self, player: int) -> bool:
+        """Take player index ``player`` off; False if they had already left."""
+        if player not in self.active:
+            return False
+        self.active.remove(player)
+        self._rebuild()
+        return True
+
+    def bring_on(self, replacing: int) -> str:
+        """
+        Send on a substitute for XI index ``replacing`` and return their name:
+        a bench player from the same line if there is one, else any outfield
+        bench player, else a stand-in with the departing player's line and
+        rating.
+        """
+        group = self.team.groups[replacing]
+        choice = next((i for i, b in enumerate(self.bench) if b[1] == group), None)
+        if choice is None:
+            choice = next((i for i, b in enumerate(self.bench) if b[1] != "GK"), None)
+        if choice is not None:
+            name, group, rating = self.bench.pop(choice)
+        else:
+            name, rating = f"{self.team.players[replacing]}'s replacement", self.team.ratings[replacing]
+        self.players.append(name)
+        self.scorer_weights.append(SCORER_WEIGHTS[group] * rating)
+        self.booking_weights.append(BOOKING_WEIGHTS[group])
+        self.active.append(len(self.players) - 1)
+        self._rebuild()
+        return name
+
+    def pick(self, cumulative: List[float], rng: random.Random) -> int:
+        """Index of a player drawn from ``cumulative`` (scorer_cum or booking_cum), -1 if nobody is left."""
+        if not self.active:
+            return -1
+        if not cumulative or cumulative[-1] <= 0:
+            return self.active[rng.randrange(len(self.active))]
+        return self.active[bisect_right(cumulative, rng.random() * cumulative[-1])]
+
+
+def _weighted_mean(values: Sequence[float], weights: Sequence[float]) -> float:
+    total = sum(weights)
+    if not total:
+        return DEFAULT_RATING
+    return sum(v * w for v, w in zip(values, weights)) / total
+
+
+def expected_goals(attacker: TeamProfile, defender: TeamProfile) -> float:
+    """Expected goals over 90 minutes for ``attacker`` against ``defender``."""
+    return BASE_GOALS * math.exp(RATING_SENSITIVITY * (attacker.attack - defender.defence))
+
+
+def _profile(team, name: str, bench: Sequence[Dict[str, Any]] = ()) -> TeamProfile:
+    return team if isinstance(team, TeamProfile) else TeamProfile(team, name, bench)
+
+
+def simulate_match(home, away, seed: Optional[int] = None, home_name: str = "home",
+                   away_name: str = "away", timeline: bool = True,
+                   home_bench: Sequence[Dict[str, Any]] = (),
+                   away_bench: Sequence[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    """
+    Simulate a full match between two XIs (lists of player dicts or
+    TeamProfile objects) and return the final score plus the ordered
+    timeline of goals, chances, cards and substitutions. Substitutes come
+    from the benches (player dicts) when given.
+
+    Events are drawn as a merged Poisson process, so only the minutes where
+    something happens are visited. The same seed always gives the same match.
+    """
+    rng = random.Random(seed)
+    sides = (_profile(home, home_name, home_bench), _profile(away, away_name, away_bench))
+    labels = (home_name, away_name)
+
+    # Per-side rates of each event kind, laid out as one cumulative table
+    kinds = []
+    rates = []
+    for side, (team, opponent) in enumerate((sides, sides[::-1])):
+        xg = expected_goals(team, opponent)
+        kinds += [("goal", side), ("chance", side), ("yellow", side), ("red", side)]
+        rates += [xg, xg * CHANCES_PER_GOAL, YELLOWS_PER_TEAM, REDS_PER_TEAM]
+    cumulative = list(accumulate(rates))
+    total_rate = cumulative[-1] / 90.0
+
+    score = [0, 0]
+    events: List[Dict[str, Any]] = []
+    if timeline:
+        # Substitutions are planned up front so the players they take off leave
+        # the pools for every later event and their replacements join them;
+        # the timeline is then built in order
+        on_pitch = [OnPitch(team) for team in sides]
+        substitutions = sorted((sub_minute, side, player) for side, team in enumerate(sides)
+                               for sub_minute, player in _substitution_plan(team, rng))
+        next_sub = 0
+    minute = rng.expovariate(total_rate)
+    while minute < 90.0:
+        kind, side = kinds[bisect_right(cumulative, rng.random() * cumulative[-1])]
+        if kind == "goal":
+            score[side] += 1
+        if timeline:
+            at = int(minute) + 1
+            while next_sub < len(substitutions) and substitutions[next_sub][0] < at:
+                _substitute(events, substitutions[next_sub], on_pitch, labels)
+                next_sub += 1
+            events.append(_event(kind, at, on_pitch[side], labels[side], rng))
+        minute += rng.expovariate(total_rate)
+
+    if timeline:
+        for substitution in substitutions[next_sub:]:
+            _substitute(events, substitution, on_pitch, labels)
+
+    return {
+        "seed": seed,
+        "home_score": score[0],
+        "away_score": score[1],
+        "events": events,
+    }
+
+
+def _event(kind: str, minute: int, lineup: OnPitch, label: str, rng: random.Random) -> Dict[str, Any]:
+    team = lineup.team
+    index = lineup.pick(lineup.booking_cum if kind in ("yellow", "red") else lineup.scorer_cum, rng)
+    player = lineup.players[index] if index >= 0 else "Unknown"
+    if kind == "goal":
+        description = f"GOAL! {player} finds the net for {team.name}!"
+    elif kind == "chance":
+        description = f"{CHANCE_DESCRIPTIONS[rng.randrange(len(CHANCE_DESCRIPTIONS))]} - {player}"
+    elif kind == "yellow":
+        description = f"Yellow card for {player}"
+    else:
+        description = f"Red card! {player} is sent off"
+        if index >= 0:
+            lineup.remove(index)
+    return {"minute": minute, "type": kind, "team": label, "player": player, "description": description}
+
+
+def _substitution_plan(team: TeamProfile, rng: random.Random) -> List[tuple]:
+    """(minute, player index) of each outfield player to be taken off."""
+    count = min(rng.randint(3, 5), len(team.outfield))
+    return [(rng.randint(46, 88), i) for i in rng.sample(team.outfield, count)]
+
+
+def _substitute(events: List[Dict[str, Any]], substitution: tuple, on_pitch: Sequence[OnPitch],
+                labels: Sequence[str]) -> None:
+    """Append a planned substitution and send the replacement on, unless its player was already sent off."""
+    minute, side, player = substitution
+    if not on_pitch[side].remove(player):
+        return
+    name = on_pitch[side].players[player]
+    replacement = on_pitch[side].bring_on(player)
+    events.append({
+        "minute": minute,
+        "type": "substitution",
+        "team": labels[side],
+        "player": name,
+        "player_in": replacement,
+        "description": f"Substitution: {replacement} comes on for {name}",
+    })
+
+
+def simulate_many(home, away, n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Score-only simulation of ``n`` matches for batch use (no event text)."""
+    home_profile = _profile(home, "home")
+    away_profile = _profile(away, "away")
+    return [
+        simulate_match(home_profile, away_profile, seed=seed + i, timeline=False)
+        for i in range(n)
+    ]
+
+
+def insert_event(match: Dict[str, Any], event: Dict[str, Any], home_name: str = "home") -> None:
+    """Add a scripted event to a simulated match, keeping the timeline ordered and the score in sync."""
+    events = match["events"]
+    minutes = [e["minute"] for e in events]
+    events.insert(bisect_right(minutes, event["minute"]), event)
+    if event.get("type") == "goal":
+        key = "home_score" if event.get("team") == home_name else "away_score"
+        match[key] += 1
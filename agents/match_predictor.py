@@ -2,6 +2,7 @@
 
 import random
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import streamlit as st
@@ -12,6 +13,17 @@ from pydantic import BaseModel, Field
 from typing import Literal, Optional
 from streamlit.components.v1 import html  # Add this at the top of your file
 import os
+from utils.h2h_index import load_h2h_index
+from utils.elo import INITIAL_RATING, load_elo_engine
+from utils.dixon_coles import load_dixon_coles
+from utils.prediction_explainer import load_prediction_explainer
+
+# "elo" (default) or "dixon_coles": which rating model feeds the strength scores
+STRENGTH_MODEL = os.getenv("SPL_STRENGTH_MODEL", "elo")
+# "llm" (default) or "local": the trained outcome classifier, no API call
+PREDICTOR = os.getenv("SPL_PREDICTOR", "llm")
+
+OUTCOMES = ["Home Win", "Draw", "Away Win"]
 
 class MatchPrediction(BaseModel):
     home_team: str = Field(description="Home team name")
@@ -46,48 +58,29 @@ def load_team_stats():
         st.error(f"Error loading team stats: {e}")
         return [], [], []
 
-def calculate_team_strength(team_name, standings_data):
-    """Calculate team strength based on current league position and stats"""
-    # Handle different team name variations
-    team_variations = [
-        team_name.lower(),
-        team_name.lower().replace("al ", "al-"),
-        team_name.lower().replace("al-", "al "),
-    ]
-    
-    for team in standings_data:
-        team_standing_name = team.get("team", "").lower()
-        
-        # Check if any variation matches
-        if any(variation == team_standing_name for variation in team_variations):
-            points = team.get("points", 0)
-            goals_for = team.get("goals_for", 0)
-            goals_against = team.get("goals_against", 0)
-            goal_difference = goals_for - goals_against
-            
-            # Enhanced strength calculation
-            strength = (points * 0.4) + (goal_difference * 0.3) + (goals_for * 0.2) + (goals_against * -0.1)
-            return max(0, strength)  # Ensure non-negative
-    
-    # Fallback strength based on team reputation if not found in standings
-    team_reputation = {
-        "al hilal": 75,
-        "al nassr": 70, 
-        "al ittihad": 68,
-        "al ahli": 65,
-        "al ettifaq": 55,
-        "al shabab": 60,
-        "al taawoun": 50,
-        "al fayha": 45,
-        "al riyadh": 40,
-        "damac": 42
-    }
-    
-    for team_key, reputation in team_reputation.items():
-        if team_key in team_name.lower():
-            return reputation
-    
-    return 50  # Default neutral strength
+def calculate_team_strength(team_name, standings_data, engine=None):
+    """
+    Team strength on a 0-100-ish scale where 50 is an average side: the
+    club's Elo rating, 10 Elo points per strength point. Promoted or
+    otherwise unseen clubs start at INITIAL_RATING like any new Elo entry,
+    i.e. 50, so every club is on the same scale. ``standings_data`` is
+    kept for callers; the ratings already reflect this season's results.
+    ``engine`` replaces the full-history Elo engine (e.g. a walk-forward
+    one in utils.backtest).
+    """
+    if STRENGTH_MODEL == "dixon_coles" and engine is None:
+        return dixon_coles_strength(team_name)
+
+    engine = engine or load_elo_engine()
+    return 50 + (engine.rating(team_name) - INITIAL_RATING) / 10
+
+def dixon_coles_strength(team_name):
+    """
+    Strength from the Dixon–Coles attack/defence fit on the same scale as
+    calculate_team_strength: 50 is average, and +0.1 net log-goals per match
+    is worth 2 points (roughly the spread Elo gives the same clubs).
+    """
+    return 50 + 20 * load_dixon_coles().strength(team_name)
 
 def get_team_top_scorer(team_name, top_scorers_data):
     """Get the top scorer for a specific team"""
@@ -144,6 +137,23 @@ def generate_ai_prediction(home_team, away_team, standings_data, top_scorers_dat
     # Get key players
     home_top_scorer = get_team_top_scorer(home_team, top_scorers_data)
     away_top_scorer = get_team_top_scorer(away_team, top_scorers_data)
+
+    # Head-to-head record from the historical results index
+    h2h_text = load_h2h_index().describe(home_team, away_team)
+
+    # Elo win/draw/loss probabilities (home advantage included)
+    elo = load_elo_engine()
+    p_home, p_draw, p_away = elo.probabilities(home_team, away_team)
+
+    score_model_text = ""
+    if STRENGTH_MODEL == "dixon_coles":
+        dc = load_dixon_coles()
+        xg_home, xg_away = dc.expected_goals(home_team, away_team)
+        likely_home, likely_away = dc.most_likely_score(home_team, away_team)
+        score_model_text = (
+            f"Dixon-Coles Expected Goals: {xg_home:.2f}-{xg_away:.2f}, "
+            f"most likely score {likely_home}-{likely_away}"
+        )
     
     # Create context for LLM
     context = f"""
@@ -160,6 +170,12 @@ def generate_ai_prediction(home_team, away_team, standings_data, top_scorers_dat
     - Playing Away: Yes
     
     Strength Difference: {home_strength - away_strength:.1f} (positive favors home)
+
+    Elo Ratings: {elo.describe(home_team)}; {elo.describe(away_team)}
+    Elo Outcome Probabilities: Home {p_home:.0%}, Draw {p_draw:.0%}, Away {p_away:.0%}
+    {score_model_text}
+
+    Head-to-Head: {h2h_text}
     """
     
     # LLM Prediction Prompt
@@ -169,10 +185,12 @@ def generate_ai_prediction(home_team, away_team, standings_data, top_scorers_dat
          
          Consider these factors:
          - Team strength scores (higher is better)
+         - Elo-based outcome probabilities from historical results
          - Home advantage (worth ~3-5 points)
          - Key players and their impact
          - Typical SPL scoring patterns (1-3 goals per team)
          - Recent form and league position
+         - Head-to-head record between the two clubs
          
          Provide realistic confidence levels (60-85% for clear favorites, 45-60% for close matches).
          """),
@@ -270,6 +288,13 @@ def generate_fallback_prediction(home_team, away_team, home_strength, away_stren
             ]
             player_to_watch = away_top_scorer
     
+    # Factors computed from ratings, form and H2H for the chosen result
+    explanation = load_prediction_explainer().explain(home_team, away_team, outcome=result)
+    if explanation["key_factors"]:
+        key_factors = explanation["key_factors"]
+    if explanation["player_to_watch"] != "Key Player":
+        player_to_watch = explanation["player_to_watch"]
+    
     return {
         "home_team": home_team,
         "away_team": away_team,
@@ -280,6 +305,46 @@ def generate_fallback_prediction(home_team, away_team, home_strength, away_stren
         "player_to_watch": player_to_watch
     }
 
+def likely_scores_for_results(fixtures, results, model=None):
+    """
+    Most likely Dixon-Coles scoreline consistent with each predicted result,
+    for a batch of (home_team, away_team, ...) fixtures: one model load and
+    one stacked set of score matrices.
+    """
+    model = model or load_dixon_coles()
+    matrices = model.score_matrices([f[0] for f in fixtures], [f[1] for f in fixtures])
+    home_goals, away_goals = np.indices(matrices.shape[1:])
+    consistent = np.stack([
+        {"Home Win": home_goals > away_goals, "Draw": home_goals == away_goals,
+         "Away Win": home_goals < away_goals}[result]
+        for result in results
+    ]) if len(results) else np.zeros(matrices.shape, dtype=bool)
+    best = np.argmax(np.where(consistent, matrices, -1.0).reshape(len(matrices), -1), axis=1)
+    return [f"{i}-{j}" for i, j in zip(*np.unravel_index(best, matrices.shape[1:]))]
+
+def generate_local_predictions(fixtures, language="english"):
+    """
+    Predictions for many (home_team, away_team) pairs from the local
+    classifier and explainer: one feature pass and one matrix multiply for
+    the whole batch, with ranked key factors and no LLM call.
+    """
+    fixtures = list(fixtures)
+    explanations = load_prediction_explainer().explain_many(fixtures, language)
+    scores = likely_scores_for_results(fixtures, [e["predicted_result"] for e in explanations])
+    predictions = []
+    for (home, away, *_), explanation, score in zip(fixtures, explanations, scores):
+        result = explanation["predicted_result"]
+        predictions.append({
+            "home_team": home,
+            "away_team": away,
+            "predicted_result": result,
+            "predicted_score": score,
+            "confidence": int(round(100 * max(explanation["probabilities"]))),
+            "key_factors": explanation["key_factors"],
+            "player_to_watch": explanation["player_to_watch"],
+        })
+    return predictions
+
 def get_match_prediction(home_team, away_team):
     """Main function to get match prediction"""
     standings_data, events_data, top_scorers_data = load_team_stats()
@@ -288,6 +353,8 @@ def get_match_prediction(home_team, away_team):
         return None
     
     # Generate prediction
+    if PREDICTOR == "local":
+        return generate_local_predictions([(home_team, away_team)])[0]
     prediction = generate_ai_prediction(home_team, away_team, standings_data, top_scorers_data)
     
     return prediction
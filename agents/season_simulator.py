@@ -0,0 +1,82 @@
+import json
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.team_names import team_display_name, team_id
+
+FIXTURES_FILE = "data/fixtures.json"
+
+# (home win, draw, away win) for a fixture: f(home_id, away_id, date)
+ProbabilityFn = Callable[[int, int, str], Tuple[float, float, float]]
+
+
+def load_season_fixtures(path: str = FIXTURES_FILE) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def simulate_season(fixtures: Sequence[Dict], probabilities: ProbabilityFn,
+                    n_sims: int = 10000, seed: Optional[int] = None,
+                    base_points: Optional[Dict[int, int]] = None,
+                    relegation_places: int = 3) -> pd.DataFrame:
+    """
+    Monte Carlo the remaining fixtures ``n_sims`` times.
+
+    ``probabilities`` supplies the strength model (e.g. EloEngine.probabilities),
+    so any rating system can drive the simulator. All simulations are drawn
+    as one (n_sims, n_fixtures) array; points are accumulated per team with
+    a single matrix product.
+
+    Returns one row per club with expected points, mean finishing position,
+    and title / top-four / relegation probabilities.
+    """
+    rng = np.random.default_rng(seed)
+    home = np.array([team_id(f["home_team"]) for f in fixtures], dtype=np.int64)
+    away = np.array([team_id(f["away_team"]) for f in fixtures], dtype=np.int64)
+    teams, inverse = np.unique(np.concatenate([home, away]), return_inverse=True)
+    home_idx, away_idx = inverse[:len(fixtures)], inverse[len(fixtures):]
+
+    probs = np.array([probabilities(h, a, f.get("date")) for h, a, f in zip(home, away, fixtures)])
+    cumulative = np.cumsum(probs, axis=1)
+    draws = rng.random((n_sims, len(fixtures)))
+    home_win = draws < cumulative[:, 0]
+    draw = ~home_win & (draws < cumulative[:, 1])
+    away_win = ~home_win & ~draw
+
+    # Fixture -> team incidence matrices turn per-fixture points into per-team totals
+    n_teams = len(teams)
+    home_matrix = np.zeros((len(fixtures), n_teams))
+    away_matrix = np.zeros((len(fixtures), n_teams))
+    home_matrix[np.arange(len(fixtures)), home_idx] = 1
+    away_matrix[np.arange(len(fixtures)), away_idx] = 1
+    points = (3 * home_win + draw) @ home_matrix + (3 * away_win + draw) @ away_matrix
+    if base_points:
+        points += np.array([base_points.get(int(t), 0) for t in teams])
+
+    # Random tie-break noise below one point keeps positions a strict ordering
+    order = np.argsort(-(points + rng.random(points.shape) * 0.5), axis=1)
+    positions = np.empty_like(order)
+    positions[np.arange(n_sims)[:, None], order] = np.arange(1, n_teams + 1)
+
+    table = pd.DataFrame({
+        "team_id": teams,
+        "team": [team_display_name(int(t)) for t in teams],
+        "expected_points": points.mean(axis=0),
+        "mean_position": positions.mean(axis=0),
+        "title": (positions == 1).mean(axis=0),
+        "top_four": (positions <= 4).mean(axis=0),
+        "relegation": (positions > n_teams - relegation_places).mean(axis=0),
+    })
+    return table.sort_values("expected_points", ascending=False).reset_index(drop=True)
+
+
+def simulate_season_elo(n_sims: int = 10000, seed: Optional[int] = None,
+                        fixtures: Optional[Sequence[Dict]] = None) -> pd.DataFrame:
+    """Season simulation with Elo ratings (as of each fixture's date) as the strength input."""
+    from utils.elo import load_elo_engine
+
+    engine = load_elo_engine()
+    fixtures = fixtures if fixtures is not None else load_season_fixtures()
+    return simulate_season(fixtures, engine.probabilities, n_sims=n_sims, seed=seed)
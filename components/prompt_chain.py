@@ -8,6 +8,8 @@ from config.env_loader import load_environment
 from utils.helpers import generate_lineup_briefing
 from config.env_loader import load_environment
 from components.rag_engine import build_vectorstore, load_documents, retriever
+from utils.h2h_index import load_h2h_index
+from utils.team_names import find_teams_in_text
 
 env = load_environment()
 docs = load_documents()
@@ -92,6 +94,7 @@ Based on the user's message, classify it into ONE of the following categories:
 - injuries (questions about which players are injured or sidelined)
 - transfers (questions about player movements between clubs)
 - trophies (questions about team honors or titles won)
+- h2h (questions about past meetings or head-to-head records between two clubs)
 
 User message: "{query}"
 
@@ -331,6 +334,28 @@ def load_and_format_match_events():
         return f"⚠️ Failed to load match events: {e}"
 
 
+def load_and_format_h2h(query: str, last_n: int = 5, lang="english"):
+    try:
+        teams = find_teams_in_text(query)
+        if len(teams) < 2:
+            return "Head-to-head questions need two clubs — I could only find " + (
+                "one." if teams else "none.")
+
+        index = load_h2h_index()
+        context = "Head-to-Head Record:\n\n"
+        context += index.describe(teams[0], teams[1], last_n=last_n, language=lang) + "\n"
+        for meeting in index.summary(teams[0], teams[1], last_n=last_n)["recent"]:
+            where = "home" if meeting["home"] else "away"
+            context += f"  • {meeting['date']:%Y-%m-%d} ({where}) {meeting['result']} {meeting['score']}"
+            if meeting["venue"]:
+                context += f" at {meeting['venue']}"
+            context += "\n"
+        return context
+
+    except Exception as e:
+        return f"⚠️ Failed to load head-to-head data: {e}"
+
+
 def load_and_format_teams():
     try:
         with open("data/teams.json", encoding="utf-8") as f:
@@ -24,6 +24,18 @@ from langchain_openai import ChatOpenAI
 from htmlTemplates import user_template, bot_template, css
 from agents.flags import NATIONALITY_FLAGS
 from agents.controlled_simulator import simulate_match_with_leaderboard, reset_match_state, display_leaderboard
+from utils.form_engine import FormEngine
+from utils.results_history import load_results, results_files_version, results_from_records
+from utils.outcome_model import load_local_predictor
+from utils.squad_optimizer import InfeasibleSquadError, optimise_squad
+from utils.transfer_recommender import TransferRecommender
+from utils.lineup_solver import best_lineup
+from utils.player_index import PlayerIndex, player_key
+from utils.player_similarity import SimilarityIndex, parse_similarity_query
+from utils.fantasy_scoring import MatchdayScorer, PlayerCatalog, SquadBook, load_matchdays
+from utils.team_names import team_id
+from utils.projections import GAMEWEEKS, load_projection_engine
+from agents.roster import DIFFICULTY, FORMATIONS, OpponentGenerator, Roster, xi_stats
 import streamlit.components.v1 as components
 
 # WHITE BACKGROUND
@@ -427,12 +439,105 @@ def load_players_data():
             "price": round(player.get("Market value (€)", 1000000) * 4.07, -3),  # 💰 Rounded SAR
             "overall": player.get("Overall", 60),
             "goals": player.get("Goals", 0),
-            "assists": player.get("Assists", 0)
+            "assists": player.get("Assists", 0),
+            "height": player.get("Height", "-"),
+            "foot": player.get("Foot", "unknown")
         })
 
     return pd.DataFrame(players)
 
 
+@st.cache_resource
+def load_player_index(players_version):
+    """Search index over load_players_data(), rebuilt only when players.json changes."""
+    return PlayerIndex(load_players_data())
+
+
+@st.cache_resource
+def load_similarity_index(players_version):
+    """Nearest-neighbour player search over load_players_data(), rebuilt only when players.json changes."""
+    return SimilarityIndex(load_players_data())
+
+
+def answer_similarity_question(question):
+    """
+    Chat answer for "who is like X but under 20M SAR"-style questions, or
+    None to leave the question to the analyst agent.
+    """
+    query = parse_similarity_query(question)
+    if query is None:
+        return None
+    index = load_similarity_index(os.path.getmtime("data/players.json"))
+    row = index.resolve(query["name"])
+    if row is None:
+        return None
+    player = index.players.iloc[row]
+    name = player["name"]
+    max_price = query["max_price"]
+    if query["cheaper"]:
+        max_price = min(max_price if max_price is not None else np.inf, player["price"] - 1)
+    similar = index.similar(row, max_price=max_price, position=player["position"])
+    if similar.empty:
+        return f"I couldn't find anyone like {name} in that price range."
+    limit = f" under {format_sar(max_price)}" if max_price is not None else ""
+    lines = [f"Players most like {name} ({player['position']}, {player['team']}, {format_sar(player['price'])}){limit}:"]
+    for rank, other in enumerate(similar.to_dict("records"), start=1):
+        lines.append(f"{rank}. {other['name']} ({other['team']}, {format_sar(other['price'])}, Overall {other['overall']})")
+    return "<br>".join(lines)
+
+
+@st.cache_resource
+def load_roster(players_version):
+    """Array-backed roster for Match Day, rebuilt only when players.json changes."""
+    return Roster(load_players_data())
+
+
+@st.cache_resource
+def load_opponent_generator(players_version):
+    """Per-line rating-sorted pools for opponent XIs, built once per players.json version."""
+    return OpponentGenerator(load_roster(players_version))
+
+
+@st.cache_resource
+def load_player_catalog(players_version):
+    """Player ids and event-name resolution for fantasy scoring."""
+    return PlayerCatalog(load_players_data())
+
+
+@st.cache_data
+def load_fantasy_matchdays():
+    return load_matchdays()
+
+
+@st.cache_resource
+def load_projections(data_version):
+    """Fixture difficulty and projected points for the next GAMEWEEKS rounds, per data version."""
+    return load_projection_engine(GAMEWEEKS)
+
+
+def projections_version():
+    """Cache key for projections: mtimes of the data files, including the results the Dixon-Coles fit comes from."""
+    mtimes = tuple(os.path.getmtime(p) for p in ("data/fixtures.json", "data/players.json", "data/top_scorers.json"))
+    return mtimes + results_files_version()
+
+
+SQUAD_OBJECTIVES = ["Overall rating", f"Projected points (next {GAMEWEEKS} GWs)"]
+
+
+def squad_objective_values(players_df, objective):
+    """Per-row values for optimise_squad: Overall, or projected points aligned to players_df."""
+    if objective == SQUAD_OBJECTIVES[0]:
+        return "overall"
+    return load_projections(projections_version()).projected_for(players_df)
+
+
+@st.cache_resource
+def load_transfer_recommender(data_version, objective):
+    """Per-position candidate lists for transfer suggestions, per data version and objective."""
+    players_df = load_players_data()
+    return TransferRecommender(players_df, squad_objective_values(players_df, objective))
+
+
 @st.cache_data
 def load_standings_data():
     with open("data/standings.json", "r", encoding="utf-8") as f:
@@ -498,6 +603,12 @@ def load_top_scorers():
 
     return pd.DataFrame(top_scorers)
 
+@st.cache_resource
+def load_form_engine(completed_fixtures):
+    """Rolling team form over historical results plus this season's completed fixtures."""
+    completed = [dict(items) for items in completed_fixtures]
+    return FormEngine.from_results(load_results([results_from_records(completed)]))
+
 
 
 # ================================================
@@ -1501,6 +1612,7 @@ POSITION_COLOR_CODES = {
 with tabs[2]:  # Fantasy Football Tab
     # Load players data for this tab
     players_df = load_players_data()  # Add this line
+    player_index = load_player_index(os.path.getmtime("data/players.json"))
     
     st.markdown("""
     <style>
@@ -1558,9 +1670,9 @@ with tabs[2]:  # Fantasy Football Tab
 
                     selected_players = []
                     for name in predefined_names:
-                        player_row = players_df[players_df['name'] == name]
-                        if not player_row.empty:
-                            selected_players.append(player_row.iloc[0].to_dict())
+                        player = player_index.get(name)
+                        if player is not None:
+                            selected_players.append(player)
 
                     st.session_state.fantasy_team = []
                     st.session_state.budget = 100_000_000
@@ -1579,6 +1691,30 @@ with tabs[2]:  # Fantasy Football Tab
                         })
                         st.session_state.budget -= player["price"]
 
+                squad_objective = st.radio("Optimise for", SQUAD_OBJECTIVES, key="squad_objective", horizontal=True)
+                if st.button("⚡ Build Best Squad", key="optimise_squad"):
+                    try:
+                        best_squad = optimise_squad(players_df, objective=squad_objective_values(players_df, squad_objective))
+                    except InfeasibleSquadError as e:
+                        st.error(f"Could not build a squad: {e}")
+                    else:
+                        st.session_state.fantasy_team = [
+                            {
+                                "name": player["name"],
+                                "position": player["position"],
+                                "team": player["team"],
+                                "price": player["price"],
+                                "overall": player.get("overall", 60),
+                                "age": player.get("age", "N/A"),
+                                "nationality": player.get("nationality", "Unknown"),
+                                "goals": player.get("goals", 0),
+                                "assists": player.get("assists", 0)
+                            }
+                            for player in best_squad.to_dict("records")
+                        ]
+                        st.session_state.budget = 100_000_000 - best_squad["price"].sum()
+                        st.rerun()
+
 
             else:
                 st.markdown(f"### 👥 Your Squad ({len(st.session_state.fantasy_team)}/15)")
@@ -1592,33 +1728,32 @@ with tabs[2]:  # Fantasy Football Tab
 
                 # Filter controls for your squad
                 if len(st.session_state.fantasy_team) > 0:
-                    squad_positions = list(set([p["position"] for p in st.session_state.fantasy_team]))
-                    squad_teams = list(set([p["team"] for p in st.session_state.fantasy_team]))
+                    # Rows, not names: a few names are listed at two clubs
+                    squad_by_row = {player_index.row_of(p): p for p in st.session_state.fantasy_team}
+                    squad_by_row.pop(None, None)
+                    squad_rows = np.array(sorted(squad_by_row), dtype=np.int64)
+                    squad_positions = [player_index.options("position")[c] for c in np.unique(player_index.codes["position"][squad_rows])]
+                    squad_teams = [player_index.options("team")[c] for c in np.unique(player_index.codes["team"][squad_rows])]
                     
                     filter_col1, filter_col2 = st.columns(2)
                     with filter_col1:
-                        position_filter = st.selectbox("Filter by Position", ["All"] + sorted(squad_positions))
+                        position_filter = st.selectbox("Filter by Position", ["All"] + squad_positions)
                     with filter_col2:
-                        team_filter = st.selectbox("Filter by Team", ["All"] + sorted(squad_teams))
+                        team_filter = st.selectbox("Filter by Team", ["All"] + squad_teams)
 
-                    # Apply filters to YOUR SQUAD ONLY
-                    filtered_players = st.session_state.fantasy_team.copy()
-                    
-                    if position_filter != "All":
-                        filtered_players = [p for p in filtered_players if p["position"] == position_filter]
-                    if team_filter != "All":
-                        filtered_players = [p for p in filtered_players if p["team"] == team_filter]
-                    
-                    # Sort your squad
-                    ascending = sort_order == "Ascending"
-                    filtered_players = sorted(filtered_players, key=lambda x: x[sort_by], reverse=not ascending)
+                    # Apply filters and sort within YOUR SQUAD ONLY
+                    _, filtered_df = player_index.query(
+                        sort_by=sort_by, ascending=sort_order == "Ascending", page_size=len(squad_rows),
+                        position=position_filter, team=team_filter, within=squad_rows,
+                    )
+                    filtered_players = [(row, squad_by_row[row]) for row in filtered_df.index]
 
                     # Display your filtered squad
                     st.markdown("---")
                     st.markdown(f"**Showing {len(filtered_players)} of your players**")
                     
                     # Display your squad players with remove buttons only
-                    for idx, player in enumerate(filtered_players):
+                    for row, player in filtered_players:
                         with st.container():
                             player_col1, player_col2, player_col3 = st.columns([3, 1, 1])
 
@@ -1648,12 +1783,112 @@ with tabs[2]:  # Fantasy Football Tab
 
                             with player_col3:
                                 # Only show remove button since these are YOUR players
-                                if st.button("Remove", key=f"remove_{idx}_{player['name']}", type="secondary"):
+                                if st.button("Remove", key=f"remove_{row}", type="secondary"):
                                     # Remove player from team
-                                    st.session_state.fantasy_team = [p for p in st.session_state.fantasy_team if p["name"] != player['name']]
+                                    st.session_state.fantasy_team = [p for p in st.session_state.fantasy_team if player_key(p) != player_key(player)]
                                     st.session_state.budget += player["price"]
                                     st.rerun()
 
+            # Search the full player pool
+            with st.expander("🔍 Find Players", expanded=len(st.session_state.fantasy_team) == 0):
+                search_name = st.text_input("Search by name", key="search_name")
+                search_col1, search_col2, search_col3 = st.columns(3)
+                with search_col1:
+                    search_position = st.selectbox("Position", ["All"] + player_index.options("position"), key="search_position")
+                with search_col2:
+                    search_team = st.selectbox("Club", ["All"] + player_index.options("team"), key="search_team")
+                with search_col3:
+                    search_nationality = st.selectbox("Nationality", ["All"] + player_index.options("nationality"), key="search_nationality")
+
+                search_col4, search_col5, search_col6 = st.columns(3)
+                with search_col4:
+                    search_sort = st.selectbox("Sort by", ["overall", "price", "age", "goals", "assists", "name"], key="search_sort")
+                with search_col5:
+                    search_order = st.selectbox("Order", ["Descending", "Ascending"], key="search_order")
+                with search_col6:
+                    affordable_only = st.checkbox("Affordable only", key="search_affordable")
+
+                criteria = dict(
+                    name=search_name, position=search_position, team=search_team, nationality=search_nationality,
+                    max_price=st.session_state.budget if affordable_only else None,
+                    exclude=player_index.rows_for_players(st.session_state.fantasy_team),
+                )
+                # Filter and sort once; the page count and the page both come from these rows
+                matches = player_index.sort(player_index.filter(**criteria), search_sort, search_order == "Ascending")
+                total_matches = len(matches)
+                pages = max(1, -(-total_matches // 10))
+                search_page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="search_page")
+                results_page = player_index.page(matches, search_page - 1, page_size=10)
+                st.caption(f"{total_matches} players found")
+
+                squad_counts = {}
+                for p in st.session_state.fantasy_team:
+                    squad_counts[p["position"]] = squad_counts.get(p["position"], 0) + 1
+                position_limits = {"Goalkeeper": 2, "Defender": 5, "Midfielder": 5, "Forward": 3}
+
+                for row, player in zip(results_page.index, results_page.to_dict("records")):
+                    result_col1, result_col2, result_col3 = st.columns([3, 1, 1])
+                    with result_col1:
+                        st.markdown(f"**{player['name']}**  \n{player['team']} • {player['position']} • {player['nationality']}")
+                    with result_col2:
+                        st.markdown(f"{player['overall']} | {format_sar(player['price'])}")
+                    with result_col3:
+                        can_add = (
+                            len(st.session_state.fantasy_team) < 15
+                            and player["price"] <= st.session_state.budget
+                            and squad_counts.get(player["position"], 0) < position_limits.get(player["position"], 0)
+                        )
+                        if st.button("Add", key=f"add_{row}", disabled=not can_add):
+                            st.session_state.fantasy_team.append({
+                                "name": player["name"],
+                                "position": player["position"],
+                                "team": player["team"],
+                                "price": player["price"],
+                                "overall": player.get("overall", 60),
+                                "age": player.get("age", "N/A"),
+                                "nationality": player.get("nationality", "Unknown"),
+                                "goals": player.get("goals", 0),
+                                "assists": player.get("assists", 0)
+                            })
+                            st.session_state.budget -= player["price"]
+                            st.rerun()
+
+            # "A cheaper version of X": nearest neighbours on rating, age, output, price, foot and height
+            with st.expander("🧬 Similar Players"):
+                similarity_index = load_similarity_index(os.path.getmtime("data/players.json"))
+                similar_to = st.selectbox(
+                    "Players like", sorted(range(len(similarity_index)), key=lambda row: (similarity_index.names[row], row)),
+                    format_func=lambda row: f"{similarity_index.names[row]} ({similarity_index.players.iloc[row]['team']})",
+                    key="similar_to",
+                )
+                similar_col1, similar_col2, similar_col3 = st.columns(3)
+                with similar_col1:
+                    similar_cheaper = st.checkbox("Cheaper only", value=True, key="similar_cheaper")
+                with similar_col2:
+                    similar_same_position = st.checkbox("Same position", value=True, key="similar_same_position")
+                with similar_col3:
+                    similar_affordable = st.checkbox("Affordable only", key="similar_affordable")
+                similar_exclude_clubs = st.multiselect("Exclude clubs", player_index.options("team"), key="similar_exclude_clubs")
+
+                reference = similarity_index.players.iloc[similar_to]
+                price_caps = ([reference["price"] - 1] if similar_cheaper else []) + \
+                    ([st.session_state.budget] if similar_affordable else [])
+                similar_players = similarity_index.similar(
+                    similar_to,
+                    max_price=min(price_caps) if price_caps else None,
+                    position=reference["position"] if similar_same_position else None,
+                    exclude_clubs=similar_exclude_clubs,
+                    exclude=[player_key(p) for p in st.session_state.fantasy_team],
+                )
+                if similar_players.empty:
+                    st.info("No similar players match these filters.")
+                for player in similar_players.to_dict("records"):
+                    similar_result_col1, similar_result_col2 = st.columns([3, 1])
+                    with similar_result_col1:
+                        st.markdown(f"**{player['name']}**  \n{player['team']} • {player['position']} • {player['overall']} | {format_sar(player['price'])}")
+                    with similar_result_col2:
+                        st.caption(f"distance {player['distance']:.2f}")
+
         with col2:
             team_size = len(st.session_state.fantasy_team)
             total_budget = 100_000_000
@@ -1728,17 +1963,65 @@ with tabs[2]:  # Fantasy Football Tab
             else:
                 st.markdown(f"#### 👥 Current Squad ({team_size}/11)")
 
+            # Best XI from the squad, re-solved on every edit; captaincy goes by projected points
+            squad_lineup = None
+            if team_size >= 11:
+                squad_lineup = best_lineup(
+                    st.session_state.fantasy_team,
+                    captain_scores=load_projections(projections_version()).projected_for(pd.DataFrame(st.session_state.fantasy_team)),
+                )
+                if squad_lineup:
+                    st.caption(f"Best XI: {squad_lineup['formation']} • Suggested captain: {squad_lineup['captain']}"
+                               f" (vice: {squad_lineup['vice_captain']})")
+                    if squad_lineup["bench"]:
+                        st.caption("Bench order: " + ", ".join(p["name"] for p in squad_lineup["bench"]))
+                else:
+                    st.caption("No legal formation in this squad yet.")
+
             if team_size > 0:
                 # Captain / Vice Captain selection
+                # By squad slot: a name listed at two clubs must not pick the other player
                 player_names = [p["name"] for p in st.session_state.fantasy_team]
-                captain = st.selectbox("Select Captain", player_names, key="captain_select")
-                vice_captain = st.selectbox("Select Vice Captain", [name for name in player_names if name != captain], key="vice_captain_select")
+                player_labels = [p["name"] if player_names.count(p["name"]) == 1 else f"{p['name']} ({p['team']})"
+                                 for p in st.session_state.fantasy_team]
+                captain_slot = st.selectbox("Select Captain", range(team_size), format_func=player_labels.__getitem__,
+                                            key="captain_slot")
+                vice_captain_slot = st.selectbox("Select Vice Captain", [i for i in range(team_size) if i != captain_slot],
+                                                 format_func=player_labels.__getitem__, key="vice_captain_slot")
+                captain = player_names[captain_slot]
+                vice_captain = player_names[vice_captain_slot] if vice_captain_slot is not None else None
 
                 st.session_state.captain = captain
                 st.session_state.vice_captain = vice_captain
 
                 st.markdown(f"**Captain:** {captain}  \n**Vice Captain:** {vice_captain}")
 
+                # Fantasy points from a matchday's real events
+                with st.expander("📈 Matchday Points"):
+                    matchdays = load_fantasy_matchdays()
+                    if matchdays:
+                        matchday = st.selectbox("Matchday", list(matchdays)[::-1], key="points_matchday")
+                        catalog = load_player_catalog(os.path.getmtime("data/players.json"))
+                        resolved = [catalog.resolve(p["name"], team_id(p["team"])) for p in st.session_state.fantasy_team]
+                        known = [i for i, pid in enumerate(resolved) if pid is not None]
+                        squad_ids = [resolved[i] for i in known]
+                        if vice_captain is None:
+                            st.info("Pick a vice-captain to score this matchday.")
+                        elif resolved[captain_slot] is None or resolved[vice_captain_slot] is None:
+                            st.warning("The captain or vice-captain has no match in the player catalog, so the squad can't be scored.")
+                        else:
+                            # Only the best XI scores; without one (under 11 players) everyone plays
+                            xi = {player_key(p) for p in squad_lineup["xi"]} if squad_lineup else None
+                            starters = [xi is None or player_key(st.session_state.fantasy_team[i]) in xi for i in known]
+                            book = SquadBook.from_squads([squad_ids], [resolved[captain_slot]], [resolved[vice_captain_slot]],
+                                                         starters=[starters])
+                            scorer = MatchdayScorer(catalog, book)
+                            scorer.load(matchdays[matchday])
+                            st.metric("Squad points (captain x2)", f"{book.totals[0]:.0f}")
+                            st.dataframe(scorer.breakdown(squad_ids), hide_index=True, use_container_width=True)
+                    else:
+                        st.info("No match events available yet.")
+
                 # Player List
                 for i, player in enumerate(st.session_state.fantasy_team):
                     emoji = position_emojis.get(player["position"], "👤")
@@ -1749,6 +2032,62 @@ with tabs[2]:  # Fantasy Football Tab
                     </div>
                     """, unsafe_allow_html=True)
 
+                # Fixture difficulty for the squad's clubs (1 easiest, 5 hardest)
+                with st.expander(f"🗓️ Fixture Difficulty (next {GAMEWEEKS} GWs)"):
+                    projections = load_projections(projections_version())
+                    squad_clubs = sorted({p["team"] for p in st.session_state.fantasy_team})
+                    st.dataframe(projections.difficulty_frame(squad_clubs), use_container_width=True)
+                    projected = projections.projected_for(pd.DataFrame(st.session_state.fantasy_team))
+                    st.caption(f"Projected squad points: {projected.sum():.1f}")
+
+                # Best swaps for a full squad, within the bank and the club limit
+                if team_size == 15:
+                    with st.expander("🔁 Transfer Suggestions"):
+                        transfer_objective = st.radio("Optimise for", SQUAD_OBJECTIVES, key="squad_objective", horizontal=True)
+                        recommender = load_transfer_recommender(projections_version(), transfer_objective)
+                        squad_keys = [player_key(p) for p in st.session_state.fantasy_team]
+                        singles = recommender.single_transfers(squad_keys, st.session_state.budget)
+                        if singles.empty:
+                            st.info("No affordable upgrades for this squad.")
+                        else:
+                            st.dataframe(singles.assign(cost=singles["cost"].map(lambda c: f"SAR {c / 1_000_000:+.1f}M"),
+                                                        bank_after=singles["bank_after"].map(format_sar)),
+                                         hide_index=True, use_container_width=True)
+                        max_moves = st.selectbox("Moves at once", [2, 3], key="transfer_moves")
+                        for combo in recommender.combinations(squad_keys, st.session_state.budget, max_moves=max_moves):
+                            moves = ", ".join(f"{out} → {player_in}" for out, player_in in combo["moves"])
+                            st.markdown(f"**+{combo['gain']:.1f}** ({format_sar(combo['bank_after'])} left): {moves}")
+
+                if team_size < 15:
+                    squad_objective = st.radio("Optimise for", SQUAD_OBJECTIVES, key="squad_objective", horizontal=True)
+                if team_size < 15 and st.button("⚡ Complete Squad", key="complete_squad"):
+                    # Keep everyone already picked and fill the open slots optimally
+                    try:
+                        completed = optimise_squad(
+                            players_df, objective=squad_objective_values(players_df, squad_objective),
+                            locked=[player_key(p) for p in st.session_state.fantasy_team],
+                        )
+                    except InfeasibleSquadError as e:
+                        st.error(f"Could not complete the squad: {e}")
+                    else:
+                        picked = {player_key(p) for p in st.session_state.fantasy_team}
+                        for player in completed.to_dict("records"):
+                            if player_key(player) in picked:
+                                continue
+                            st.session_state.fantasy_team.append({
+                                "name": player["name"],
+                                "position": player["position"],
+                                "team": player["team"],
+                                "price": player["price"],
+                                "overall": player.get("overall", 60),
+                                "age": player.get("age", "N/A"),
+                                "nationality": player.get("nationality", "Unknown"),
+                                "goals": player.get("goals", 0),
+                                "assists": player.get("assists", 0)
+                            })
+                            st.session_state.budget -= player["price"]
+                        st.rerun()
+
                 if st.button("🗑️ Clear Team", type="secondary"):
                     st.session_state.fantasy_team = []
                     st.session_state.budget = 100_000_000
@@ -1760,24 +2099,13 @@ with tabs[2]:  # Fantasy Football Tab
     with fantasy_tabs[1]:
         st.markdown("### 🎮 Match Day Simulation")
 
-        if len(st.session_state.fantasy_team) == 11:
-            # Load players data for opponent team
-            players_df = load_players_data()
-            
-            # Create player lookup
-            player_lookup = {p["name"]: p for p in st.session_state.fantasy_team}
-            
-            # Add all other players to lookup for opponent selection
-            for _, player in players_df.iterrows():
-                if player["name"] not in player_lookup:
-                    player_lookup[player["name"]] = {
-                        "name": player["name"],
-                        "overall": player.get("overall", 60),
-                        "position": player.get("position", "-"),
-                        "team": player.get("team", "-"),
-                        "nationality": player.get("nationality", "-"),
-                        "age": player.get("age", "-")
-                    }
+        # A bigger squad plays its best legal XI; exactly 11 players play as picked
+        match_lineup = best_lineup(st.session_state.fantasy_team) if len(st.session_state.fantasy_team) > 11 else None
+        match_xi = match_lineup["xi"] if match_lineup else st.session_state.fantasy_team
+
+        if len(match_xi) == 11:
+            # Opponent pools over the array-backed roster, cached across reruns
+            opponent_generator = load_opponent_generator(os.path.getmtime("data/players.json"))
 
             # Function to display player in match day format
             def display_player_minimal(player, index):
@@ -1805,28 +2133,35 @@ with tabs[2]:  # Fantasy Football Tab
             # User XI
             with col1:
                 st.markdown("### 🟢 Your Starting XI")
+                if match_lineup:
+                    st.caption(f"Best formation: {match_lineup['formation']} • Suggested captain: {match_lineup['captain']}")
                 
-                for i, player in enumerate(st.session_state.fantasy_team, start=1):
+                for i, player in enumerate(match_xi, start=1):
                     display_player_minimal(player, i)
+                if match_lineup and match_lineup["bench"]:
+                    st.caption("Bench: " + ", ".join(p["name"] for p in match_lineup["bench"]))
 
             # Opponent XI
             with col2:
                 st.markdown("### 🔴 Opponent XI")
 
-                # Get names of user's selected players to avoid duplicates
-                user_player_names = {p["name"] for p in st.session_state.fantasy_team}
-                
-                # Create opponent pool
-                available_opponents = []
-                for player in player_lookup.values():
-                    if player["name"] not in user_player_names:
-                        available_opponents.append(player)
-                
-                # Generate or retrieve opponent XI
-                if "opponent_xi" not in st.session_state:
-                    import random
-                    opponent_xi = random.sample(available_opponents, k=min(11, len(available_opponents)))
+                # (name, club) of the user's selected players, to avoid duplicates
+                user_player_keys = {player_key(p) for p in st.session_state.fantasy_team}
+
+                opponent_col1, opponent_col2 = st.columns(2)
+                with opponent_col1:
+                    opponent_formation = st.selectbox("Formation", list(FORMATIONS), key="opponent_formation")
+                with opponent_col2:
+                    opponent_difficulty = st.selectbox("Difficulty", list(DIFFICULTY), index=1, key="opponent_difficulty",
+                                                       format_func=str.title)
+                opponent_settings = (opponent_formation, opponent_difficulty)
+                opponent_target = xi_stats(match_xi)["mean"] + DIFFICULTY[opponent_difficulty]
+
+                # Generate or retrieve opponent XI; changing the settings draws a new one
+                if "opponent_xi" not in st.session_state or st.session_state.get("opponent_settings") != opponent_settings:
+                    opponent_xi = opponent_generator.generate(opponent_target, opponent_formation, exclude=user_player_keys)
                     st.session_state.opponent_xi = opponent_xi
+                    st.session_state.opponent_settings = opponent_settings
                 else:
                     opponent_xi = st.session_state.opponent_xi
 
@@ -1834,7 +2169,7 @@ with tabs[2]:  # Fantasy Football Tab
                     display_player_minimal(player, i)
                     
             # Team statistics
-            user_xi = st.session_state.fantasy_team
+            user_xi = match_xi
             opponent_xi = st.session_state.get("opponent_xi", [])
             
             st.divider()
@@ -1842,105 +2177,62 @@ with tabs[2]:  # Fantasy Football Tab
             
             col_stats1, col_stats2 = st.columns(2)
             
+            # All rating statistics for both sides, computed once per rerun
+            user_stats = xi_stats(user_xi)
+            opponent_stats = xi_stats(opponent_xi)
+
+            def render_team_stats(stats, color):
+                lines = " | ".join(f"{line}: {avg:.1f}" for line, avg in stats["lines"].items())
+                st.markdown(f"""
+                    <div style="text-align: center;">
+                        <h1 style="color: {color}; font-size: 48px; margin-bottom: 0;">{stats['mean']:.1f}</h1>
+                        <p style="font-size: 18px; color: white;">Team Overall Rating</p>
+                        <p style="font-size: 14px; color: white;">
+                            Highest: {stats['max']:.1f} | 
+                            Lowest: {stats['min']:.1f} | 
+                            Spread: {stats['spread']:.1f}
+                        </p>
+                        <p style="font-size: 13px; color: #ccc;">{lines}</p>
+                    </div>
+                """, unsafe_allow_html=True)
+
             with col_stats1:
                 if len(user_xi) == 11:
-                    user_ratings = []
-                    for player in user_xi:
-                        rating = player.get("overall", 60)
-                        try:
-                            rating = float(rating) if rating != "-" else 60.0
-                        except (ValueError, TypeError):
-                            rating = 60.0
-                        user_ratings.append(rating)
-
-                    if user_ratings:
-                        user_avg = sum(user_ratings) / len(user_ratings)
-                        st.markdown(f"""
-                            <div style="text-align: center;">
-                                <h1 style="color: #16C60C; font-size: 48px; margin-bottom: 0;">{user_avg:.1f}</h1>
-                                <p style="font-size: 18px; color: white;">Team Overall Rating</p>
-                                <p style="font-size: 14px; color: white;">
-                                    Highest: {max(user_ratings):.1f} | 
-                                    Lowest: {min(user_ratings):.1f} | 
-                                    Spread: {(max(user_ratings) - min(user_ratings)):.1f}
-                                </p>
-                            </div>
-                        """, unsafe_allow_html=True)
+                    render_team_stats(user_stats, "#16C60C")
             
             with col_stats2:
                 if opponent_xi:
-                    opponent_ratings = []
-                    for player in opponent_xi:
-                        rating = player.get("overall", 60)
-                        try:
-                            rating = float(rating) if rating != "-" else 60.0
-                        except (ValueError, TypeError):
-                            rating = 60.0
-                        opponent_ratings.append(rating)
-
-                    if opponent_ratings:
-                        opponent_avg = sum(opponent_ratings) / len(opponent_ratings)
-                        st.markdown(f"""
-                            <div style="text-align: center;">
-                                <h1 style="color: red; font-size: 48px; margin-bottom: 0;">{opponent_avg:.1f}</h1>
-                                <p style="font-size: 18px; color: white;">Team Overall Rating</p>
-                                <p style="font-size: 14px; color: white;">
-                                    Highest: {max(opponent_ratings):.1f} | 
-                                    Lowest: {min(opponent_ratings):.1f} | 
-                                    Spread: {(max(opponent_ratings) - min(opponent_ratings)):.1f}
-                                </p>
-                            </div>
-                        """, unsafe_allow_html=True)
+                    render_team_stats(opponent_stats, "red")
 
             # Match prediction
             if len(user_xi) == 11 and opponent_xi:
                 st.divider()
                 st.subheader("⚔️ Match Prediction")
                 
-                user_ratings = []
-                opponent_ratings = []
+                user_avg = user_stats["mean"]
+                opponent_avg = opponent_stats["mean"]
                 
-                # Calculate averages
-                for player in user_xi:
-                    rating = player.get("overall", 60)
-                    try:
-                        rating = float(rating) if rating != "-" else 60.0
-                    except (ValueError, TypeError):
-                        rating = 60.0
-                    user_ratings.append(rating)
+                difference = user_avg - opponent_avg
                 
-                for player in opponent_xi:
-                    rating = player.get("overall", 60)
-                    try:
-                        rating = float(rating) if rating != "-" else 60.0
-                    except (ValueError, TypeError):
-                        rating = 60.0
-                    opponent_ratings.append(rating)
+                if abs(difference) < 2:
+                    prediction = "🤝 Evenly Matched! This should be a close game."
+                    color = "orange"
+                elif difference > 0:
+                    prediction = f"🟢 Your Team Favoured! You have a {difference:.1f} point advantage."
+                    color = "green"
+                else:
+                    prediction = f"🔴 Opponent Favoured! They have a {abs(difference):.1f} point advantage."
+                    color = "red"
                 
-                if user_ratings and opponent_ratings:
-                    user_avg = sum(user_ratings) / len(user_ratings)
-                    opponent_avg = sum(opponent_ratings) / len(opponent_ratings)
-                    
-                    difference = user_avg - opponent_avg
-                    
-                    if abs(difference) < 2:
-                        prediction = "🤝 Evenly Matched! This should be a close game."
-                        color = "orange"
-                    elif difference > 0:
-                        prediction = f"🟢 Your Team Favoured! You have a {difference:.1f} point advantage."
-                        color = "green"
-                    else:
-                        prediction = f"🔴 Opponent Favoured! They have a {abs(difference):.1f} point advantage."
-                        color = "red"
-                    
-                    st.markdown(f"<div style='color: {color}; font-size: 16px; text-align: center; padding: 10px; border: 2px solid {color}; border-radius: 10px;'>{prediction}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div style='color: {color}; font-size: 16px; text-align: center; padding: 10px; border: 2px solid {color}; border-radius: 10px;'>{prediction}</div>", unsafe_allow_html=True)
 
-                    # Simulate Match button
-                    st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True)
-                    col1, col2, col3 = st.columns([5, 2, 1])
-                    with col2:
-                        username = st.session_state.get("username", None)
-                        simulate_match_with_leaderboard(user_xi, opponent_xi, username)
+                # Simulate Match button
+                st.markdown("<div style='margin-top: 1.5rem;'></div>", unsafe_allow_html=True)
+                col1, col2, col3 = st.columns([5, 2, 1])
+                with col2:
+                    username = st.session_state.get("username", None)
+                    simulate_match_with_leaderboard(user_xi, opponent_xi, username,
+                                                    user_bench=match_lineup["bench"] if match_lineup else ())
 
             
             # Regenerate opponent team functionality
@@ -1957,16 +2249,8 @@ with tabs[2]:  # Fantasy Football Tab
                 with col3:
                     button_text = f"🔄 Generate New Opponent XI ({remaining_regenerations} left)"
                     if st.button(button_text):
-                        import random
-                        available_opponents = [
-                            player for player in player_lookup.values()
-                            if player["name"] not in user_player_names
-                        ]
-                        
-                        if len(available_opponents) >= 11:
-                            st.session_state.opponent_xi = random.sample(available_opponents, k=11)
-                        else:
-                            st.session_state.opponent_xi = random.sample(list(player_lookup.values()), k=11)
+                        st.session_state.opponent_xi = opponent_generator.generate(
+                            opponent_target, opponent_formation, exclude=user_player_keys)
                         
                         st.session_state.opponent_regeneration_count += 1
                         st.rerun()
@@ -1983,7 +2267,7 @@ with tabs[2]:  # Fantasy Football Tab
             display_leaderboard()
 
         else:
-            st.warning("⚠️ Please select 11 players in the Fantasy Team tab first!")
+            st.warning("⚠️ Please select at least 11 players, including a goalkeeper and a legal formation, in the Fantasy Team tab first!")
 
 
 
@@ -2264,17 +2548,35 @@ with tabs[4]:  # Fixtures Tab
     
     # Enhanced fixtures data with more details
     fixtures = [
-        {"date": "2025-08-24", "time": "19:00", "home": "Al Hilal", "away": "Al Nassr", "venue": "Kingdom Arena", "matchday": 5, "status": "upcoming", "home_form": "WWDWL", "away_form": "WLWWW", "prediction": "Draw"},
-        {"date": "2025-08-25", "time": "20:00", "home": "Al Ittihad", "away": "Al Ahli", "venue": "King Abdullah Sports City", "matchday": 5, "status": "upcoming", "home_form": "LWWDW", "away_form": "WWLWL", "prediction": "Home Win"},
-        {"date": "2025-08-26", "time": "18:30", "home": "Al Ettifaq", "away": "Al Taawoun", "venue": "Prince Mohammed bin Fahd Stadium", "matchday": 5, "status": "upcoming", "home_form": "DLWWL", "away_form": "LLDWW", "prediction": "Home Win"},
-        {"date": "2025-08-27", "time": "20:00", "home": "Al Fayha", "away": "Al Shabab", "venue": "Al Majma'ah Stadium", "matchday": 5, "status": "upcoming", "home_form": "WLDLL", "away_form": "DWWLW", "prediction": "Away Win"},
-        {"date": "2025-08-28", "time": "21:00", "home": "Al Riyadh", "away": "Damac", "venue": "Prince Faisal bin Fahd Stadium", "matchday": 5, "status": "upcoming", "home_form": "LLWDL", "away_form": "WDLWL", "prediction": "Draw"},
+        {"date": "2025-08-24", "time": "19:00", "home": "Al Hilal", "away": "Al Nassr", "venue": "Kingdom Arena", "matchday": 5, "status": "upcoming"},
+        {"date": "2025-08-25", "time": "20:00", "home": "Al Ittihad", "away": "Al Ahli", "venue": "King Abdullah Sports City", "matchday": 5, "status": "upcoming"},
+        {"date": "2025-08-26", "time": "18:30", "home": "Al Ettifaq", "away": "Al Taawoun", "venue": "Prince Mohammed bin Fahd Stadium", "matchday": 5, "status": "upcoming"},
+        {"date": "2025-08-27", "time": "20:00", "home": "Al Fayha", "away": "Al Shabab", "venue": "Al Majma'ah Stadium", "matchday": 5, "status": "upcoming"},
+        {"date": "2025-08-28", "time": "21:00", "home": "Al Riyadh", "away": "Damac", "venue": "Prince Faisal bin Fahd Stadium", "matchday": 5, "status": "upcoming"},
         # Recent results
-        {"date": "2025-08-17", "time": "19:00", "home": "Al Nassr", "away": "Al Hilal", "venue": "Mrsool Park", "matchday": 4, "status": "completed", "home_score": 2, "away_score": 3, "home_form": "WLWWW", "away_form": "WWDWL"},
-        {"date": "2025-08-18", "time": "20:30", "home": "Al Ahli", "away": "Al Ittihad", "venue": "King Abdullah Stadium", "matchday": 4, "status": "completed", "home_score": 1, "away_score": 1, "home_form": "WWLWL", "away_form": "LWWDW"},
-        {"date": "2025-08-19", "time": "18:00", "home": "Al Shabab", "away": "Al Ettifaq", "venue": "Al Shabab Stadium", "matchday": 4, "status": "completed", "home_score": 0, "away_score": 2, "home_form": "DWWLW", "away_form": "DLWWL"},
+        {"date": "2025-08-17", "time": "19:00", "home": "Al Nassr", "away": "Al Hilal", "venue": "Mrsool Park", "matchday": 4, "status": "completed", "home_score": 2, "away_score": 3},
+        {"date": "2025-08-18", "time": "20:30", "home": "Al Ahli", "away": "Al Ittihad", "venue": "King Abdullah Stadium", "matchday": 4, "status": "completed", "home_score": 1, "away_score": 1},
+        {"date": "2025-08-19", "time": "18:00", "home": "Al Shabab", "away": "Al Ettifaq", "venue": "Al Shabab Stadium", "matchday": 4, "status": "completed", "home_score": 0, "away_score": 2},
     ]
     
+    # Form is computed from results as of each fixture's kick-off, so a
+    # completed match shows the form the teams brought into it
+    completed = tuple(
+        tuple(sorted(f.items())) for f in fixtures if f["status"] == "completed"
+    )
+    form_engine = load_form_engine(completed)
+    for fixture in fixtures:
+        fixture["home_form"] = form_engine.form_string(fixture["home"], before=fixture["date"])
+        fixture["away_form"] = form_engine.form_string(fixture["away"], before=fixture["date"])
+
+    # Prediction badges for every upcoming fixture in one batched classifier call
+    upcoming = [f for f in fixtures if f["status"] == "upcoming"]
+    outcome_labels = np.array(["Home Win", "Draw", "Away Win"])
+    if upcoming:
+        probabilities = load_local_predictor().predict_many([(f["home"], f["away"]) for f in upcoming])
+        for fixture, label in zip(upcoming, outcome_labels[probabilities.argmax(axis=1)]):
+            fixture["prediction"] = str(label)
+    
     # Convert to DataFrame for easier filtering
     import pandas as pd
     from datetime import datetime, timedelta
@@ -2931,7 +3233,8 @@ if user_input:
         
         User Question: {user_input}
         """
-        answer = agent.run(context_prompt)
+        # Similar-player questions are answered straight from the index
+        answer = answer_similarity_question(user_input) or agent.run(context_prompt)
     except Exception as e:
         answer = f"⚠️ Sorry {username}, I ran into an error: {str(e)}"
 
@@ -0,0 +1,406 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.dixon_coles import DixonColesModel
+from utils.elo import EloEngine
+from utils.outcome_model import MIN_TRAINING_MATCHES, FeatureState, OutcomeClassifier, training_set
+from utils.results_history import load_results
+from utils.team_names import team_display_name
+
+OUTCOMES = ("Home Win", "Draw", "Away Win")
+CALIBRATION_BINS = 10
+LLM_CACHE_FILE = "data/llm_prediction_cache.jsonl"
+
+
+def outcome_index(home_goals: int, away_goals: int) -> int:
+    return 0 if home_goals > away_goals else 1 if home_goals == away_goals else 2
+
+
+# ----------------------------------------------------------------- predictors --
+class Predictor:
+    """
+    Walk-forward predictor interface. ``warm_up`` sees every result before
+    the season; then, match by match, ``predict`` is called before
+    ``observe`` reveals the result, so only prior data is ever used.
+    """
+
+    name = "base"
+
+    def warm_up(self, history: pd.DataFrame) -> None:
+        for row in history[["date", "home_id", "away_id", "home_goals", "away_goals"]].itertuples(index=False):
+            self.observe(*row)
+
+    def predict(self, date, home: int, away: int) -> Tuple[float, float, float]:
+        raise NotImplementedError
+
+    def observe(self, date, home: int, away: int, home_goals: int, away_goals: int) -> None:
+        pass
+
+
+class BaseRatePredictor(Predictor):
+    """Historical home/draw/away frequencies; the floor any model should beat."""
+
+    name = "base_rate"
+
+    def __init__(self):
+        self.counts = np.ones(3)
+
+    def predict(self, date, home, away):
+        return tuple(self.counts / self.counts.sum())
+
+    def observe(self, date, home, away, home_goals, away_goals):
+        self.counts[outcome_index(home_goals, away_goals)] += 1
+
+
+class EloPredictor(Predictor):
+    name = "elo"
+
+    def __init__(self):
+        self.engine = EloEngine()
+
+    def predict(self, date, home, away):
+        return self.engine.probabilities(home, away)
+
+    def observe(self, date, home, away, home_goals, away_goals):
+        self.engine.apply_result(date, home, away, home_goals, away_goals)
+
+
+class DixonColesPredictor(Predictor):
+    """Refits (warm-started) at the start of each new match day."""
+
+    name = "dixon_coles"
+
+    def __init__(self, min_matches: int = 30):
+        self.model = DixonColesModel()
+        self.min_matches = min_matches
+        self.rows: List[Tuple] = []
+        self.fitted_day = None
+
+    def observe(self, date, home, away, home_goals, away_goals):
+        self.rows.append((date, home, away, home_goals, away_goals))
+
+    def predict(self, date, home, away):
+        if len(self.rows) < self.min_matches:
+            return (0.45, 0.27, 0.28)
+        day = pd.Timestamp(date).floor("D")
+        if day != self.fitted_day:
+            history = pd.DataFrame(self.rows, columns=["date", "home_id", "away_id", "home_goals", "away_goals"])
+            self.model.fit(history, as_of=day, warm_start=True)
+            self.fitted_day = day
+        return self.model.probabilities(home, away)
+
+
+class LogisticPredictor(Predictor):
+    """Outcome classifier trained on the seasons before the one being replayed."""
+
+    name = "logistic"
+
+    def __init__(self):
+        self.state = FeatureState()
+        self.model = None
+
+    def warm_up(self, history: pd.DataFrame) -> None:
+        X, y, self.state = training_set(history)
+        if len(y) >= MIN_TRAINING_MATCHES:
+            self.model = OutcomeClassifier.fit(X, y)
+
+    def predict(self, date, home, away):
+        if self.model is None:
+            return (0.45, 0.27, 0.28)
+        return tuple(self.model.predict_proba([self.state.features(home, away, date)])[0])
+
+    def observe(self, date, home, away, home_goals, away_goals):
+        self.state.observe(date, home, away, home_goals, away_goals)
+
+
+def label_to_probabilities(prediction: Dict, floor: float = 0.05) -> Tuple[float, float, float]:
+    """
+    Turn a label-style prediction ({"predicted_result", "confidence"}, as
+    returned by match_predictor) into probabilities: the confidence goes to
+    the predicted outcome and the rest is shared by the other two.
+    """
+    confidence = min(max(float(prediction.get("confidence", 50)) / 100.0, floor), 1 - 2 * floor)
+    probs = [(1 - confidence) / 2] * 3
+    probs[OUTCOMES.index(prediction.get("predicted_result", "Draw"))] = confidence
+    return tuple(probs)
+
+
+class RecordedResponseCache:
+    """
+    Append-only JSONL store of LLM responses keyed by (predictor, fixture,
+    prompt context), so LLM backtests replay identically and at no cost.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_FILE):
+        self.path = path
+        self.responses: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from an interrupted run
+                    self.responses[record["key"]] = record["response"]
+
+    @staticmethod
+    def key(predictor: str, date, home: str, away: str, context: str = "") -> str:
+        raw = f"{predictor}|{pd.Timestamp(date).date()}|{home}|{away}|{context}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.responses.get(key)
+
+    def put(self, key: str, response: Dict) -> None:
+        self.responses[key] = response
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "response": response}, ensure_ascii=False) + "\n")
+
+
+class RecordedLLMPredictor(Predictor):
+    """
+    Wraps a label-style predictor function ``fn(home_name, away_name) -> dict``
+    (e.g. match_predictor.generate_ai_prediction bound to its data). Responses
+    come from the recorded cache; with ``record=False`` a cache miss falls
+    back to the base rate instead of calling the model (counted in
+    ``misses`` and reported), and an empty cache without ``fn`` is an error.
+    Recording new responses needs ``fn`` to be picklable, or ``workers=1``.
+    """
+
+    name = "llm"
+
+    def __init__(self, fn: Optional[Callable[[str, str], Dict]] = None, cache_path: str = LLM_CACHE_FILE,
+                 record: bool = False, context: str = ""):
+        self.fn = fn
+        self.cache = RecordedResponseCache(cache_path)
+        self.record = record and fn is not None
+        self.context = context
+        self.base_rate = BaseRatePredictor()
+        self.misses = 0
+        if fn is None and not self.cache.responses:
+            # Every fixture would silently score as the base rate under the "llm" name
+            raise ValueError(f"No recorded LLM responses in {cache_path} and no fn to call; "
+                             "record a run with fn=... first")
+
+    def predict(self, date, home, away):
+        home_name, away_name = team_display_name(home), team_display_name(away)
+        key = self.cache.key(self.name, date, home_name, away_name, self.context)
+        response = self.cache.get(key)
+        if response is None and self.record:
+            response = self.fn(home_name, away_name)
+            self.cache.put(key, response)
+        if response is None:
+            self.misses += 1
+            return self.base_rate.predict(date, home, away)
+        return label_to_probabilities(response)
+
+    def observe(self, date, home, away, home_goals, away_goals):
+        self.base_rate.observe(date, home, away, home_goals, away_goals)
+
+
+class TeamStrengthPredictor(Predictor):
+    """
+    match_predictor.calculate_team_strength on a walk-forward Elo engine.
+    The strength gap becomes a label with generate_fallback_prediction's
+    thresholds (the likeliest result of each branch, at the midpoint of its
+    confidence range), then probabilities via label_to_probabilities.
+    """
+
+    name = "strength"
+
+    def __init__(self):
+        # Imported here: match_predictor pulls in streamlit and langchain
+        from agents.match_predictor import calculate_team_strength
+        self.calculate_team_strength = calculate_team_strength
+        self.engine = EloEngine()
+
+    def strengths(self, home, away) -> Tuple[float, float]:
+        return (self.calculate_team_strength(team_display_name(home), [], engine=self.engine),
+                self.calculate_team_strength(team_display_name(away), [], engine=self.engine))
+
+    def predict(self, date, home, away):
+        home_strength, away_strength = self.strengths(home, away)
+        strength_diff = home_strength - away_strength + 3  # home advantage, as in the fallback
+        if strength_diff > 8:
+            label = {"predicted_result": "Home Win", "confidence": 77.5}
+        elif strength_diff < -5:
+            label = {"predicted_result": "Away Win", "confidence": 72.5}
+        else:
+            label = {"predicted_result": "Home Win" if strength_diff > 0 else "Away Win", "confidence": 55}
+        return label_to_probabilities(label)
+
+    def observe(self, date, home, away, home_goals, away_goals):
+        self.engine.apply_result(date, home, away, home_goals, away_goals)
+
+
+class FallbackPredictor(TeamStrengthPredictor):
+    """
+    match_predictor.generate_fallback_prediction fed walk-forward strengths.
+    Its random draws are seeded per fixture so runs replay identically.
+    """
+
+    name = "fallback"
+
+    def __init__(self):
+        super().__init__()
+        from agents.match_predictor import generate_fallback_prediction
+        self.generate_fallback_prediction = generate_fallback_prediction
+
+    def predict(self, date, home, away):
+        home_strength, away_strength = self.strengths(home, away)
+        state = random.getstate()
+        random.seed(f"{pd.Timestamp(date).date()}|{home}|{away}")
+        try:
+            prediction = self.generate_fallback_prediction(
+                team_display_name(home), team_display_name(away), home_strength, away_strength)
+        finally:
+            random.setstate(state)
+        return label_to_probabilities(prediction)
+
+
+PREDICTORS: Dict[str, Callable[[], Predictor]] = {
+    "base_rate": BaseRatePredictor,
+    "elo": EloPredictor,
+    "dixon_coles": DixonColesPredictor,
+    "logistic": LogisticPredictor,
+    "strength": TeamStrengthPredictor,
+    "fallback": FallbackPredictor,
+    "llm": RecordedLLMPredictor,
+}
+
+
+# -------------------------------------------------------------------- metrics --
+def score_predictions(probs: np.ndarray, outcomes: np.ndarray, bins: int = CALIBRATION_BINS) -> Dict:
+    """Brier score, log-loss, accuracy and per-outcome calibration for (n, 3) probabilities."""
+    if not len(outcomes):
+        return {"matches": 0, "brier": None, "log_loss": None, "accuracy": None, "calibration": {}}
+    onehot = np.eye(3)[outcomes]
+    chosen = np.clip(probs[np.arange(len(outcomes)), outcomes], 1e-15, 1.0)
+
+    calibration = {}
+    edges = np.linspace(0, 1, bins + 1)
+    for k, label in enumerate(OUTCOMES):
+        which = np.clip(np.digitize(probs[:, k], edges) - 1, 0, bins - 1)
+        count = np.bincount(which, minlength=bins)
+        predicted = np.bincount(which, probs[:, k], bins)
+        observed = np.bincount(which, onehot[:, k], bins)
+        filled = count > 0
+        calibration[label] = {
+            "bin_lower": edges[:-1][filled].tolist(),
+            "predicted": (predicted[filled] / count[filled]).tolist(),
+            "observed": (observed[filled] / count[filled]).tolist(),
+            "count": count[filled].tolist(),
+        }
+
+    return {
+        "matches": int(len(outcomes)),
+        "brier": float(((probs - onehot) ** 2).sum(axis=1).mean()),
+        "log_loss": float(-np.log(chosen).mean()),
+        "accuracy": float((probs.argmax(axis=1) == outcomes).mean()),
+        "calibration": calibration,
+    }
+
+
+# -------------------------------------------------------------------- running --
+def _run_season(task: Tuple[str, int, pd.DataFrame, pd.DataFrame, Dict]) -> Dict:
+    """Worker step: warm up on everything before the season, then walk forward through it."""
+    predictor_name, season, history, matches, options = task
+    predictor = PREDICTORS[predictor_name](**options)
+    predictor.warm_up(history)
+
+    start = time.perf_counter()
+    probs = np.empty((len(matches), 3))
+    outcomes = np.empty(len(matches), dtype=np.int64)
+    columns = ["date", "home_id", "away_id", "home_goals", "away_goals"]
+    for i, (date, home, away, hg, ag) in enumerate(matches[columns].itertuples(index=False, name=None)):
+        probs[i] = predictor.predict(date, home, away)
+        outcomes[i] = outcome_index(hg, ag)
+        predictor.observe(date, home, away, hg, ag)
+    elapsed = time.perf_counter() - start
+    return {"season": season, "probs": probs, "outcomes": outcomes, "seconds": elapsed,
+            "cache_misses": getattr(predictor, "misses", 0)}
+
+
+def backtest(predictor_name: str, results: Optional[pd.DataFrame] = None,
+             seasons: Optional[Sequence[int]] = None, workers: Optional[int] = None,
+             options: Optional[Dict] = None) -> Dict:
+    """
+    Walk-forward backtest of a registered predictor over every season of
+    ``results`` (default: the full results history), one season per worker
+    process. Returns overall and per-season metrics plus throughput.
+    """
+    results = load_results() if results is None else results
+    results = results.sort_values("date", kind="stable").reset_index(drop=True)
+    seasons = sorted(results["season"].unique()) if seasons is None else list(seasons)
+    options = options or {}
+    # History is everything dated before the season's first match, not every
+    # earlier season label: season labels overlap in time in the results data
+    starts = results.groupby("season")["date"].min()
+    tasks = [
+        (predictor_name, int(season), results[results["date"] < starts[season]], results[results["season"] == season], options)
+        for season in seasons
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    wall = time.perf_counter()
+    if workers <= 1 or len(tasks) <= 1:
+        runs = list(map(_run_season, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            runs = list(pool.map(_run_season, tasks))
+    wall = time.perf_counter() - wall
+
+    probs = np.concatenate([r["probs"] for r in runs]) if runs else np.empty((0, 3))
+    outcomes = np.concatenate([r["outcomes"] for r in runs]) if runs else np.empty(0, dtype=np.int64)
+    report = score_predictions(probs, outcomes)
+    report.update({
+        "predictor": predictor_name,
+        "seasons": {
+            r["season"]: {k: v for k, v in score_predictions(r["probs"], r["outcomes"]).items() if k != "calibration"}
+            for r in runs
+        },
+        "cache_misses": sum(r["cache_misses"] for r in runs),
+        "wall_seconds": wall,
+        "matches_per_second": len(outcomes) / wall if wall > 0 else None,
+        "predict_matches_per_second": len(outcomes) / max(sum(r["seconds"] for r in runs), 1e-9),
+    })
+    return report
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"Predictor: {report['predictor']}  ({report['matches']} matches)"]
+    if report["matches"]:
+        lines.append(f"Brier {report['brier']:.4f} | log-loss {report['log_loss']:.4f} | accuracy {report['accuracy']:.1%}")
+    for season, s in sorted(report["seasons"].items()):
+        if s["matches"]:
+            lines.append(f"  {season}: {s['matches']:4d} matches  Brier {s['brier']:.4f}  "
+                         f"log-loss {s['log_loss']:.4f}  accuracy {s['accuracy']:.1%}")
+    if report["cache_misses"]:
+        lines.append(f"  ({report['cache_misses']} fixtures had no recorded response and used the base rate)")
+    lines.append(f"Throughput: {report['matches_per_second']:.0f} matches/s "
+                 f"({report['predict_matches_per_second']:.0f} matches/s in the prediction loop)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of match predictors")
+    parser.add_argument("predictors", nargs="*", default=["base_rate", "elo", "dixon_coles", "logistic"],
+                        choices=sorted(PREDICTORS))
+    parser.add_argument("--results", default=None, help="Results CSV in spl_mock_data.csv format")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    data = load_results(mock_path=args.results, h2h_path="") if args.results else None
+    for name in args.predictors:
+        print(format_report(backtest(name, data, workers=args.workers)))
+        print()
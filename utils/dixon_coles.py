@@ -0,0 +1,260 @@
+import os
+from numbers import Integral
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.optimize import lbfgs
+from utils.results_history import load_results, results_files_version, results_version
+from utils.team_names import team_id
+
+DIXON_COLES_FILE = "data/dixon_coles.npz"
+
+# Time-decay rate per day (half-life of roughly 1.9 years)
+XI = 0.001
+# Ridge on attack/defence: shrinks clubs with a handful of matches towards average
+RIDGE = 0.2
+MAX_GOALS = 10
+
+
+def _tid(team) -> int:
+    return int(team) if isinstance(team, Integral) else team_id(team)
+
+
+def _log_factorials(n: int) -> np.ndarray:
+    return np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n + 1)))])
+
+
+class DixonColesModel:
+    """
+    Dixon–Coles (1997) bivariate Poisson model: home goals ~ Poisson(λ),
+    away goals ~ Poisson(μ) with
+
+        log λ = attack[home] + defence[away] + home_advantage
+        log μ = attack[away] + defence[home]
+
+    a ρ correction on the 0-0, 1-0, 0-1 and 1-1 scores, and exponential time
+    decay on older matches. ``defence`` is the goals-conceded effect, so a
+    lower value is a better defence.
+    """
+
+    def __init__(self, xi: float = XI, ridge: float = RIDGE):
+        self.xi = xi
+        self.ridge = ridge
+        self.team_ids = np.zeros(0, dtype=np.int64)
+        self.columns: Dict[int, int] = {}
+        self.attack = np.zeros(0)
+        self.defence = np.zeros(0)
+        self.home_advantage = 0.25
+        self.rho = 0.0
+        self.version: Optional[str] = None
+        self.fit_info: Dict = {}
+
+    # ------------------------------------------------------------ fitting --
+    def _pack(self) -> np.ndarray:
+        return np.concatenate([self.attack, self.defence, [self.home_advantage, self.rho]])
+
+    def _unpack(self, theta: np.ndarray) -> None:
+        n = len(self.team_ids)
+        self.attack = theta[:n].copy()
+        self.defence = theta[n:2 * n].copy()
+        self.home_advantage = float(theta[2 * n])
+        self.rho = float(theta[2 * n + 1])
+
+    @staticmethod
+    def _objective(theta, home, away, x, y, weights, n, ridge):
+        """Negative weighted log-likelihood and its analytic gradient."""
+        attack, defence = theta[:n], theta[n:2 * n]
+        gamma, rho = theta[2 * n], theta[2 * n + 1]
+
+        log_lam = attack[home] + defence[away] + gamma
+        log_mu = attack[away] + defence[home]
+        lam, mu = np.exp(log_lam), np.exp(log_mu)
+
+        # Low-score correction τ and its derivatives w.r.t. ρ, log λ and log μ
+        tau = np.ones_like(lam)
+        d_rho = np.zeros_like(lam)
+        d_lam = np.zeros_like(lam)
+        d_mu = np.zeros_like(lam)
+        m00, m01 = (x == 0) & (y == 0), (x == 0) & (y == 1)
+        m10, m11 = (x == 1) & (y == 0), (x == 1) & (y == 1)
+        tau[m00] = 1 - lam[m00] * mu[m00] * rho
+        tau[m01] = 1 + lam[m01] * rho
+        tau[m10] = 1 + mu[m10] * rho
+        tau[m11] = 1 - rho
+        if np.any(tau <= 0):
+            return np.inf, np.zeros_like(theta)
+        d_rho[m00] = -lam[m00] * mu[m00]
+        d_lam[m00] = d_mu[m00] = -lam[m00] * mu[m00] * rho
+        d_rho[m01] = lam[m01]
+        d_lam[m01] = lam[m01] * rho
+        d_rho[m10] = mu[m10]
+        d_mu[m10] = mu[m10] * rho
+        d_rho[m11] = -1.0
+
+        loglik = np.log(tau) + x * log_lam - lam + y * log_mu - mu
+        value = -np.dot(weights, loglik)
+
+        # d(-loglik)/d log λ and d log μ, per match
+        g_lam = -weights * (x - lam + d_lam / tau)
+        g_mu = -weights * (y - mu + d_mu / tau)
+        grad = np.empty_like(theta)
+        grad[:n] = np.bincount(home, g_lam, n) + np.bincount(away, g_mu, n)
+        grad[n:2 * n] = np.bincount(away, g_lam, n) + np.bincount(home, g_mu, n)
+        grad[2 * n] = g_lam.sum()
+        grad[2 * n + 1] = -np.dot(weights, d_rho / tau)
+
+        # Identifiability (mean attack = 0) plus a small ridge
+        value += ridge * (np.dot(attack, attack) + np.dot(defence, defence)) + attack.sum() ** 2
+        grad[:n] += 2 * ridge * attack + 2 * attack.sum()
+        grad[n:2 * n] += 2 * ridge * defence
+        return value, grad
+
+    def fit(self, results: pd.DataFrame, as_of=None, warm_start: bool = True) -> "DixonColesModel":
+        """
+        Fit to a results frame (see utils.results_history). With ``warm_start``
+        the optimiser starts from the current parameters; clubs new to the
+        data start at zero.
+        """
+        ids = np.unique(results[["home_id", "away_id"]].to_numpy().ravel()).astype(np.int64)
+        previous = dict(zip(self.team_ids.tolist(), zip(self.attack, self.defence))) if warm_start else {}
+        self.team_ids = ids
+        self.columns = {int(t): i for i, t in enumerate(ids)}
+        self.attack = np.array([previous.get(int(t), (0.0, 0.0))[0] for t in ids])
+        self.defence = np.array([previous.get(int(t), (0.0, 0.0))[1] for t in ids])
+        if not (warm_start and previous):
+            self.home_advantage, self.rho = 0.25, 0.0
+
+        home = results["home_id"].map(self.columns).to_numpy(dtype=np.int64)
+        away = results["away_id"].map(self.columns).to_numpy(dtype=np.int64)
+        x = results["home_goals"].to_numpy(dtype=np.float64)
+        y = results["away_goals"].to_numpy(dtype=np.float64)
+        dates = pd.to_datetime(results["date"], utc=True)
+        reference = pd.to_datetime(as_of, utc=True) if as_of is not None else dates.max()
+        age_days = (reference - dates).dt.total_seconds().to_numpy() / 86400.0
+        weights = np.exp(-self.xi * np.clip(age_days, 0, None))
+
+        n = len(ids)
+        result = lbfgs(lambda theta: self._objective(theta, home, away, x, y, weights, n, self.ridge),
+                       self._pack())
+        self._unpack(result["x"])
+        self.version = results_version(results)
+        self.fit_info = {"iterations": result["iterations"], "converged": bool(result["converged"]),
+                         "neg_log_likelihood": float(result["fun"]), "matches": len(results)}
+        return self
+
+    # ---------------------------------------------------------- predicting --
+    def expected_goals(self, home, away, neutral: bool = False) -> Tuple[float, float]:
+        h, a = self.columns.get(_tid(home)), self.columns.get(_tid(away))
+        att_h, def_h = (self.attack[h], self.defence[h]) if h is not None else (0.0, 0.0)
+        att_a, def_a = (self.attack[a], self.defence[a]) if a is not None else (0.0, 0.0)
+        gamma = 0.0 if neutral else self.home_advantage
+        return float(np.exp(att_h + def_a + gamma)), float(np.exp(att_a + def_h))
+
+    def score_matrix(self, home, away, max_goals: int = MAX_GOALS, neutral: bool = False) -> np.ndarray:
+        """P(home goals = i, away goals = j) for i, j in 0..max_goals."""
+        return self.score_matrices([home], [away], max_goals, neutral)[0]
+
+    def score_matrices(self, homes: Sequence, aways: Sequence, max_goals: int = MAX_GOALS,
+                       neutral: bool = False) -> np.ndarray:
+        """score_matrix for many fixtures at once, shape (fixtures, max_goals + 1, max_goals + 1)."""
+        def params(teams):
+            cols = np.array([self.columns.get(_tid(t), -1) for t in teams], dtype=np.int64)
+            known = cols >= 0
+            attack = np.where(known, self.attack[np.maximum(cols, 0)] if len(self.attack) else 0.0, 0.0)
+            defence = np.where(known, self.defence[np.maximum(cols, 0)] if len(self.defence) else 0.0, 0.0)
+            return attack, defence
+
+        att_h, def_h = params(homes)
+        att_a, def_a = params(aways)
+        lam = np.exp(att_h + def_a + (0.0 if neutral else self.home_advantage))[:, None]
+        mu = np.exp(att_a + def_h)[:, None]
+        goals = np.arange(max_goals + 1)
+        log_fact = _log_factorials(max_goals)
+        p_home = np.exp(goals * np.log(lam) - lam - log_fact)
+        p_away = np.exp(goals * np.log(mu) - mu - log_fact)
+        matrices = p_home[:, :, None] * p_away[:, None, :]
+        lam, mu = lam[:, 0], mu[:, 0]
+        matrices[:, 0, 0] *= 1 - lam * mu * self.rho
+        matrices[:, 0, 1] *= 1 + lam * self.rho
+        matrices[:, 1, 0] *= 1 + mu * self.rho
+        matrices[:, 1, 1] *= 1 - self.rho
+        return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+    def probabilities(self, home, away, date=None, neutral: bool = False) -> Tuple[float, float, float]:
+        """(home win, draw, away win); ``date`` is accepted for the season simulator's interface."""
+        matrix = self.score_matrix(home, away, neutral=neutral)
+        return float(np.tril(matrix, -1).sum()), float(np.trace(matrix)), float(np.triu(matrix, 1).sum())
+
+    def most_likely_score(self, home, away) -> Tuple[int, int]:
+        matrix = self.score_matrix(home, away)
+        i, j = np.unravel_index(np.argmax(matrix), matrix.shape)
+        return int(i), int(j)
+
+    def strength(self, team) -> float:
+        """Net goal effect (attack minus defence) in log-goals; 0 is league average."""
+        col = self.columns.get(_tid(team))
+        return 0.0 if col is None else float(self.attack[col] - self.defence[col])
+
+    # -------------------------------------------------------- persistence --
+    def save(self, path: str = DIXON_COLES_FILE) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, team_ids=self.team_ids, attack=self.attack, defence=self.defence,
+                 params=np.array([self.home_advantage, self.rho, self.xi, self.ridge]),
+                 version=np.array(self.version or ""))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = DIXON_COLES_FILE) -> "DixonColesModel":
+        with np.load(path) as data:
+            home_advantage, rho, xi, ridge = data["params"].tolist()
+            model = cls(xi=xi, ridge=ridge)
+            model.team_ids = data["team_ids"].copy()
+            model.columns = {int(t): i for i, t in enumerate(model.team_ids)}
+            model.attack = data["attack"].copy()
+            model.defence = data["defence"].copy()
+            model.home_advantage, model.rho = home_advantage, rho
+            model.version = str(data["version"]) or None
+        return model
+
+
+_default_model: Optional[DixonColesModel] = None
+# results_files_version() the in-memory model was checked against
+_default_files: Optional[tuple] = None
+
+
+def load_dixon_coles(path: str = DIXON_COLES_FILE, results: Optional[pd.DataFrame] = None) -> DixonColesModel:
+    """
+    Process-wide fitted model, cached in memory and on disk by results
+    version. When the results change, the model is refitted starting from the
+    cached parameters rather than from scratch. Without ``results`` a cache
+    hit is two file stats: the history is only re-read and re-hashed when a
+    result file has changed.
+    """
+    global _default_model, _default_files
+    files = None
+    if results is None:
+        files = results_files_version()
+        if _default_model is not None and files == _default_files:
+            return _default_model
+        results = load_results()
+    version = results_version(results)
+    if _default_model is not None and _default_model.version == version:
+        _default_files = files
+        return _default_model
+
+    model = _default_model
+    if model is None and os.path.exists(path):
+        try:
+            model = DixonColesModel.load(path)
+        except (OSError, KeyError, ValueError):
+            model = None
+    if model is None or model.version != version:
+        model = (model or DixonColesModel()).fit(results, warm_start=True)
+        try:
+            model.save(path)
+        except OSError:
+            pass
+    _default_model, _default_files = model, files
+    return model
@@ -0,0 +1,227 @@
+import math
+import os
+from numbers import Integral
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.results_history import load_results, results_version
+from utils.team_names import team_display_name, team_id
+
+ELO_SNAPSHOT_FILE = "data/elo_snapshots.npz"
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0
+# Peak draw probability (between evenly matched sides) and how quickly it
+# falls away as the expected score moves from 0.5
+DRAW_RATE = 0.28
+DRAW_WIDTH = 0.3
+
+
+def _tid(team) -> int:
+    return int(team) if isinstance(team, Integral) else team_id(team)
+
+
+def _ns(date) -> int:
+    ts = pd.Timestamp(date)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+def margin_multiplier(goal_diff: int) -> float:
+    """World Football Elo margin-of-victory weight: 1, 1.5, then (11 + N) / 8."""
+    n = abs(goal_diff)
+    if n <= 1:
+        return 1.0
+    if n == 2:
+        return 1.5
+    return (11.0 + n) / 8.0
+
+
+def expected_score(rating_diff: float) -> float:
+    """Expected score of the side ``rating_diff`` points stronger (home advantage included by the caller)."""
+    return 1.0 / (1.0 + 10.0 ** (-rating_diff / 400.0))
+
+
+def outcome_probabilities(rating_diff: float) -> Tuple[float, float, float]:
+    """(home win, draw, away win) from a home-minus-away rating difference including home advantage."""
+    e = expected_score(rating_diff)
+    p_draw = DRAW_RATE * math.exp(-((e - 0.5) / DRAW_WIDTH) ** 2)
+    p_home = max(e - p_draw / 2.0, 0.0)
+    p_away = max(1.0 - e - p_draw / 2.0, 0.0)
+    total = p_home + p_draw + p_away
+    return p_home / total, p_draw / total, p_away / total
+
+
+class EloEngine:
+    """
+    Elo ratings replayed over the full results history, with home advantage
+    and a margin-of-victory multiplier.
+
+    After every match day the full rating vector is appended to a snapshot
+    matrix (one row per day, one column per team), so the rating of any team
+    as of any date is a binary search over the day index.
+    """
+
+    def __init__(self, k: float = K_FACTOR, home_advantage: float = HOME_ADVANTAGE,
+                 initial: float = INITIAL_RATING):
+        self.k = k
+        self.home_advantage = home_advantage
+        self.initial = initial
+        self.team_ids: List[int] = []
+        self.columns: Dict[int, int] = {}
+        self.current = np.zeros(0, dtype=np.float64)
+        self.days = np.zeros(0, dtype=np.int64)
+        self.snapshots = np.zeros((0, 0), dtype=np.float32)
+        self.n_days = 0
+        self.version: Optional[str] = None
+
+    # ----------------------------------------------------------- building --
+    def _column(self, tid: int) -> int:
+        col = self.columns.get(tid)
+        if col is None:
+            col = self.columns[tid] = len(self.team_ids)
+            self.team_ids.append(tid)
+            self.current = np.append(self.current, self.initial)
+            self.snapshots = np.pad(self.snapshots, ((0, 0), (0, 1)), constant_values=self.initial)
+        return col
+
+    def _snapshot(self, day_ns: int) -> None:
+        """Record the current ratings as the state at the end of ``day_ns``."""
+        if self.n_days and self.days[self.n_days - 1] == day_ns:
+            self.snapshots[self.n_days - 1] = self.current
+            return
+        if self.n_days == len(self.days):
+            capacity = max(64, 2 * self.n_days)
+            self.days = np.resize(self.days, capacity)
+            grown = np.empty((capacity, len(self.team_ids)), dtype=np.float32)
+            grown[:self.n_days] = self.snapshots[:self.n_days]
+            self.snapshots = grown
+        self.days[self.n_days] = day_ns
+        self.snapshots[self.n_days] = self.current
+        self.n_days += 1
+
+    def apply_result(self, date, home, away, home_goals: int, away_goals: int) -> float:
+        """
+        Update both clubs' ratings for one result and return the rating
+        points exchanged. Results must come in date order: a result dated
+        before the last recorded day raises ValueError, since the snapshots
+        for the days after it would no longer be sorted or correct (rebuild
+        with from_results instead).
+        """
+        day = pd.Timestamp(_ns(date)).floor("D").value
+        if self.n_days and day < self.days[self.n_days - 1]:
+            raise ValueError(
+                f"Result dated {pd.Timestamp(day).date()} is older than the last rating snapshot "
+                f"({pd.Timestamp(int(self.days[self.n_days - 1])).date()}); rebuild with EloEngine.from_results"
+            )
+        h, a = self._column(_tid(home)), self._column(_tid(away))
+        diff = int(home_goals) - int(away_goals)
+        actual = 1.0 if diff > 0 else 0.5 if diff == 0 else 0.0
+        expected = expected_score(self.current[h] - self.current[a] + self.home_advantage)
+        change = self.k * margin_multiplier(diff) * (actual - expected)
+        self.current[h] += change
+        self.current[a] -= change
+        self._snapshot(day)
+        return change
+
+    @classmethod
+    def from_results(cls, results: pd.DataFrame, **params) -> "EloEngine":
+        """Replay a results frame (see utils.results_history) in date order."""
+        engine = cls(**params)
+        # Register every club first so the snapshot matrix never has to widen mid-replay
+        for tid in pd.unique(results[["home_id", "away_id"]].values.ravel()):
+            engine._column(int(tid))
+        columns = ["date", "home_id", "away_id", "home_goals", "away_goals"]
+        for row in results.sort_values("date", kind="stable")[columns].itertuples(index=False, name=None):
+            engine.apply_result(*row)
+        engine.version = results_version(results)
+        return engine
+
+    # ------------------------------------------------------------ queries --
+    def rating(self, team, before=None) -> float:
+        """Rating of ``team`` now, or as it stood going into ``before``'s day."""
+        col = self.columns.get(_tid(team))
+        if col is None:
+            return self.initial
+        if before is None:
+            return float(self.current[col])
+        day = pd.Timestamp(_ns(before)).floor("D").value
+        row = int(np.searchsorted(self.days[:self.n_days], day, side="left")) - 1
+        return float(self.snapshots[row, col]) if row >= 0 else self.initial
+
+    def ratings(self, before=None) -> pd.Series:
+        """Every club's rating at a point in time, strongest first, indexed by team id."""
+        values = [self.rating(tid, before) for tid in self.team_ids]
+        return pd.Series(values, index=self.team_ids, name="elo").sort_values(ascending=False)
+
+    def probabilities(self, home, away, before=None, neutral: bool = False) -> Tuple[float, float, float]:
+        """(home win, draw, away win) probabilities for a fixture."""
+        diff = self.rating(home, before) - self.rating(away, before)
+        return outcome_probabilities(diff + (0.0 if neutral else self.home_advantage))
+
+    def describe(self, team, before=None, language: str = "english") -> str:
+        tid = _tid(team)
+        ranking = self.ratings(before)
+        position = ranking.index.get_loc(tid) + 1 if tid in ranking.index else None
+        rank_text = f", #{position} of {len(ranking)}" if position else ""
+        return f"{team_display_name(tid, language)} Elo {self.rating(tid, before):.0f}{rank_text}"
+
+    # -------------------------------------------------------- persistence --
+    def save(self, path: str = ELO_SNAPSHOT_FILE) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            team_ids=np.asarray(self.team_ids, dtype=np.int64),
+            current=self.current,
+            days=self.days[:self.n_days],
+            snapshots=self.snapshots[:self.n_days],
+            params=np.array([self.k, self.home_advantage, self.initial]),
+            version=np.array(self.version or ""),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = ELO_SNAPSHOT_FILE) -> "EloEngine":
+        with np.load(path) as data:
+            k, home_advantage, initial = data["params"].tolist()
+            engine = cls(k=k, home_advantage=home_advantage, initial=initial)
+            engine.team_ids = data["team_ids"].tolist()
+            engine.columns = {tid: i for i, tid in enumerate(engine.team_ids)}
+            engine.current = data["current"].astype(np.float64)
+            engine.days = data["days"].copy()
+            engine.snapshots = data["snapshots"].copy()
+            engine.n_days = len(engine.days)
+            engine.version = str(data["version"]) or None
+        return engine
+
+
+_default_engine: Optional[EloEngine] = None
+
+
+def load_elo_engine(path: str = ELO_SNAPSHOT_FILE) -> EloEngine:
+    """
+    Process-wide Elo engine. The snapshot file is reused while it matches
+    the current results history and rebuilt (and rewritten) otherwise.
+    """
+    global _default_engine
+    if _default_engine is None:
+        results = load_results()
+        version = results_version(results)
+        engine = None
+        if os.path.exists(path):
+            try:
+                engine = EloEngine.load(path)
+            except (OSError, KeyError, ValueError):
+                engine = None
+        if engine is None or engine.version != version:
+            engine = EloEngine.from_results(results)
+            try:
+                engine.save(path)
+            except OSError:
+                pass
+        _default_engine = engine
+    return _default_engine
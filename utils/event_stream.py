@@ -0,0 +1,133 @@
+import json
+import math
+import random
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_MISSING = object()
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Stream the items of a top-level JSON array of objects without loading
+    the whole file. Only the current item (plus one read chunk) is ever held
+    in memory.
+    """
+    with open(path, encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip(_WHITESPACE + "\ufeff")
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        eof = False
+        read_size = chunk_size
+        while True:
+            # Skip separators between items
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+                # Item straddles the chunk boundary: keep the tail and read more
+                buffer = buffer[pos:]
+                pos = 0
+                more = f.read(read_size)
+                eof = not more
+                buffer += more
+                read_size *= 2  # items bigger than a chunk cost O(log size) retries, not O(size)
+                continue
+            read_size = chunk_size
+            yield item
+            pos = end
+            if pos >= len(buffer) - 1 and not eof:
+                buffer = buffer[pos:] + f.read(chunk_size)
+                pos = 0
+
+
+def iter_events(path: str = "data/events_sample.json",
+                with_fixture: bool = False) -> Iterator[Union[Dict, Tuple[Dict, Dict]]]:
+    """
+    Yield every event of every fixture in an events file, one at a time.
+    With ``with_fixture`` each event comes paired with its fixture metadata.
+    """
+    for fixture in iter_json_array(path):
+        events = fixture.pop("events", None) or []
+        for event in events:
+            yield (event, fixture) if with_fixture else event
+
+
+def reservoir_sample(items: Iterable[Any], k: int, rng: Optional[random.Random] = None) -> List[Any]:
+    """
+    Uniform sample of ``k`` items from a stream of unknown length in one pass
+    (Li's Algorithm L: the number of items to skip is drawn directly, so the
+    random number generator is called O(k log(n/k)) times).
+    """
+    rng = rng or random.Random()
+    iterator = iter(items)
+    reservoir = list(islice(iterator, k))
+    if len(reservoir) < k or k == 0:
+        return reservoir
+
+    w = math.exp(math.log(rng.random()) / k)
+    while True:
+        skip = int(math.log(rng.random()) / math.log(1 - w))
+        nxt = next(islice(iterator, skip, None), _MISSING)
+        if nxt is _MISSING:
+            return reservoir
+        reservoir[rng.randrange(k)] = nxt
+        w *= math.exp(math.log(rng.random()) / k)
+
+
+def stratified_reservoir_sample(items: Iterable[Any], k: int, key: Callable[[Any], Any],
+                                rng: Optional[random.Random] = None) -> Dict[Any, List[Any]]:
+    """One-pass reservoir of up to ``k`` items for every stratum returned by ``key``."""
+    rng = rng or random.Random()
+    reservoirs: Dict[Any, List[Any]] = {}
+    seen: Dict[Any, int] = {}
+    for item in items:
+        stratum = key(item)
+        n = seen.get(stratum, 0) + 1
+        seen[stratum] = n
+        reservoir = reservoirs.setdefault(stratum, [])
+        if n <= k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(n)
+            if j < k:
+                reservoir[j] = item
+    return reservoirs
+
+
+STRATA = {
+    "type": lambda event: event.get("type"),
+    "team": lambda event: event.get("team"),
+}
+
+
+def sample_events(path: str = "data/events_sample.json", k: int = 15,
+                  stratify_by: Optional[str] = None, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Draw ``k`` events from an events file in constant memory. With
+    ``stratify_by="type"`` or ``"team"`` the sample is spread evenly across
+    strata (round-robin) instead of mirroring their raw frequencies.
+    """
+    rng = random.Random(seed)
+    if stratify_by is None:
+        return reservoir_sample(iter_events(path), k, rng)
+
+    reservoirs = stratified_reservoir_sample(iter_events(path), k, STRATA[stratify_by], rng)
+    strata = list(reservoirs.values())
+    rng.shuffle(strata)
+    sample = []
+    for i in range(k):
+        for stratum in strata:
+            if i < len(stratum):
+                sample.append(stratum[i])
+    return sample[:k]
@@ -0,0 +1,178 @@
+from numbers import Integral
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.results_history import load_results
+from utils.team_names import team_id
+
+FORM_WINDOW = 5
+RESULT_CHARS = {3: "W", 1: "D", 0: "L"}
+
+
+def _tid(team) -> int:
+    return int(team) if isinstance(team, Integral) else team_id(team)
+
+
+def _ns(date) -> int:
+    """Timestamp as UTC nanoseconds; naive dates are taken as UTC."""
+    ts = pd.Timestamp(date)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+def team_match_rows(results: pd.DataFrame) -> pd.DataFrame:
+    """One row per team per match (home and away perspectives stacked), oldest first."""
+    home = pd.DataFrame({
+        "date": results["date"], "team_id": results["home_id"],
+        "goals_for": results["home_goals"], "goals_against": results["away_goals"],
+    })
+    away = pd.DataFrame({
+        "date": results["date"], "team_id": results["away_id"],
+        "goals_for": results["away_goals"], "goals_against": results["home_goals"],
+    })
+    rows = pd.concat([home, away], ignore_index=True)
+    diff = rows["goals_for"] - rows["goals_against"]
+    rows["points"] = np.select([diff > 0, diff == 0], [3, 1], 0)
+    rows["goal_diff"] = diff
+    return rows.sort_values(["team_id", "date"], kind="stable").reset_index(drop=True)
+
+
+class TeamForm:
+    """
+    Per-team result history in growable NumPy buffers, plus rolling
+    points-per-game and goal-difference over the last ``window`` matches
+    ending at each match.
+    """
+
+    __slots__ = ("window", "n", "dates", "points", "goal_diff", "rolling_ppg", "rolling_gd")
+
+    def __init__(self, window: int, dates, points, goal_diff, rolling_ppg, rolling_gd):
+        self.window = window
+        self.n = len(dates)
+        capacity = max(16, self.n * 2)
+        self.dates = np.zeros(capacity, dtype=np.int64)
+        self.points = np.zeros(capacity, dtype=np.int8)
+        self.goal_diff = np.zeros(capacity, dtype=np.int16)
+        self.rolling_ppg = np.zeros(capacity, dtype=np.float64)
+        self.rolling_gd = np.zeros(capacity, dtype=np.float64)
+        for buffer, values in ((self.dates, dates), (self.points, points), (self.goal_diff, goal_diff),
+                               (self.rolling_ppg, rolling_ppg), (self.rolling_gd, rolling_gd)):
+            buffer[:self.n] = values
+
+    def append(self, date_ns: int, points: int, goal_diff: int) -> None:
+        """O(window) append of a newer result; older results trigger a local re-sort."""
+        if self.n == len(self.dates):
+            for name in ("dates", "points", "goal_diff", "rolling_ppg", "rolling_gd"):
+                old = getattr(self, name)
+                grown = np.zeros(len(old) * 2, dtype=old.dtype)
+                grown[:self.n] = old[:self.n]
+                setattr(self, name, grown)
+
+        if self.n and date_ns < self.dates[self.n - 1]:
+            # Back-filled result: insert in date order and recompute this team only
+            pos = int(np.searchsorted(self.dates[:self.n], date_ns, side="right"))
+            for buffer, value in ((self.dates, date_ns), (self.points, points), (self.goal_diff, goal_diff)):
+                buffer[pos + 1:self.n + 1] = buffer[pos:self.n].copy()
+                buffer[pos] = value
+            self.n += 1
+            self._recompute_rolling(pos)
+            return
+
+        i = self.n
+        self.dates[i] = date_ns
+        self.points[i] = points
+        self.goal_diff[i] = goal_diff
+        self.n += 1
+        self._recompute_rolling(i)
+
+    def _recompute_rolling(self, start: int) -> None:
+        for i in range(start, self.n):
+            lo = max(0, i - self.window + 1)
+            self.rolling_ppg[i] = self.points[lo:i + 1].mean()
+            self.rolling_gd[i] = self.goal_diff[lo:i + 1].mean()
+
+    def upto(self, before_ns: Optional[int]) -> int:
+        """Number of matches strictly before ``before_ns`` (all matches if None)."""
+        if before_ns is None:
+            return self.n
+        return int(np.searchsorted(self.dates[:self.n], before_ns, side="left"))
+
+
+class FormEngine:
+    """Rolling team form (last-N results, PPG, goal-difference trend) over the full history."""
+
+    def __init__(self, teams: Dict[int, TeamForm], window: int = FORM_WINDOW):
+        self.teams = teams
+        self.window = window
+
+    @classmethod
+    def from_results(cls, results: pd.DataFrame, window: int = FORM_WINDOW) -> "FormEngine":
+        """Compute every team's rolling form in one vectorised groupby/rolling pass."""
+        rows = team_match_rows(results)
+        grouped = rows.groupby("team_id", sort=False)
+        rows["rolling_ppg"] = grouped["points"].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+        rows["rolling_gd"] = grouped["goal_diff"].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+
+        # results_history dates are UTC; compare on int64 nanoseconds
+        dates = rows["date"].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().astype("datetime64[ns]").astype(np.int64)
+
+        teams = {}
+        boundaries = np.flatnonzero(np.diff(rows["team_id"].to_numpy())) + 1
+        for idx in np.split(np.arange(len(rows)), boundaries):
+            if not len(idx):
+                continue
+            teams[int(rows["team_id"].iat[idx[0]])] = TeamForm(
+                window,
+                dates[idx],
+                rows["points"].to_numpy()[idx],
+                rows["goal_diff"].to_numpy()[idx],
+                rows["rolling_ppg"].to_numpy()[idx],
+                rows["rolling_gd"].to_numpy()[idx],
+            )
+        return cls(teams, window)
+
+    def append_result(self, date, home, away, home_goals: int, away_goals: int) -> None:
+        """Add one result without touching any other team's history."""
+        when = _ns(date)
+        diff = int(home_goals) - int(away_goals)
+        for tid, gd in ((_tid(home), diff), (_tid(away), -diff)):
+            points = 3 if gd > 0 else 1 if gd == 0 else 0
+            form = self.teams.get(tid)
+            if form is None:
+                self.teams[tid] = TeamForm(self.window, [when], [points], [gd], [float(points)], [float(gd)])
+            else:
+                form.append(when, points, gd)
+
+    def form(self, team, n: int = FORM_WINDOW, before=None) -> Dict[str, Any]:
+        """
+        Form of ``team`` over its last ``n`` matches (strictly before
+        ``before`` when given). ``form`` reads oldest to newest, so the most
+        recent result is the right-most letter.
+        """
+        record = self.teams.get(_tid(team))
+        end = 0 if record is None else record.upto(None if before is None else _ns(before))
+        if end == 0:
+            return {"form": "", "played": 0, "ppg": None, "goal_diff": 0,
+                    "goal_diff_trend": None, "rolling_ppg": None}
+        start = max(0, end - n)
+        points = record.points[start:end]
+        return {
+            "form": "".join(RESULT_CHARS[int(p)] for p in points),
+            "played": end - start,
+            "ppg": float(points.mean()),
+            "goal_diff": int(record.goal_diff[start:end].sum()),
+            # Positive when the rolling goal difference is improving over the window
+            "goal_diff_trend": float(record.rolling_gd[end - 1] - record.rolling_gd[start]),
+            "rolling_ppg": float(record.rolling_ppg[end - 1]),
+        }
+
+    def form_string(self, team, n: int = FORM_WINDOW, before=None) -> str:
+        return self.form(team, n, before)["form"]
+
+
+def load_form_engine(extra_results: Optional[pd.DataFrame] = None, window: int = FORM_WINDOW) -> FormEngine:
+    """Form engine over every known historical result, plus any extra results frame."""
+    return FormEngine.from_results(load_results([extra_results] if extra_results is not None else None), window)
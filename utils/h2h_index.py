@@ -0,0 +1,202 @@
+from bisect import bisect_left
+from collections import deque
+from numbers import Integral
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.results_history import load_results
+from utils.team_names import pair_key, team_display_name, team_id
+
+RECENT_MEETINGS = 10
+
+
+def _tid(team) -> int:
+    """Accept either a team id or any spelling of a team name."""
+    return int(team) if isinstance(team, Integral) else team_id(team)
+
+
+def _ns(date) -> int:
+    """Timestamp as UTC nanoseconds; naive dates are taken as UTC."""
+    ts = pd.Timestamp(date)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+class PairRecord:
+    """
+    Running head-to-head aggregates for one pair of clubs, stored from the
+    point of view of the lower team id ("a"). Every counter is updated in O(1)
+    when a result is added. Every meeting is also kept in date order so the
+    record as it stood on an earlier date can be rebuilt (see ``upto``).
+    """
+
+    __slots__ = ("a", "b", "played", "a_wins", "draws", "b_wins", "a_goals", "b_goals",
+                 "a_home", "b_home", "venues", "recent", "meetings", "meeting_ns")
+
+    def __init__(self, a: int, b: int, recent: int = RECENT_MEETINGS):
+        self.a = a
+        self.b = b
+        self.played = 0
+        self.a_wins = self.draws = self.b_wins = 0
+        self.a_goals = self.b_goals = 0
+        # [wins, draws, losses, goals_for, goals_against] for each side as the home team
+        self.a_home = [0, 0, 0, 0, 0]
+        self.b_home = [0, 0, 0, 0, 0]
+        self.venues: Dict[str, List[int]] = {}
+        self.recent: deque = deque(maxlen=recent)
+        self.meetings: List[Tuple] = []
+        self.meeting_ns: List[int] = []
+
+    def add(self, date, home: int, home_goals: int, away_goals: int, venue: Optional[str]) -> None:
+        a_is_home = home == self.a
+        a_goals, b_goals = (home_goals, away_goals) if a_is_home else (away_goals, home_goals)
+        outcome = (a_goals > b_goals) - (a_goals < b_goals)  # 1 a wins, 0 draw, -1 b wins
+
+        self.played += 1
+        self.a_goals += a_goals
+        self.b_goals += b_goals
+        if outcome > 0:
+            self.a_wins += 1
+        elif outcome < 0:
+            self.b_wins += 1
+        else:
+            self.draws += 1
+
+        split = self.a_home if a_is_home else self.b_home
+        home_outcome = outcome if a_is_home else -outcome
+        split[0 if home_outcome > 0 else 1 if home_outcome == 0 else 2] += 1
+        split[3] += home_goals
+        split[4] += away_goals
+
+        if venue:
+            record = self.venues.setdefault(venue, [0, 0, 0])
+            record[0 if outcome > 0 else 1 if outcome == 0 else 2] += 1
+        self.recent.append((date, home, home_goals, away_goals, venue))
+        self.meetings.append((date, home, home_goals, away_goals, venue))
+        self.meeting_ns.append(_ns(date))
+
+    def upto(self, before_ns: int) -> Optional["PairRecord"]:
+        """The record over meetings strictly before ``before_ns``; None when there were none."""
+        count = bisect_left(self.meeting_ns, before_ns)
+        if count == len(self.meetings):
+            return self
+        if count == 0:
+            return None
+        past = PairRecord(self.a, self.b, self.recent.maxlen)
+        for meeting in self.meetings[:count]:
+            past.add(*meeting)
+        return past
+
+
+class H2HIndex:
+    """Head-to-head records keyed by unordered team-id pair."""
+
+    def __init__(self, recent: int = RECENT_MEETINGS):
+        self.recent = recent
+        self.pairs: Dict[Tuple[int, int], PairRecord] = {}
+
+    @classmethod
+    def from_results(cls, results: pd.DataFrame, recent: int = RECENT_MEETINGS) -> "H2HIndex":
+        """Build from a results frame (see utils.results_history), oldest first."""
+        index = cls(recent)
+        columns = ["date", "home_id", "away_id", "home_goals", "away_goals", "venue"]
+        for row in results.sort_values("date", kind="stable")[columns].itertuples(index=False, name=None):
+            index.add_result(*row)
+        return index
+
+    def add_result(self, date, home: int, away: int, home_goals: int, away_goals: int,
+                   venue: Optional[str] = None) -> None:
+        """Fold one new result into the pair's aggregates. Accepts team ids or names."""
+        home, away = _tid(home), _tid(away)
+        date = pd.Timestamp(date)
+        key = pair_key(home, away)
+        record = self.pairs.get(key)
+        if record is None:
+            record = self.pairs[key] = PairRecord(key[0], key[1], self.recent)
+        record.add(date, home, int(home_goals), int(away_goals), venue if isinstance(venue, str) else None)
+
+    def record(self, team_1, team_2) -> Optional[PairRecord]:
+        t1, t2 = _tid(team_1), _tid(team_2)
+        return self.pairs.get(pair_key(t1, t2))
+
+    def summary(self, team_1, team_2, last_n: int = 5, before=None) -> Dict[str, Any]:
+        """
+        Head-to-head summary from team_1's point of view: W/D/L, goals, home
+        and away splits, per-venue records and the last ``last_n`` meetings
+        (most recent first). With ``before`` only meetings strictly before
+        that date count.
+        """
+        t1, t2 = _tid(team_1), _tid(team_2)
+        record = self.pairs.get(pair_key(t1, t2))
+        if record is not None and before is not None:
+            record = record.upto(_ns(before))
+        if record is None:
+            return {"team": t1, "opponent": t2, "played": 0, "wins": 0, "draws": 0, "losses": 0,
+                    "goals_for": 0, "goals_against": 0, "home": None, "away": None,
+                    "venues": {}, "recent": []}
+
+        is_a = t1 == record.a
+        wins, losses = (record.a_wins, record.b_wins) if is_a else (record.b_wins, record.a_wins)
+        goals_for, goals_against = (record.a_goals, record.b_goals) if is_a else (record.b_goals, record.a_goals)
+        home_split, away_split = (record.a_home, record.b_home) if is_a else (record.b_home, record.a_home)
+
+        recent = []
+        for date, home, hg, ag, venue in list(record.recent)[::-1][:last_n]:
+            gf, ga = (hg, ag) if home == t1 else (ag, hg)
+            recent.append({
+                "date": date,
+                "home": home == t1,
+                "score": f"{gf}-{ga}",
+                "result": "W" if gf > ga else "D" if gf == ga else "L",
+                "venue": venue,
+            })
+
+        return {
+            "team": t1,
+            "opponent": t2,
+            "played": record.played,
+            "wins": wins,
+            "draws": record.draws,
+            "losses": losses,
+            "goals_for": goals_for,
+            "goals_against": goals_against,
+            # As the home side: W/D/L and goals; as the away side the opponent's home split flipped
+            "home": {"wins": home_split[0], "draws": home_split[1], "losses": home_split[2],
+                     "goals_for": home_split[3], "goals_against": home_split[4]},
+            "away": {"wins": away_split[2], "draws": away_split[1], "losses": away_split[0],
+                     "goals_for": away_split[4], "goals_against": away_split[3]},
+            "venues": {
+                venue: dict(zip(("wins", "draws", "losses"), counts if is_a else counts[::-1]))
+                for venue, counts in record.venues.items()
+            },
+            "recent": recent,
+        }
+
+    def describe(self, team_1, team_2, last_n: int = 5, language: str = "english") -> str:
+        """Short plain-text head-to-head summary for prompts and chat context."""
+        s = self.summary(team_1, team_2, last_n)
+        name_1 = team_display_name(s["team"], language)
+        name_2 = team_display_name(s["opponent"], language)
+        if not s["played"]:
+            return f"No recorded meetings between {name_1} and {name_2}."
+        form = " ".join(f"{m['result']} {m['score']}" for m in s["recent"])
+        return (
+            f"{name_1} vs {name_2}: {s['played']} meetings – {s['wins']}W {s['draws']}D {s['losses']}L, "
+            f"goals {s['goals_for']}-{s['goals_against']}. "
+            f"At home {s['home']['wins']}W {s['home']['draws']}D {s['home']['losses']}L, "
+            f"away {s['away']['wins']}W {s['away']['draws']}D {s['away']['losses']}L. "
+            f"Last {len(s['recent'])}: {form}"
+        )
+
+
+_default_index: Optional[H2HIndex] = None
+
+
+def load_h2h_index() -> H2HIndex:
+    """Process-wide index over every known historical result, built on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = H2HIndex.from_results(load_results())
+    return _default_index
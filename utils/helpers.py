@@ -1,10 +1,10 @@
 import json
 import os
-import random
 import streamlit as st
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
+from utils.event_stream import iter_events, reservoir_sample, sample_events
 
 
 def load_json(path):
@@ -97,44 +97,29 @@ def get_team_by_id(teams, team_id):
     raise ValueError(f"Team not found with ID: {team_id}")
 
 def load_event_pool(path="data/events_sample.json"):
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
-
-    pool = []
-    for match in data:
-        for event in match.get("events", []):
-            pool.append(event)
-    return pool
-
-def generate_fake_event_log(event_pool, num_events=15):
-    sampled = random.sample(event_pool, k=min(num_events, len(event_pool)))
-    lines = []
-
-    for ev in sampled:
-        time_str = ev["time"]
-        team = ev["team"]
-        player = ev.get("player", "Unknown")
-        type_ = ev.get("type", "")
-        detail = ev.get("detail", "")
-        comment = f" ({ev['comments']})" if ev.get("comments") else ""
-
-        line = f"{time_str} | {team} | {player} | {type_} | {detail}{comment}"
-        lines.append(line)
-
-    return "\n".join(lines)
-
-def load_event_pool(path="data/events_sample.json"):
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
+    """
+    Loads every event of every fixture into one list.
+    Prefer sample_event_pool when only a handful of events are needed.
+    """
+    return list(iter_events(path))
 
-    pool = []
-    for match in data:
-        for event in match.get("events", []):
-            pool.append(event)
-    return pool
+def sample_event_pool(path="data/events_sample.json", num_events=15, stratify_by=None, seed=None):
+    """
+    Streams the events file and reservoir-samples num_events events in one pass,
+    optionally spread evenly across event types or teams (stratify_by="type" / "team").
+    """
+    return sample_events(path, k=num_events, stratify_by=stratify_by, seed=seed)
 
-def generate_fake_event_log(event_pool, num_events=15):
-    sampled = random.sample(event_pool, k=min(num_events, len(event_pool)))
+def generate_fake_event_log(event_pool="data/events_sample.json", num_events=15):
+    """
+    Formats num_events randomly chosen events as log lines. event_pool is an
+    events file path or any iterable of events (e.g. iter_events); either is
+    reservoir-sampled in one pass, so the pool is never held in memory.
+    """
+    if isinstance(event_pool, str):
+        sampled = sample_events(event_pool, k=num_events)
+    else:
+        sampled = reservoir_sample(event_pool, num_events)
     lines = []
 
     for ev in sampled:
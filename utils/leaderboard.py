@@ -1,30 +1,249 @@
+import atexit
+import glob
 import json
 import os
-from typing import List, Dict
+import re
+import threading
+import time
+from typing import List, Dict, Optional
 
 LEADERBOARD_FILE = "data/coach_scores.json"
+SCORE_LOG_PATTERN = "data/coach_scores.{generation}.jsonl"
+
+
+def _atomic_write_json(path: str, payload) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _update_aggregate(aggregates: Dict[str, Dict], entry: Dict) -> None:
+    agg = aggregates.get(entry["name"])
+    if agg is None:
+        aggregates[entry["name"]] = {"games": 1, "total_score": entry["score"], "best": entry}
+        return
+    agg["games"] += 1
+    agg["total_score"] += entry["score"]
+    if entry["score"] > agg["best"]["score"]:
+        agg["best"] = entry
+
+
+class ScoreLog:
+    """
+    Append-only coach score log.
+
+    New scores are appended as JSON lines to the current log generation,
+    handed to the OS on every append and fsynced in batches, so a process
+    crash loses nothing and only a power loss can drop the last unsynced
+    batch. ``coach_scores.json`` holds a compacted snapshot of
+    every older generation together with per-coach aggregates, so "best score
+    per coach" never needs a scan. Compaction starts a new generation before
+    rewriting the snapshot, which keeps a crash at any point from losing or
+    double-counting entries. One lock serialises every public method, since
+    Streamlit sessions share the process-wide log across threads.
+    """
+
+    def __init__(self, snapshot_path: str = LEADERBOARD_FILE, log_pattern: str = SCORE_LOG_PATTERN,
+                 fsync_every: int = 20, fsync_interval: float = 2.0, compact_every: int = 5000):
+        self.snapshot_path = snapshot_path
+        self.log_pattern = log_pattern
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self.generation = 0
+        self.aggregates: Dict[str, Dict] = {}
+        self._log = None
+        self._log_entries = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._recover()
+
+    def append(self, entry: Dict) -> None:
+        """O(1) append of one score entry."""
+        with self._lock:
+            if self._log is None:
+                self._log = open(self._log_path(self.generation), "a", encoding="utf-8")
+            self._log.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._log.flush()  # to the OS now; only the fsync is batched
+            self._log_entries += 1
+            self._unsynced += 1
+            _update_aggregate(self.aggregates, entry)
+
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self.flush()
+            if self._log_entries >= self.compact_every:
+                self.compact()
+
+    def flush(self) -> None:
+        """Flush and fsync any buffered log writes."""
+        with self._lock:
+            if self._log is not None and self._unsynced:
+                self._log.flush()
+                os.fsync(self._log.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def compact(self) -> None:
+        """Fold the current log generation into the snapshot file."""
+        with self._lock:
+            self.flush()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            compacted = self.generation
+            self.generation += 1
+            self._log_entries = 0
+
+            _atomic_write_json(self.snapshot_path, {
+                "generation": compacted,
+                "entries": self._snapshot_entries() + self._read_log(compacted),
+                "aggregates": self.aggregates,
+            })
+            if os.path.exists(self._log_path(compacted)):
+                os.remove(self._log_path(compacted))
+
+    def entries(self) -> List[Dict]:
+        """Every score entry, snapshot first, then the live log."""
+        with self._lock:
+            self.flush()
+            return self._snapshot_entries() + self._read_log(self.generation)
+
+    def best_scores(self, limit: Optional[int] = None) -> List[Dict]:
+        """Best entry per coach, highest first, served from the aggregates."""
+        with self._lock:
+            ranked = sorted(
+                ({**agg["best"], "games": agg["games"], "average": agg["total_score"] / agg["games"]}
+                 for agg in self.aggregates.values()),
+                key=lambda e: e["score"],
+                reverse=True,
+            )
+        return ranked[:limit] if limit else ranked
+
+    # -- internals ---------------------------------------------------------
+
+    def _log_path(self, generation: int) -> str:
+        return self.log_pattern.format(generation=generation)
+
+    def _log_generations(self) -> List[int]:
+        pattern = re.escape(self.log_pattern).replace(r"\{generation\}", r"(\d+)")
+        generations = []
+        for path in glob.glob(self.log_pattern.format(generation="*")):
+            match = re.fullmatch(pattern, path)
+            if match:
+                generations.append(int(match.group(1)))
+        return sorted(generations)
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _snapshot_entries(self) -> List[Dict]:
+        snapshot = self._read_snapshot()
+        if snapshot is None:
+            return []
+        # Older installs stored a plain pretty-printed list
+        return snapshot if isinstance(snapshot, list) else snapshot["entries"]
+
+    def _read_log(self, generation: int) -> List[Dict]:
+        path = self._log_path(generation)
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # torn final line from a crash mid-write
+        return entries
+
+    @staticmethod
+    def _trim_torn_tail(path: str) -> None:
+        """Drop a partially written last line so new appends start on a clean line."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _recover(self) -> None:
+        snapshot = self._read_snapshot()
+        if isinstance(snapshot, list):
+            for entry in snapshot:
+                _update_aggregate(self.aggregates, entry)
+            snapshot_generation = -1
+        elif snapshot is not None:
+            self.aggregates = snapshot["aggregates"]
+            snapshot_generation = snapshot["generation"]
+        else:
+            snapshot_generation = -1
+
+        live = []
+        for generation in self._log_generations():
+            if generation <= snapshot_generation:
+                os.remove(self._log_path(generation))  # already in the snapshot
+            else:
+                live.append(generation)
+        self.generation = live[-1] if live else snapshot_generation + 1
+
+        # Trim first: entries merged onto a torn last line would be unreadable
+        self._trim_torn_tail(self._log_path(self.generation))
+        # Older live generations can only exist after a crash mid-compaction; merge them forward.
+        for generation in live[:-1]:
+            entries = self._read_log(generation)
+            with open(self._log_path(self.generation), "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            os.remove(self._log_path(generation))
+
+        for entry in self._read_log(self.generation):
+            _update_aggregate(self.aggregates, entry)
+            self._log_entries += 1
+
+
+_score_log: Optional[ScoreLog] = None
+_score_log_lock = threading.Lock()
+
+
+def get_score_log() -> ScoreLog:
+    """Process-wide score log, flushed on interpreter exit."""
+    global _score_log
+    with _score_log_lock:
+        if _score_log is None:
+            _score_log = ScoreLog()
+            atexit.register(_score_log.flush)
+    return _score_log
+
 
 def load_leaderboard() -> List[Dict]:
     """
     Loads the saved leaderboard from disk.
-    Returns an empty list if the file doesn't exist.
+    Returns an empty list if nothing has been saved yet.
     """
-    if not os.path.exists(LEADERBOARD_FILE):
-        return []
-    with open(LEADERBOARD_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_score_log().entries()
 
 def save_score(name: str, score: int, match: str, result: str, tactics: str) -> None:
     """
-    Saves a new score entry to the leaderboard file.
+    Appends a new score entry to the coach score log.
     """
-    leaderboard = load_leaderboard()
-    leaderboard.append({
+    get_score_log().append({
         "name": name,
         "score": score,
         "match": match,
         "result": result,
         "tactics": tactics
     })
-    with open(LEADERBOARD_FILE, "w", encoding="utf-8") as f:
-        json.dump(leaderboard, f, indent=2, ensure_ascii=False)
+
+def best_scores(limit: Optional[int] = None) -> List[Dict]:
+    """
+    Returns the best entry per coach, highest score first.
+    """
+    return get_score_log().best_scores(limit)
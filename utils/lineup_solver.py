@@ -0,0 +1,159 @@
+import argparse
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.fantasy_scoring import LINE_OF_POSITION, LINES
+
+# Legal starting shapes as (GK, DEF, MID, FWD) counts: one goalkeeper, 3-5
+# defenders, 2-5 midfielders and 1-3 forwards. Order breaks ties, so the
+# common shapes come first.
+FORMATIONS = {
+    "4-4-2": (1, 4, 4, 2),
+    "4-3-3": (1, 4, 3, 3),
+    "3-5-2": (1, 3, 5, 2),
+    "3-4-3": (1, 3, 4, 3),
+    "4-5-1": (1, 4, 5, 1),
+    "5-3-2": (1, 5, 3, 2),
+    "5-4-1": (1, 5, 4, 1),
+    "5-2-3": (1, 5, 2, 3),
+}
+FORMATION_NAMES = list(FORMATIONS)
+FORMATION_COUNTS = np.array(list(FORMATIONS.values()), dtype=np.int64)  # (formations, lines)
+XI_SIZE = 11
+PAD = len(LINES)  # line code of padding slots in squads shorter than the widest one
+
+
+def solve_lineups(scores: np.ndarray, lines: np.ndarray,
+                  captain_scores: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Best XI for a batch of squads in one pass.
+
+    ``scores`` and ``lines`` are (squads, players); a line is a LINES index,
+    and squads shorter than the widest one are padded with line PAD. Each
+    squad's players are sorted by line, then score, so the best k players of
+    a line are a contiguous run and their total is a difference of prefix
+    sums: every formation is scored in O(1), and the best is an argmax over
+    FORMATIONS. Returns, as arrays over squads (player indices into the
+    squad, -1 where there is none):
+
+    - ``formation``: index into FORMATION_NAMES, -1 when no shape fits;
+    - ``score``: total score of the XI;
+    - ``xi``: (squads, 11), goalkeeper first, then defenders, midfielders, forwards;
+    - ``bench``: backup goalkeeper first, then outfield players by score;
+    - ``captain``, ``vice_captain``: the two best starters by ``captain_scores``
+      (``scores`` by default).
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    lines = np.asarray(lines, dtype=np.int64)
+    n_squads, width = scores.shape
+    padded = lines == PAD
+    keyed = np.where(padded, 0.0, scores)
+
+    order = np.lexsort((-keyed, lines), axis=-1)
+    sorted_lines = np.take_along_axis(lines, order, axis=1)
+    sorted_scores = np.take_along_axis(keyed, order, axis=1)
+    prefix = np.zeros((n_squads, width + 1))
+    np.cumsum(sorted_scores, axis=1, out=prefix[:, 1:])
+
+    counts = np.stack([(lines == line).sum(axis=1) for line in range(len(LINES))], axis=1)  # (squads, lines)
+    starts = np.concatenate([np.zeros((n_squads, 1), dtype=np.int64), np.cumsum(counts, axis=1)[:, :-1]], axis=1)
+
+    totals = np.zeros((n_squads, len(FORMATION_NAMES)))
+    for line in range(len(LINES)):
+        need = FORMATION_COUNTS[:, line][None, :]  # (1, formations)
+        start = starts[:, line][:, None]
+        end = np.minimum(start + need, width)
+        totals += np.take_along_axis(prefix, end, axis=1) - np.take_along_axis(prefix, np.broadcast_to(start, end.shape), axis=1)
+        totals[counts[:, line][:, None] < need] = -np.inf
+    formation = np.argmax(totals, axis=1)
+    score = totals[np.arange(n_squads), formation]
+    feasible = np.isfinite(score)
+    formation = np.where(feasible, formation, -1)
+
+    # Starters are the first FORMATION_COUNTS[formation, line] of each line's run
+    rank_in_line = np.arange(width)[None, :] - np.take_along_axis(starts, np.minimum(sorted_lines, PAD - 1), axis=1)
+    need = np.where(sorted_lines == PAD, 0,
+                    np.take_along_axis(FORMATION_COUNTS[np.maximum(formation, 0)], np.minimum(sorted_lines, PAD - 1), axis=1))
+    starter = (rank_in_line < need) & feasible[:, None]
+    # Starters keep line order; the stable sort puts them first in every row
+    xi = np.take_along_axis(order, np.argsort(~starter, axis=1, kind="stable"), axis=1)[:, :XI_SIZE]
+    xi = np.where(feasible[:, None], xi, -1)
+
+    # Bench: backup goalkeeper first, then the rest by score; padding and starters last
+    bench_key = np.where(starter | (sorted_lines == PAD), 2, np.where(sorted_lines == 0, 0, 1))
+    bench_order = np.lexsort((-sorted_scores, bench_key), axis=-1)
+    bench = np.take_along_axis(order, bench_order, axis=1)[:, :max(width - XI_SIZE, 0)]
+    bench_valid = np.take_along_axis(bench_key, bench_order, axis=1)[:, :bench.shape[1]] < 2
+    bench = np.where(bench_valid & feasible[:, None], bench, -1)
+
+    captain_scores = keyed if captain_scores is None else np.asarray(captain_scores, dtype=np.float64)
+    starter_scores = np.where(xi >= 0, np.take_along_axis(captain_scores, np.maximum(xi, 0), axis=1), -np.inf)
+    top_two = np.argsort(-starter_scores, axis=1, kind="stable")[:, :2]
+    leaders = np.take_along_axis(xi, top_two, axis=1)
+    return {
+        "formation": formation,
+        "score": np.where(feasible, score, np.nan),
+        "xi": xi,
+        "bench": bench,
+        "captain": np.where(feasible, leaders[:, 0], -1),
+        "vice_captain": np.where(feasible, leaders[:, 1], -1),
+    }
+
+
+def squad_scores(squad: Sequence[Dict], column: str = "overall", default: float = 60.0) -> np.ndarray:
+    """A numeric column of a list of player dicts; "-" and other junk become ``default``."""
+    values = pd.to_numeric(pd.Series([p.get(column) for p in squad], dtype=object), errors="coerce")
+    return values.fillna(default).to_numpy(dtype=np.float64)
+
+
+def best_lineup(squad: Sequence[Dict], scores: Optional[Sequence[float]] = None,
+                captain_scores: Optional[Sequence[float]] = None) -> Optional[Dict]:
+    """
+    solve_lineups for one squad of player dicts (session-state shape),
+    scored on Overall unless ``scores`` is given. Returns the formation
+    name, XI and bench as player dicts, the captain and vice-captain names
+    and the XI's total score, or None when no legal formation fits.
+    """
+    if len(squad) < XI_SIZE:
+        return None
+    lines = np.array([LINE_OF_POSITION.get(p.get("position"), 2) for p in squad], dtype=np.int64)
+    scores = squad_scores(squad) if scores is None else np.asarray(scores, dtype=np.float64)
+    solved = solve_lineups(scores[None, :], lines[None, :],
+                           None if captain_scores is None else np.asarray(captain_scores, dtype=np.float64)[None, :])
+    if solved["formation"][0] < 0:
+        return None
+    return {
+        "formation": FORMATION_NAMES[solved["formation"][0]],
+        "xi": [squad[i] for i in solved["xi"][0]],
+        "bench": [squad[i] for i in solved["bench"][0] if i >= 0],
+        "captain": squad[solved["captain"][0]]["name"],
+        "vice_captain": squad[solved["vice_captain"][0]]["name"],
+        "score": float(solved["score"][0]),
+    }
+
+
+def random_squads(n: int, seed: int = 0) -> tuple:
+    """(scores, lines) for ``n`` random 2-5-5-3 squads, for benchmarks."""
+    rng = np.random.default_rng(seed)
+    lines = np.repeat(np.arange(len(LINES)), [2, 5, 5, 3])
+    lines = np.tile(lines, (n, 1))
+    scores = np.clip(rng.normal(66, 7, lines.shape), 45, 92).round()
+    return scores, lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch lineup solving")
+    parser.add_argument("--squads", type=int, default=100_000)
+    args = parser.parse_args()
+
+    scores, lines = random_squads(args.squads)
+    start = time.perf_counter()
+    solved = solve_lineups(scores, lines)
+    elapsed = time.perf_counter() - start
+    shapes = np.bincount(solved["formation"], minlength=len(FORMATION_NAMES))
+    print(f"{args.squads} squads in {elapsed * 1000:.0f} ms "
+          f"({elapsed / args.squads * 1e6:.2f} µs per squad)")
+    print(", ".join(f"{name}: {count}" for name, count in zip(FORMATION_NAMES, shapes)))
@@ -1,14 +1,176 @@
-def build_event_probabilities(events):
-    minute_buckets = {}  # e.g., { (1,15): [GOAL, SHOT], (16,30): [CARD], ... }
+import json
+import random
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-    for event in events:
-        minute = event["minute"]
-        key = (minute // 15) * 15 + 1
-        bucket = (key, key + 14)
+import numpy as np
 
-        if bucket not in minute_buckets:
-            minute_buckets[bucket] = []
+BUCKET_MINUTES = 15
+N_BUCKETS = 90 // BUCKET_MINUTES   # 1-15, 16-30, ..., 76-90 (stoppage time folds into its half)
+CONTEXTS = ("home", "away")
 
-        minute_buckets[bucket].append(event["type"].lower())
+_MINUTE_RE = re.compile(r"(\d+)'?\s*(?:\+\s*(\d+))?")
 
-    return minute_buckets
\ No newline at end of file
+
+def parse_minute(value: Any) -> Tuple[int, int]:
+    """Parse API-style match times such as "6'" or "90' +3" into (minute, added)."""
+    if isinstance(value, (int, float)):
+        return int(value), 0
+    match = _MINUTE_RE.search(str(value))
+    if not match:
+        return 0, 0
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def minute_bucket(minute: int) -> int:
+    """Index of the 15-minute bucket containing ``minute`` (1-15 -> 0, ..., 76-90 -> 5)."""
+    return min(max(minute - 1, 0) // BUCKET_MINUTES, N_BUCKETS - 1)
+
+
+def build_alias_table(probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Walker/Vose alias table for O(1) sampling from a discrete distribution."""
+    n = len(probs)
+    scaled = np.asarray(probs, dtype=float) * n
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class EventRateModel:
+    """
+    Empirical event model: counts[bucket, event_type, context] with the
+    matching probabilities, alias tables for O(1) type sampling and per-minute
+    event rates for continuous-time inter-arrival sampling.
+    """
+
+    def __init__(self, counts: np.ndarray, event_types: List[str], n_matches: int):
+        self.counts = counts
+        self.event_types = event_types
+        self.n_matches = max(n_matches, 1)
+
+        totals = counts.sum(axis=1, keepdims=True)
+        uniform = np.full_like(counts, 1.0 / len(event_types), dtype=float)
+        self.probabilities = np.divide(counts, totals, out=uniform, where=totals > 0)
+        # Expected events per minute, per bucket and context
+        self.rates = totals[:, 0, :] / (self.n_matches * BUCKET_MINUTES)
+
+        shape = (N_BUCKETS, len(CONTEXTS), len(event_types))
+        self.alias_prob = np.empty(shape)
+        self.alias_index = np.empty(shape, dtype=np.int64)
+        for b in range(N_BUCKETS):
+            for c in range(len(CONTEXTS)):
+                self.alias_prob[b, c], self.alias_index[b, c] = build_alias_table(self.probabilities[b, :, c])
+        # Plain lists make the scalar sampling path avoid NumPy call overhead
+        self._alias_prob = self.alias_prob.tolist()
+        self._alias_index = self.alias_index.tolist()
+
+    def sample_event_type(self, minute: int, context: int = 0, rng: Optional[random.Random] = None) -> str:
+        """Draw one event type for ``minute`` in O(1)."""
+        rng = rng or random
+        b = minute_bucket(minute)
+        k = rng.randrange(len(self.event_types))
+        if rng.random() >= self._alias_prob[b][context][k]:
+            k = self._alias_index[b][context][k]
+        return self.event_types[k]
+
+    def sample_event_types(self, minutes: np.ndarray, contexts: np.ndarray,
+                           rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Vectorised alias sampling; returns event-type indices."""
+        rng = rng or np.random.default_rng()
+        buckets = np.minimum(np.maximum(np.asarray(minutes) - 1, 0) // BUCKET_MINUTES, N_BUCKETS - 1)
+        k = rng.integers(len(self.event_types), size=len(buckets))
+        keep = rng.random(len(buckets)) < self.alias_prob[buckets, contexts, k]
+        return np.where(keep, k, self.alias_index[buckets, contexts, k])
+
+    def next_event_minute(self, minute: float, context: int = 0,
+                          rng: Optional[random.Random] = None) -> Optional[float]:
+        """
+        Time of the next event after ``minute`` for one side, or None if
+        nothing else happens before full time. Rates are piecewise constant per
+        bucket, so quiet spells are skipped in a single draw per bucket.
+        """
+        rng = rng or random
+        while minute < 90:
+            b = minute_bucket(int(minute) + 1)
+            bucket_end = (b + 1) * BUCKET_MINUTES
+            rate = self.rates[b, context]
+            if rate > 0:
+                candidate = minute + rng.expovariate(rate)
+                if candidate < bucket_end:
+                    return candidate
+            minute = bucket_end  # memoryless: restart the clock at the next bucket
+        return None
+
+    def timeline(self, context: int = 0, rng: Optional[random.Random] = None) -> List[Tuple[int, str]]:
+        """Sample a full 90-minute (minute, event_type) sequence for one side."""
+        rng = rng or random
+        events = []
+        minute = self.next_event_minute(0.0, context, rng)
+        while minute is not None:
+            events.append((int(minute) + 1, self.sample_event_type(int(minute) + 1, context, rng)))
+            minute = self.next_event_minute(minute, context, rng)
+        return events
+
+    def as_dict(self) -> Dict[Tuple[int, int], Dict[str, float]]:
+        """Readable view: {(first_minute, last_minute): {event_type: probability}} over both sides."""
+        merged = self.counts.sum(axis=2)
+        view = {}
+        for b in range(N_BUCKETS):
+            total = merged[b].sum()
+            if total:
+                view[(b * BUCKET_MINUTES + 1, (b + 1) * BUCKET_MINUTES)] = {
+                    t: float(merged[b, i] / total) for i, t in enumerate(self.event_types) if merged[b, i]
+                }
+        return view
+
+
+def _flatten(events: Iterable[Dict[str, Any]]):
+    """Yield (minute, type, context) from fixtures with nested events or flat event dicts."""
+    for item in events:
+        if "events" in item:
+            home = item.get("home_team")
+            for event in item["events"]:
+                minute, _ = parse_minute(event.get("time", event.get("minute", 0)))
+                yield minute, str(event.get("type", "unknown")).lower(), int(event.get("team") != home)
+        else:
+            minute, _ = parse_minute(item.get("minute", item.get("time", 0)))
+            context = item.get("context", 0)
+            if isinstance(context, str):
+                context = CONTEXTS.index(context) if context in CONTEXTS else 0
+            yield minute, str(item.get("type", "unknown")).lower(), int(context)
+
+
+def build_event_probabilities(events) -> EventRateModel:
+    """
+    Build an EventRateModel from fixtures (events_sample.json shape) or a
+    flat list of events with ``minute`` and ``type``.
+    """
+    events = list(events)
+    rows = list(_flatten(events))
+    event_types = sorted({t for _, t, _ in rows}) or ["unknown"]
+    n_matches = sum(1 for e in events if "events" in e) or 1
+
+    counts = np.zeros((N_BUCKETS, len(event_types), len(CONTEXTS)), dtype=np.int64)
+    if rows:
+        minutes, types, contexts = zip(*rows)
+        type_index = {t: i for i, t in enumerate(event_types)}
+        buckets = np.minimum(np.maximum(np.array(minutes) - 1, 0) // BUCKET_MINUTES, N_BUCKETS - 1)
+        flat = np.ravel_multi_index(
+            (buckets, np.array([type_index[t] for t in types]), np.array(contexts)),
+            counts.shape,
+        )
+        counts = np.bincount(flat, minlength=counts.size).reshape(counts.shape)
+    return EventRateModel(counts, event_types, n_matches)
+
+
+def load_event_model(path: str = "data/events_sample.json") -> EventRateModel:
+    with open(path, encoding="utf-8") as f:
+        return build_event_probabilities(json.load(f))
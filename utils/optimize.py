@@ -0,0 +1,73 @@
+from collections import deque
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+# f(x) -> (value, gradient)
+Objective = Callable[[np.ndarray], Tuple[float, np.ndarray]]
+
+
+def lbfgs(objective: Objective, x0: np.ndarray, max_iter: int = 500, memory: int = 10,
+          gtol: float = 1e-6, ftol: float = 1e-10) -> Dict:
+    """
+    Minimise a smooth function with limited-memory BFGS (two-loop recursion)
+    and a backtracking Armijo line search. ``objective`` may return an
+    infinite value for infeasible points; the line search steps back from them.
+
+    Returns {"x", "fun", "grad", "iterations", "converged"}.
+    """
+    x = np.asarray(x0, dtype=np.float64).copy()
+    f, g = objective(x)
+    history: deque = deque(maxlen=memory)
+    converged = False
+
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        if np.max(np.abs(g)) < gtol:
+            converged = True
+            break
+
+        # Two-loop recursion: direction = -H g
+        q = g.copy()
+        alphas = []
+        for s, y, rho in reversed(history):
+            alpha = rho * s.dot(q)
+            q -= alpha * y
+            alphas.append(alpha)
+        if history:
+            s, y, _ = history[-1]
+            q *= s.dot(y) / y.dot(y)
+        else:
+            q /= max(1.0, np.linalg.norm(g))
+        for (s, y, rho), alpha in zip(history, reversed(alphas)):
+            beta = rho * y.dot(q)
+            q += s * (alpha - beta)
+        direction = -q
+
+        slope = g.dot(direction)
+        if slope >= 0:
+            # Not a descent direction (stale curvature): restart from steepest descent
+            history.clear()
+            direction = -g / max(1.0, np.linalg.norm(g))
+            slope = g.dot(direction)
+
+        step = 1.0
+        while True:
+            x_new = x + step * direction
+            f_new, g_new = objective(x_new)
+            if np.isfinite(f_new) and f_new <= f + 1e-4 * step * slope:
+                break
+            step *= 0.5
+            if step < 1e-12:
+                return {"x": x, "fun": f, "grad": g, "iterations": iteration, "converged": False}
+
+        s, y = x_new - x, g_new - g
+        sy = s.dot(y)
+        if sy > 1e-12:
+            history.append((s, y, 1.0 / sy))
+        converged = abs(f - f_new) <= ftol * max(1.0, abs(f))
+        x, f, g = x_new, f_new, g_new
+        if converged:
+            break
+
+    return {"x": x, "fun": f, "grad": g, "iterations": iteration, "converged": converged}
@@ -0,0 +1,207 @@
+import argparse
+import os
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.elo import EloEngine
+from utils.form_engine import FormEngine
+from utils.h2h_index import H2HIndex
+from utils.optimize import lbfgs
+from utils.results_history import load_results, results_version
+
+OUTCOME_MODEL_FILE = "data/outcome_model.npz"
+
+FEATURES = ["elo_diff", "form_ppg_diff", "form_gd_diff", "h2h_balance"]
+L2 = 1.0
+MIN_TRAINING_MATCHES = 50
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class FeatureState:
+    """
+    Running Elo, form and head-to-head state. ``features`` describes a
+    fixture using only results already passed to ``observe``, so replaying
+    history in date order yields leak-free training rows. Given a date, every
+    feature is read as of that date (Elo from its dated snapshots), so a past
+    fixture never sees its own result.
+    """
+
+    def __init__(self):
+        self.elo = EloEngine()
+        self.form = FormEngine({})
+        self.h2h = H2HIndex()
+
+    @classmethod
+    def from_results(cls, results: pd.DataFrame) -> "FeatureState":
+        state = cls()
+        for row in results.sort_values("date", kind="stable")[
+                ["date", "home_id", "away_id", "home_goals", "away_goals"]].itertuples(index=False, name=None):
+            state.observe(*row)
+        return state
+
+    def features(self, home, away, date=None) -> List[float]:
+        home_form = self.form.form(home, before=date)
+        away_form = self.form.form(away, before=date)
+        h2h = self.h2h.summary(home, away, before=date)
+        return [
+            (self.elo.rating(home, date) - self.elo.rating(away, date) + self.elo.home_advantage) / 100.0,
+            (home_form["ppg"] or 1.35) - (away_form["ppg"] or 1.35),
+            home_form["goal_diff"] / max(home_form["played"], 1) - away_form["goal_diff"] / max(away_form["played"], 1),
+            # Shrunk towards zero so one old meeting barely counts
+            (h2h["wins"] - h2h["losses"]) / (h2h["played"] + 2.0),
+        ]
+
+    def observe(self, date, home, away, home_goals: int, away_goals: int) -> None:
+        self.elo.apply_result(date, home, away, home_goals, away_goals)
+        self.form.append_result(date, home, away, home_goals, away_goals)
+        self.h2h.add_result(date, home, away, home_goals, away_goals)
+
+
+def training_set(results: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, FeatureState]:
+    """Walk-forward feature matrix and outcome labels (0 home, 1 draw, 2 away) for a results frame."""
+    state = FeatureState()
+    rows, labels = [], []
+    columns = ["date", "home_id", "away_id", "home_goals", "away_goals"]
+    for date, home, away, hg, ag in results.sort_values("date", kind="stable")[columns].itertuples(index=False, name=None):
+        rows.append(state.features(home, away, date))
+        labels.append(0 if hg > ag else 1 if hg == ag else 2)
+        state.observe(date, home, away, hg, ag)
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES)), np.array(labels, dtype=np.int64), state
+
+
+class OutcomeClassifier:
+    """
+    Multinomial logistic regression over FEATURES. Inference is a single
+    (n, features + 1) x (features + 1, 3) matrix product followed by a softmax.
+    """
+
+    def __init__(self, weights: np.ndarray, mean: np.ndarray, scale: np.ndarray, version: Optional[str] = None):
+        self.weights = weights
+        self.mean = mean
+        self.scale = scale
+        self.version = version
+
+    @classmethod
+    def fit(cls, X: np.ndarray, y: np.ndarray, l2: float = L2) -> "OutcomeClassifier":
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        design = np.hstack([np.ones((len(X), 1)), (X - mean) / scale])
+        onehot = np.eye(3)[y]
+        shape = (design.shape[1], 3)
+
+        def objective(theta):
+            W = theta.reshape(shape)
+            logits = design @ W
+            logits -= logits.max(axis=1, keepdims=True)
+            log_norm = np.log(np.exp(logits).sum(axis=1))
+            # Intercepts are not penalised
+            penalty = 0.5 * l2 * np.sum(W[1:] ** 2)
+            value = -(np.sum(logits * onehot) - log_norm.sum()) + penalty
+            probs = np.exp(logits - log_norm[:, None])
+            grad = design.T @ (probs - onehot)
+            grad[1:] += l2 * W[1:]
+            return value, grad.ravel()
+
+        result = lbfgs(objective, np.zeros(shape[0] * shape[1]))
+        return cls(result["x"].reshape(shape), mean, scale)
+
+    def _design(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        return np.hstack([np.ones((len(X), 1)), (X - self.mean) / self.scale])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """(n, 3) home/draw/away probabilities for an (n, len(FEATURES)) feature matrix."""
+        return _softmax(self._design(X) @ self.weights)
+
+    def save(self, path: str = OUTCOME_MODEL_FILE) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, weights=self.weights, mean=self.mean, scale=self.scale,
+                 features=np.array(FEATURES), version=np.array(self.version or ""))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = OUTCOME_MODEL_FILE) -> "OutcomeClassifier":
+        with np.load(path) as data:
+            if data["features"].tolist() != FEATURES:
+                raise ValueError("Outcome model was trained on a different feature set")
+            return cls(data["weights"], data["mean"], data["scale"], str(data["version"]) or None)
+
+
+def train_outcome_model(results: Optional[pd.DataFrame] = None, path: Optional[str] = OUTCOME_MODEL_FILE,
+                        l2: float = L2) -> OutcomeClassifier:
+    """Offline training over the full results history; writes the artifact when ``path`` is given."""
+    results = load_results() if results is None else results
+    X, y, _ = training_set(results)
+    model = OutcomeClassifier.fit(X, y, l2)
+    model.version = results_version(results)
+    if path:
+        model.save(path)
+    return model
+
+
+class LocalPredictor:
+    """Trained classifier plus the live feature state it needs at inference time."""
+
+    def __init__(self, model: OutcomeClassifier, state: FeatureState):
+        self.model = model
+        self.state = state
+
+    def features(self, fixtures: Iterable[Tuple]) -> np.ndarray:
+        """Feature matrix for (home, away[, date]) tuples; teams as ids or names."""
+        return np.array([self.state.features(*fixture) for fixture in fixtures],
+                        dtype=np.float64).reshape(-1, len(FEATURES))
+
+    def predict_many(self, fixtures: Sequence[Tuple]) -> np.ndarray:
+        """Batch inference: one feature pass, one matrix multiply."""
+        return self.model.predict_proba(self.features(fixtures))
+
+    def predict(self, home, away, date=None) -> Tuple[float, float, float]:
+        p = self.predict_many([(home, away, date)])[0]
+        return float(p[0]), float(p[1]), float(p[2])
+
+
+_default_predictor: Optional[LocalPredictor] = None
+
+
+def load_local_predictor(path: str = OUTCOME_MODEL_FILE) -> LocalPredictor:
+    """
+    Process-wide local predictor. The artifact is loaded when present and
+    current; otherwise the model is trained (in well under a second) and saved.
+    """
+    global _default_predictor
+    if _default_predictor is None:
+        results = load_results()
+        model = None
+        if os.path.exists(path):
+            try:
+                model = OutcomeClassifier.load(path)
+            except (OSError, KeyError, ValueError):
+                model = None
+        if model is None or model.version != results_version(results):
+            model = train_outcome_model(results, path=None)
+            try:
+                model.save(path)
+            except OSError:
+                pass
+        _default_predictor = LocalPredictor(model, FeatureState.from_results(results))
+    return _default_predictor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local match outcome classifier")
+    parser.add_argument("--output", default=OUTCOME_MODEL_FILE)
+    parser.add_argument("--l2", type=float, default=L2)
+    args = parser.parse_args()
+
+    trained = train_outcome_model(path=args.output, l2=args.l2)
+    print(f"Saved {args.output} ({os.path.getsize(args.output)} bytes)")
+    for name, row in zip(["intercept"] + FEATURES, trained.weights):
+        print(f"  {name:>14}: " + "  ".join(f"{w:+.3f}" for w in row))
@@ -0,0 +1,187 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = ["position", "team", "nationality"]
+SORTABLE = ["price", "overall", "age", "goals", "assists"]
+PAGE_SIZE = 20
+
+
+def _normalise(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def player_key(player) -> Tuple[str, str]:
+    """
+    (name, club) identifying one player dict or row. Names alone are not
+    unique: a few players are listed at two clubs under the same name.
+    """
+    return str(player["name"]), str(player["team"])
+
+
+class PlayerIndex:
+    """
+    Read-only search index over the players frame (see
+    hacl3.load_players_data), built once per data version.
+
+    Categorical columns are stored as integer codes with a posting array of
+    row ids per value, sortable columns as a rank per row in each direction
+    (the inverse of a stable presorted permutation, so equal values keep row
+    order both ways), and names as sorted lower-case tokens for prefix
+    lookup. A filter + sort + page query is then a few posting-array
+    intersections, one argsort over the matching ranks and a slice.
+    """
+
+    def __init__(self, players: pd.DataFrame):
+        self.players = players.reset_index(drop=True)
+        n = len(self.players)
+        self.rows = np.arange(n)
+
+        self.codes: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+        for column in CATEGORICAL:
+            codes, uniques = pd.factorize(self.players[column].astype(str), sort=True)
+            self.codes[column] = codes.astype(np.int32)
+            self.categories[column] = uniques.tolist()
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.postings[column] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            }
+
+        self.values: Dict[str, np.ndarray] = {}
+        # Keyed by (column, ascending)
+        self.permutations: Dict[Tuple[str, bool], np.ndarray] = {}
+        self.ranks: Dict[Tuple[str, bool], np.ndarray] = {}
+        for column in SORTABLE + ["name"] + CATEGORICAL:
+            if column == "name":
+                values = self.players["name"].astype(str).str.lower().to_numpy()
+            elif column in CATEGORICAL:
+                values = self.codes[column]  # codes follow the sorted categories
+            else:
+                # "N/A" ages and the like sort after every real value
+                values = pd.to_numeric(self.players[column], errors="coerce").fillna(np.inf).to_numpy(np.float64)
+                self.values[column] = values
+            permutation = np.argsort(values, kind="stable")
+            # Descending order sorts on the negated rank of each distinct value,
+            # so ties stay in row order; missing values stay last
+            ordered = values[permutation]
+            distinct = np.empty(n, dtype=np.int64)
+            distinct[permutation] = np.concatenate([[0], np.cumsum(ordered[1:] != ordered[:-1])]) if n else []
+            descending = -distinct
+            if column in self.values:
+                descending[np.isinf(values)] = 1
+            for ascending, order in ((True, permutation), (False, np.argsort(descending, kind="stable"))):
+                rank = np.empty(n, dtype=np.int64)
+                rank[order] = np.arange(n)
+                self.permutations[column, ascending] = order
+                self.ranks[column, ascending] = rank
+
+        # Every word of every name, so "ron" finds "Cristiano Ronaldo"
+        tokens, owners = [], []
+        for row, name in enumerate(self.players["name"].astype(str)):
+            for token in set(_normalise(name).split()) | {_normalise(name)}:
+                tokens.append(token)
+                owners.append(row)
+        token_order = np.argsort(np.array(tokens, dtype=object), kind="stable")
+        self.tokens = np.array(tokens, dtype=object)[token_order]
+        self.token_rows = np.array(owners, dtype=np.int64)[token_order]
+        self.by_key = {player_key(p): row for row, p in enumerate(self.players[["name", "team"]].to_dict("records"))}
+        self.by_name: Dict[str, int] = {}
+        for row, name in enumerate(self.players["name"]):
+            self.by_name.setdefault(name, row)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def options(self, column: str) -> List[str]:
+        """Sorted distinct values of a categorical column, for filter widgets."""
+        return self.categories[column]
+
+    def get(self, name: str, team: Optional[str] = None) -> Optional[Dict]:
+        """
+        Exact-name lookup as a record dict, or None. Without ``team`` a name
+        listed at several clubs gives its first row.
+        """
+        row = self.by_name.get(name) if team is None else self.by_key.get((name, team))
+        return None if row is None else self.players.iloc[row].to_dict()
+
+    def row_of(self, player: Dict) -> Optional[int]:
+        """Row id of a player dict (session-state shape), matched on name and club."""
+        return self.by_key.get(player_key(player))
+
+    def rows_for_players(self, players: Iterable[Dict]) -> np.ndarray:
+        """Sorted row ids of the player dicts found in the index."""
+        rows = {self.by_key.get(player_key(p)) for p in players} - {None}
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def prefix(self, text: str) -> np.ndarray:
+        """Sorted row ids of players with a name, or a word of it, starting with ``text``."""
+        text = _normalise(text)
+        if not text:
+            return self.rows
+        lo = np.searchsorted(self.tokens, text, side="left")
+        hi = np.searchsorted(self.tokens, text + "\uffff", side="left")
+        return np.unique(self.token_rows[lo:hi])
+
+    def filter(self, position: Optional[str] = None, team: Optional[str] = None,
+               nationality: Optional[str] = None, name: str = "",
+               within: Optional[np.ndarray] = None, max_price: Optional[float] = None,
+               exclude: Iterable[int] = ()) -> np.ndarray:
+        """
+        Sorted row ids matching every given criterion; "All" or None skips a
+        criterion. ``exclude`` holds row ids, e.g. rows_for_players(squad).
+        """
+        chosen = {}
+        for column, value in (("position", position), ("team", team), ("nationality", nationality)):
+            if value in (None, "All", "All Teams"):
+                continue
+            if str(value) not in self.postings[column]:
+                return np.zeros(0, dtype=np.int64)
+            chosen[column] = str(value)
+
+        # Start from the shortest posting array and narrow it with code lookups
+        if chosen:
+            first = min(chosen, key=lambda c: len(self.postings[c][chosen[c]]))
+            candidates = self.postings[first][chosen.pop(first)]
+            if within is not None:
+                candidates = np.intersect1d(candidates, within, assume_unique=True)
+        else:
+            candidates = self.rows if within is None else np.asarray(within, dtype=np.int64)
+        for column, value in chosen.items():
+            code = self.categories[column].index(value)
+            candidates = candidates[self.codes[column][candidates] == code]
+        if name:
+            candidates = np.intersect1d(candidates, self.prefix(name), assume_unique=True)
+        if max_price is not None:
+            candidates = candidates[self.values["price"][candidates] <= max_price]
+        excluded = np.unique(np.asarray(list(exclude), dtype=np.int64))
+        if len(excluded):
+            candidates = np.setdiff1d(candidates, excluded, assume_unique=True)
+        return candidates
+
+    def sort(self, rows: np.ndarray, by: str = "overall", ascending: bool = False) -> np.ndarray:
+        """``rows`` ordered on ``by``; equal values keep row order in either direction."""
+        if len(rows) * 8 > len(self.players):
+            # Broad result: walk the presorted permutation, O(n) without a sort
+            mask = np.zeros(len(self.players), dtype=bool)
+            mask[rows] = True
+            permutation = self.permutations[by, ascending]
+            return permutation[mask[permutation]]
+        return rows[np.argsort(self.ranks[by, ascending][rows])]
+
+    def page(self, rows: np.ndarray, page: int = 0, page_size: int = PAGE_SIZE) -> pd.DataFrame:
+        """One 0-based page of already filtered and sorted rows."""
+        start = max(page, 0) * page_size
+        return self.players.iloc[rows[start:start + page_size]]
+
+    def query(self, sort_by: str = "overall", ascending: bool = False, page: int = 0,
+              page_size: int = PAGE_SIZE, **criteria) -> Tuple[int, pd.DataFrame]:
+        """
+        (total matches, one page of players) for ``filter`` criteria, sorted
+        on a SORTABLE column, "name" or a CATEGORICAL column.
+        """
+        rows = self.sort(self.filter(**criteria), sort_by, ascending)
+        return len(rows), self.page(rows, page, page_size)
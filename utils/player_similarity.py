@@ -0,0 +1,221 @@
+import argparse
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.fantasy_scoring import normalise_player_name
+
+# Distance contributed by a one-standard-deviation gap in each feature
+# (a different position counts as a full weight)
+FEATURE_WEIGHTS = {
+    "position": 3.0,
+    "overall": 1.5,
+    "age": 0.75,
+    "goals": 0.5,
+    "assists": 0.5,
+    "price": 1.0,
+    "foot": 0.5,
+    "height": 0.75,
+}
+NUMERIC = ["overall", "age", "goals", "assists", "price", "height"]
+SIMILAR_PLAYERS = 5
+
+
+def parse_height(value) -> float:
+    """Height in cm from "1.93m", "193cm" or "193"; NaN for "-" and other junk."""
+    match = re.search(r"\d+(?:[.,]\d+)?", str(value))
+    if not match:
+        return np.nan
+    number = float(match.group().replace(",", "."))
+    return number * 100 if number < 3 else number
+
+
+def _foot_columns(feet: Iterable) -> np.ndarray:
+    """(left, right) per player: "both" is (1, 1), unknown feet get the squad-wide average."""
+    feet = [str(f).lower() for f in feet]
+    left = np.array([f in ("left", "both") for f in feet], dtype=np.float64)
+    right = np.array([f in ("right", "both") for f in feet], dtype=np.float64)
+    known = np.array([f in ("left", "right", "both") for f in feet])
+    columns = np.column_stack([left, right])
+    if known.any():
+        columns[~known] = columns[known].mean(axis=0)
+    return columns
+
+
+class SimilarityIndex:
+    """
+    Nearest-neighbour search over player feature vectors, for "a cheaper
+    version of X" in the squad builder and the analyst chat.
+
+    Each player is one float32 row: a position one-hot plus Overall, age,
+    goals, assists, log price, preferred foot and height, each standardised
+    and scaled by FEATURE_WEIGHTS. Missing values sit at the column mean, so
+    they neither help nor hurt a match. Squared row norms are kept, so a
+    query is one matrix-vector product over the rows passing the filters
+    and an argpartition for the k closest.
+    """
+
+    def __init__(self, players: pd.DataFrame):
+        self.players = players.reset_index(drop=True)
+        n = len(self.players)
+        self.names = self.players["name"].astype(str).to_numpy()
+        # A few names are listed at two clubs, so a player is a (name, club) pair
+        self.by_key = {(name, club): i for i, (name, club) in enumerate(zip(self.names, self.players["team"].astype(str)))}
+        self.by_name: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            self.by_name.setdefault(name, []).append(i)
+        self.prices = pd.to_numeric(self.players["price"], errors="coerce").fillna(np.inf).to_numpy(np.float64)
+        self.positions = self.players["position"].astype(str).to_numpy()
+        self.club_codes, self.club_names = pd.factorize(self.players["team"].astype(str))
+        # Row ids per position, so a position filter starts from its own rows
+        self.by_position = {position: np.flatnonzero(self.positions == position)
+                            for position in np.unique(self.positions)}
+
+        raw = {}
+        for column in NUMERIC:
+            values = self.players[column] if column in self.players else pd.Series(np.nan, index=self.players.index)
+            values = values.map(parse_height) if column == "height" else pd.to_numeric(values, errors="coerce")
+            raw[column] = values.to_numpy(dtype=np.float64)
+        raw["price"] = np.log1p(np.where(np.isfinite(self.prices), self.prices, np.nan))
+
+        blocks = []
+        position_codes, position_names = pd.factorize(self.positions, sort=True)
+        one_hot = np.zeros((n, len(position_names)))
+        one_hot[np.arange(n), position_codes] = 1.0
+        blocks.append(one_hot * FEATURE_WEIGHTS["position"] / np.sqrt(2))
+        for column in NUMERIC:
+            values = raw[column]
+            known = np.isfinite(values)
+            mean = values[known].mean() if known.any() else 0.0
+            std = values[known].std() if known.sum() > 1 else 0.0
+            z = np.where(known, (values - mean) / std, 0.0) if std > 0 else np.zeros(n)
+            blocks.append((z * FEATURE_WEIGHTS[column])[:, None])
+        feet = self.players["foot"] if "foot" in self.players else pd.Series("unknown", index=self.players.index)
+        blocks.append(_foot_columns(feet) * FEATURE_WEIGHTS["foot"] / np.sqrt(2))
+
+        self.matrix = np.ascontiguousarray(np.hstack(blocks), dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        self.by_token: Dict[str, List[int]] = {}
+        for row, name in enumerate(self.names):
+            for token in set(normalise_player_name(name).split()):
+                self.by_token.setdefault(token, []).append(row)
+        self.overall = raw["overall"]
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def resolve(self, text: str) -> Optional[int]:
+        """
+        Row of the player meant by free text: an exact name, else a player
+        whose name has every word of ``text`` ("Firmino" -> "Roberto
+        Firmino"); the best-rated one when several match.
+        """
+        if text in self.by_name:
+            matches = set(self.by_name[text])
+        else:
+            tokens = normalise_player_name(text).split()
+            if not tokens:
+                return None
+            matches = set(self.by_token.get(tokens[0], []))
+            for token in tokens[1:]:
+                matches &= set(self.by_token.get(token, []))
+        if not matches:
+            return None
+        return max(matches, key=lambda row: (np.nan_to_num(self.overall[row], nan=-np.inf), -row))
+
+    def nearest(self, target: int, k: int = SIMILAR_PLAYERS, max_price: Optional[float] = None,
+                position: Optional[str] = None, exclude_clubs: Iterable[str] = (),
+                exclude: Iterable[Tuple[str, str]] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, distances) of the ``k`` players closest to row ``target``,
+        nearest first. Filters: price at most ``max_price``, one position, no
+        players from ``exclude_clubs`` or among the (name, club) pairs in
+        ``exclude``.
+        """
+        if not 0 <= target < len(self.players):
+            raise KeyError(f"Unknown player row: {target}")
+        if position in (None, "All"):
+            candidates = np.arange(len(self.players))
+        else:
+            candidates = self.by_position.get(position, np.zeros(0, dtype=np.int64))
+        if max_price is not None:
+            candidates = candidates[self.prices[candidates] <= max_price]
+        clubs = [self.club_names.get_loc(club) for club in exclude_clubs if club in self.club_names]
+        if clubs:
+            candidates = candidates[~np.isin(self.club_codes[candidates], clubs)]
+        dropped = [target] + [self.by_key[key] for key in exclude if key in self.by_key]
+        candidates = candidates[~np.isin(candidates, dropped)]
+
+        query = self.matrix[target]
+        distances = self.norms[candidates] - 2 * (self.matrix[candidates] @ query) + self.norms[target]
+        if len(candidates) > k:
+            nearest = np.argpartition(distances, k)[:k]
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], np.sqrt(np.maximum(distances[order], 0.0))
+
+    def similar(self, target: int, k: int = SIMILAR_PLAYERS, **filters) -> pd.DataFrame:
+        """``nearest`` as player rows with a ``distance`` column."""
+        rows, distances = self.nearest(target, k, **filters)
+        return self.players.iloc[rows].assign(distance=distances.round(3))
+
+
+# Explicit similarity phrases only: a bare "like" also matches chat such as "do you like Mahrez?"
+_QUERY = re.compile(
+    r"\b(?:(?:players?|someone|anyone|somebody) like|who(?: is|'s| are) like|similar to|"
+    r"alternatives? to|replacements? for|(?:cheaper|budget) versions? of)\s+(?P<name>[^,?!]+?)"
+    r"(?:,?\s*(?:but\s+)?(?:under|below|less than|for less than|cheaper than|max)\s+(?:sar\s*)?"
+    r"(?P<amount>\d+(?:[.,]\d+)?)\s*(?P<unit>m|million|k|thousand)?\b[^?!]*)?\s*[?.!]*$",
+    re.IGNORECASE,
+)
+
+
+def parse_similarity_query(text: str) -> Optional[Dict]:
+    """
+    Name text, price cap (SAR) and whether "cheaper" was asked for, from a
+    chat question such as "who is like Firmino but under 20M SAR", or None
+    when the question is not a similarity search.
+    """
+    match = _QUERY.search(text.strip())
+    if not match:
+        return None
+    max_price = None
+    if match.group("amount"):
+        scale = {"m": 1e6, "million": 1e6, "k": 1e3, "thousand": 1e3}.get((match.group("unit") or "").lower(), 1.0)
+        max_price = float(match.group("amount").replace(",", ".")) * scale
+    return {
+        "name": match.group("name").strip(),
+        "max_price": max_price,
+        "cheaper": bool(re.search(r"\bcheaper\b", text, re.IGNORECASE)),
+    }
+
+
+if __name__ == "__main__":
+    from utils.squad_optimizer import synthetic_pool
+
+    parser = argparse.ArgumentParser(description="Benchmark similar-player queries on a synthetic pool")
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    args = parser.parse_args()
+
+    pool = synthetic_pool(args.players)
+    rng = np.random.default_rng(0)
+    pool["age"] = rng.integers(18, 36, len(pool))
+    pool["height"] = [f"{h:.2f}m" for h in rng.normal(1.81, 0.06, len(pool))]
+    pool["foot"] = rng.choice(["right", "left", "both", "unknown"], len(pool), p=[0.7, 0.2, 0.05, 0.05])
+
+    start = time.perf_counter()
+    index = SimilarityIndex(pool)
+    build_ms = (time.perf_counter() - start) * 1000
+    targets = rng.integers(0, len(index), args.queries)
+    start = time.perf_counter()
+    for target in targets:
+        index.nearest(int(target), max_price=index.prices[target], position=index.positions[target])
+    query_ms = (time.perf_counter() - start) * 1000 / args.queries
+    print(f"Index over {args.players} players built in {build_ms:.0f} ms; "
+          f"{query_ms:.3f} ms per filtered top-{SIMILAR_PLAYERS} query")
+    print(index.similar(int(targets[0]), position=index.positions[targets[0]]).to_string())
@@ -0,0 +1,268 @@
+import json
+import os
+from numbers import Integral
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.outcome_model import FEATURES, LocalPredictor, load_local_predictor
+from utils.team_names import team_display_name, team_id
+
+TOP_SCORERS_FILE = "data/top_scorers.json"
+PLAYERS_FILE = "data/players.json"
+
+OUTCOMES = ["Home Win", "Draw", "Away Win"]
+FACTORS = ["rating", "form", "h2h", "home", "scorer"]
+# Logit-scale weight per goal of top-scorer advantage (not a model feature)
+SCORER_WEIGHT = 0.02
+MAX_FACTORS = 4
+
+TEMPLATES = {
+    "english": {
+        "rating": "{favoured} rated higher (Elo {favoured_elo:.0f} vs {other_elo:.0f})",
+        "rating_even": "Evenly rated sides (Elo {home_elo:.0f} vs {away_elo:.0f})",
+        "form": "{favoured} in better form ({favoured_form} vs {other_form})",
+        "form_even": "Similar recent form ({home_form} vs {away_form})",
+        "streak": "{team} unbeaten in last {count}",
+        "h2h": "{favoured} lead the head-to-head {wins}W {draws}D {losses}L",
+        "h2h_even": "Balanced head-to-head ({wins}W {draws}D {losses}L)",
+        "home": "Home advantage for {home}",
+        "scorer": "{player} ({goals} goals) leads the line for {team}",
+    },
+    "arabic_saudi": {
+        "rating": "تصنيف {favoured} أعلى (إيلو {favoured_elo:.0f} مقابل {other_elo:.0f})",
+        "rating_even": "تصنيف الفريقين متقارب (إيلو {home_elo:.0f} مقابل {away_elo:.0f})",
+        "form": "{favoured} في مستوى أفضل ({favoured_form} مقابل {other_form})",
+        "form_even": "مستوى متقارب مؤخراً ({home_form} مقابل {away_form})",
+        "streak": "{team} بدون خسارة في آخر {count} مباريات",
+        "h2h": "{favoured} يتفوق في المواجهات المباشرة {wins} فوز {draws} تعادل {losses} خسارة",
+        "h2h_even": "مواجهات مباشرة متوازنة ({wins} فوز {draws} تعادل {losses} خسارة)",
+        "home": "أفضلية الأرض والجمهور لـ {home}",
+        "scorer": "{player} ({goals} هدف) يقود هجوم {team}",
+    },
+}
+
+
+def _tid(team) -> int:
+    return int(team) if isinstance(team, Integral) else team_id(team)
+
+
+def _load_json(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_key_players() -> Dict[int, Dict]:
+    """
+    Player to watch per club: the leading scorer from top_scorers.json, or
+    the highest-rated player in players.json for clubs without one.
+    """
+    key_players: Dict[int, Dict] = {}
+    for player in _load_json(TOP_SCORERS_FILE):
+        tid = team_id(player["team"]["english"])
+        if tid not in key_players or player.get("goals", 0) > key_players[tid]["goals"]:
+            key_players[tid] = {
+                "english": player["player_name"]["english"],
+                "arabic_saudi": player["player_name"].get("arabic_saudi", player["player_name"]["english"]),
+                "goals": int(player.get("goals", 0)),
+            }
+    best_rated: Dict[int, Dict] = {}
+    for player in _load_json(PLAYERS_FILE):
+        tid = team_id(player.get("Club", ""))
+        if tid not in best_rated or player.get("Overall", 0) > best_rated[tid]["overall"]:
+            best_rated[tid] = {"english": player["Player"], "arabic_saudi": player["Player"],
+                               "goals": 0, "overall": player.get("Overall", 0)}
+    for tid, player in best_rated.items():
+        key_players.setdefault(tid, player)
+    return key_players
+
+
+def _unbeaten_run(form: str) -> int:
+    run = 0
+    for result in reversed(form):
+        if result == "L":
+            break
+        run += 1
+    return run
+
+
+class PredictionExplainer:
+    """
+    Explains outcome-classifier predictions. For the predicted outcome k,
+    each feature's contribution is its standardised value times its weight
+    for k relative to the mean weight across outcomes (the change it makes to
+    k's log-odds against an average outcome). Contributions for a whole
+    batch come from one elementwise product; factors are ranked by size.
+    """
+
+    def __init__(self, predictor: Optional[LocalPredictor] = None, key_players: Optional[Dict[int, Dict]] = None):
+        self.predictor = predictor or load_local_predictor()
+        self.key_players = key_players if key_players is not None else load_key_players()
+
+    def contributions(self, fixtures: Sequence[Tuple], outcomes: Optional[Sequence[str]] = None
+                      ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (probabilities (n, 3), explained outcome (n,), factor contributions
+        (n, len(FACTORS))). The explained outcome is the model's most likely
+        one unless ``outcomes`` names another, e.g. a result predicted elsewhere.
+        """
+        return self._contributions(self.predictor.features(fixtures), fixtures, outcomes)
+
+    def _contributions(self, features: np.ndarray, fixtures: Sequence[Tuple],
+                       outcomes: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        model = self.predictor.model
+        design = model._design(features)
+        probabilities = model.predict_proba(features)
+        predicted = probabilities.argmax(axis=1)
+        if outcomes is not None:
+            predicted = np.array([OUTCOMES.index(o) for o in outcomes], dtype=np.int64)
+
+        relative = model.weights - model.weights.mean(axis=1, keepdims=True)
+        per_feature = design * relative[:, predicted].T  # (n, 1 + features)
+
+        column = {name: i + 1 for i, name in enumerate(FEATURES)}
+        goals = np.array([
+            [self.key_players.get(_tid(f[0]), {}).get("goals", 0), self.key_players.get(_tid(f[1]), {}).get("goals", 0)]
+            for f in fixtures
+        ], dtype=np.float64).reshape(-1, 2)
+        scorer_edge = np.select([predicted == 0, predicted == 2],
+                                [goals[:, 0] - goals[:, 1], goals[:, 1] - goals[:, 0]],
+                                -np.abs(goals[:, 0] - goals[:, 1]))
+
+        contributions = np.column_stack([
+            per_feature[:, column["elo_diff"]],
+            per_feature[:, column["form_ppg_diff"]] + per_feature[:, column["form_gd_diff"]],
+            per_feature[:, column["h2h_balance"]],
+            np.where(predicted == 0, per_feature[:, 0], 0.0),
+            SCORER_WEIGHT * scorer_edge,
+        ])
+        return probabilities, predicted, contributions
+
+    def _render(self, factor: str, home, away, predicted: int, features: np.ndarray, language: str,
+                date=None) -> Optional[str]:
+        """
+        One factor as text, or None when the facts behind it do not back the
+        outcome being explained. The team a rating or form factor names is
+        taken from the sign of the underlying feature, never assumed from
+        the predicted side. Facts are read as of ``date``, like the features.
+        """
+        t = TEMPLATES.get(language, TEMPLATES["english"])
+        state = self.predictor.state
+        home_name, away_name = team_display_name(_tid(home), language), team_display_name(_tid(away), language)
+        # +1 when the factor has to favour home (home win), -1 for away, 0 for a draw
+        side = {0: 1, 1: 0, 2: -1}[predicted]
+        winner = home_name if side > 0 else away_name
+
+        if factor == "rating":
+            home_elo, away_elo = state.elo.rating(home, date), state.elo.rating(away, date)
+            if abs(home_elo - away_elo) < 25:
+                return t["rating_even"].format(home_elo=home_elo, away_elo=away_elo) if side == 0 else None
+            if side != np.sign(home_elo - away_elo):
+                return None
+            fav, oth = (home_elo, away_elo) if side > 0 else (away_elo, home_elo)
+            return t["rating"].format(favoured=winner, favoured_elo=fav, other_elo=oth)
+        if factor == "form":
+            home_form, away_form = state.form.form_string(home, before=date), state.form.form_string(away, before=date)
+            if not home_form or not away_form:
+                return None  # no comparison against a side without recent results
+            ppg_diff, gd_diff = features[FEATURES.index("form_ppg_diff")], features[FEATURES.index("form_gd_diff")]
+            if side == 0:
+                return t["form_even"].format(home_form=home_form, away_form=away_form) if abs(ppg_diff) < 0.5 else None
+            if side != np.sign(ppg_diff if ppg_diff else gd_diff):
+                return None
+            favoured_form, other_form = (home_form, away_form) if side > 0 else (away_form, home_form)
+            run = _unbeaten_run(favoured_form)
+            if run >= 3:
+                return t["streak"].format(team=winner, count=run)
+            return t["form"].format(favoured=winner, favoured_form=favoured_form, other_form=other_form)
+        if factor == "h2h":
+            s = state.h2h.summary(home, away, before=date) if side >= 0 else state.h2h.summary(away, home, before=date)
+            if not s["played"]:
+                return None  # an empty record explains nothing
+            if s["wins"] == s["losses"]:
+                return t["h2h_even"].format(wins=s["wins"], draws=s["draws"], losses=s["losses"])
+            if side == 0 or s["wins"] < s["losses"]:
+                return None
+            return t["h2h"].format(favoured=winner, wins=s["wins"], draws=s["draws"], losses=s["losses"])
+        if factor == "home" and predicted == 0:
+            return t["home"].format(home=home_name)
+        if factor == "scorer":
+            player, team = self.player_to_watch(home, away, predicted, language)
+            if player is None or not self.key_players.get(_tid(team), {}).get("goals"):
+                return None
+            return t["scorer"].format(player=player, goals=self.key_players[_tid(team)]["goals"],
+                                      team=team_display_name(_tid(team), language))
+        return None
+
+    def player_to_watch(self, home, away, predicted: int, language: str = "english"):
+        """
+        (player name, team) from the predicted winner's club, or the more
+        prolific side for a draw; (None, None) when the winner has no key player.
+        """
+        h, a = self.key_players.get(_tid(home)), self.key_players.get(_tid(away))
+        if predicted == 0:
+            choice, team = h, home
+        elif predicted == 2:
+            choice, team = a, away
+        elif h and (not a or h.get("goals", 0) >= a.get("goals", 0)):
+            choice, team = h, home
+        else:
+            choice, team = a, away
+        if choice is None:
+            return None, None
+        return choice.get(language, choice["english"]), team
+
+    def explain_many(self, fixtures: Sequence[Tuple], language: str = "english",
+                     max_factors: int = MAX_FACTORS, outcomes: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Explanations for (home, away[, date]) fixtures in one batch: the
+        predicted outcome, its probabilities, up to ``max_factors`` ranked
+        factor strings (only factors that push towards that outcome) and the
+        player to watch.
+        """
+        fixtures = list(fixtures)
+        if not fixtures:
+            return []
+        features = self.predictor.features(fixtures)
+        probabilities, predicted, contributions = self._contributions(features, fixtures, outcomes)
+        # Largest supporting contributions first
+        order = np.argsort(-contributions, axis=1)
+
+        explanations = []
+        for i, fixture in enumerate(fixtures):
+            home, away = fixture[0], fixture[1]
+            date = fixture[2] if len(fixture) > 2 else None
+            k = int(predicted[i])
+            factors = []
+            for j in order[i]:
+                if contributions[i, j] <= 0:
+                    break  # the rest argue against the outcome
+                text = self._render(FACTORS[j], home, away, k, features[i], language, date)
+                if text:
+                    factors.append(text)
+                if len(factors) == max_factors:
+                    break
+            player, _ = self.player_to_watch(home, away, k, language)
+            explanations.append({
+                "predicted_result": OUTCOMES[k],
+                "probabilities": probabilities[i].tolist(),
+                "contributions": dict(zip(FACTORS, contributions[i].round(4).tolist())),
+                "key_factors": factors,
+                "player_to_watch": player or "Key Player",
+            })
+        return explanations
+
+    def explain(self, home, away, language: str = "english", outcome: Optional[str] = None) -> Dict:
+        return self.explain_many([(home, away)], language, outcomes=None if outcome is None else [outcome])[0]
+
+
+_default_explainer: Optional[PredictionExplainer] = None
+
+
+def load_prediction_explainer() -> PredictionExplainer:
+    global _default_explainer
+    if _default_explainer is None:
+        _default_explainer = PredictionExplainer()
+    return _default_explainer
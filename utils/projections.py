@@ -0,0 +1,200 @@
+import json
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.dixon_coles import DixonColesModel, load_dixon_coles
+from utils.fantasy_scoring import RULES, STATS, PlayerCatalog
+from utils.results_history import results_files_version
+from utils.team_names import team_display_name, team_id
+
+FIXTURES_FILE = "data/fixtures.json"
+PLAYERS_FILE = "data/players.json"
+TOP_SCORERS_FILE = "data/top_scorers.json"
+
+GAMEWEEKS = 5
+# Per-90 goal and assist rates for an Overall-70 player, by line (GK, DEF, MID, FWD)
+PRIOR_GOALS = np.array([0.0, 0.05, 0.15, 0.35])
+PRIOR_ASSISTS = np.array([0.01, 0.06, 0.15, 0.15])
+YELLOWS_PER_90 = np.array([0.05, 0.2, 0.18, 0.12])
+RATING_SLOPE = 0.04  # log-rate change per Overall point
+# Matches of prior weight when shrinking a top scorer's observed rates
+PRIOR_MATCHES = 6.0
+# Expected goal difference cut-offs for difficulty 1 (easiest) to 5
+DIFFICULTY_CUTS = np.array([0.8, 0.3, -0.3, -0.8])
+
+
+def assign_gameweeks(fixtures: Sequence[Dict]) -> np.ndarray:
+    """
+    Gameweek per fixture when the feed has none: in date order, a fixture
+    goes in the round after the later of its two clubs' previous games, so
+    postponed matches land where they are actually played.
+    """
+    order = sorted(range(len(fixtures)), key=lambda i: fixtures[i]["date"])
+    last: Dict[int, int] = {}
+    gameweeks = np.zeros(len(fixtures), dtype=np.int64)
+    for i in order:
+        home, away = team_id(fixtures[i]["home_team"]), team_id(fixtures[i]["away_team"])
+        gameweeks[i] = max(last.get(home, 0), last.get(away, 0)) + 1
+        last[home] = last[away] = gameweeks[i]
+    return gameweeks
+
+
+def _load_json(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ProjectionEngine:
+    """
+    Dense forward-looking arrays for the fantasy tools, over the next
+    ``gameweeks`` rounds:
+
+    - ``difficulty`` (teams, gameweeks): 1 (easiest) to 5 from the expected
+      goal difference in each fixture, NaN for a blank gameweek;
+    - ``xg_for``, ``xg_against``, ``clean_sheet`` (teams, gameweeks):
+      Dixon-Coles expected goals and clean-sheet probability, summed over
+      double gameweeks;
+    - ``projected`` (players, gameweeks): expected fantasy points under
+      utils.fantasy_scoring.RULES, row-aligned with the players frame.
+
+    Team strength comes from the fitted Dixon-Coles model. Player output
+    rates are a prior by line and Overall, shrunk towards the observed
+    goals, assists and minutes of players in top_scorers.json.
+    """
+
+    def __init__(self, fixtures: Sequence[Dict], players: pd.DataFrame, top_scorers: Sequence[Dict],
+                 model: DixonColesModel, gameweeks: int = GAMEWEEKS, start: Optional[int] = None,
+                 as_of=None):
+        rounds = assign_gameweeks(fixtures)
+        if start is None:
+            start = self._first_open_gameweek(fixtures, rounds, as_of)
+        self.gameweeks = np.arange(start, start + gameweeks)
+
+        window = np.flatnonzero((rounds >= start) & (rounds < start + gameweeks))
+        home = np.array([team_id(fixtures[i]["home_team"]) for i in window], dtype=np.int64)
+        away = np.array([team_id(fixtures[i]["away_team"]) for i in window], dtype=np.int64)
+        column = rounds[window] - start
+
+        catalog = PlayerCatalog(players)
+        self.teams = np.unique(np.concatenate([home, away, catalog.clubs]))
+        self.team_index = {int(t): i for i, t in enumerate(self.teams)}
+        shape = (len(self.teams), gameweeks)
+
+        lam, mu = self._expected_goals(model, home, away)
+        h, a = np.searchsorted(self.teams, home), np.searchsorted(self.teams, away)
+        self.fixture_count = np.zeros(shape)
+        self.xg_for = np.zeros(shape)
+        self.xg_against = np.zeros(shape)
+        self.clean_sheet = np.zeros(shape)
+        goal_difference = np.zeros(shape)
+        for rows, scored, conceded in ((h, lam, mu), (a, mu, lam)):
+            np.add.at(self.fixture_count, (rows, column), 1)
+            np.add.at(self.xg_for, (rows, column), scored)
+            np.add.at(self.xg_against, (rows, column), conceded)
+            np.add.at(self.clean_sheet, (rows, column), np.exp(-conceded))
+            np.add.at(goal_difference, (rows, column), scored - conceded)
+        played = self.fixture_count > 0
+        mean_difference = np.divide(goal_difference, self.fixture_count, out=np.zeros(shape), where=played)
+        self.difficulty = np.where(
+            played, 1 + (mean_difference[..., None] < DIFFICULTY_CUTS).sum(axis=-1), np.nan)
+
+        self.players = players.reset_index(drop=True)
+        self.player_team = np.searchsorted(self.teams, catalog.clubs)
+        self.projected = self._project(catalog, top_scorers, float(np.mean(np.concatenate([lam, mu]))) if len(lam) else 1.35)
+
+    @staticmethod
+    def _first_open_gameweek(fixtures: Sequence[Dict], rounds: np.ndarray, as_of=None) -> int:
+        """First gameweek with a fixture after ``as_of`` (default now); a finished schedule replays from 1."""
+        as_of = pd.Timestamp.now(tz="UTC") if as_of is None else pd.to_datetime(as_of, utc=True)
+        dates = pd.to_datetime([f["date"] for f in fixtures], utc=True)
+        upcoming = rounds[np.asarray(dates > as_of)]
+        return int(upcoming.min()) if len(upcoming) else 1
+
+    @staticmethod
+    def _expected_goals(model: DixonColesModel, home: np.ndarray, away: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorised DixonColesModel.expected_goals; clubs the model has not seen are league average."""
+        attack = np.append(model.attack, 0.0)
+        defence = np.append(model.defence, 0.0)
+        unseen = len(attack) - 1
+        h = np.array([model.columns.get(int(t), unseen) for t in home], dtype=np.int64)
+        a = np.array([model.columns.get(int(t), unseen) for t in away], dtype=np.int64)
+        return (np.exp(attack[h] + defence[a] + model.home_advantage),
+                np.exp(attack[a] + defence[h]))
+
+    def _project(self, catalog: PlayerCatalog, top_scorers: Sequence[Dict], league_xg: float) -> np.ndarray:
+        lines = catalog.lines.astype(np.int64)
+        overall = (pd.to_numeric(self.players["overall"], errors="coerce").fillna(70).to_numpy(dtype=np.float64)
+                   if "overall" in self.players else np.full(len(self.players), 70.0))
+        scale = np.exp(RATING_SLOPE * (overall - 70))
+        goals90, assists90 = PRIOR_GOALS[lines] * scale, PRIOR_ASSISTS[lines] * scale
+        # Expected share of 90 minutes per fixture: better-rated players start more often
+        minutes = np.clip(0.35 + 0.05 * (overall - 62), 0.2, 0.95)
+
+        for scorer in top_scorers:
+            pid = catalog.resolve(scorer["player_name"]["english"], team_id(scorer["team"]["english"]))
+            played90 = scorer.get("minutes_played", 0) / 90.0
+            if pid is None or played90 <= 0:
+                continue
+            goals90[pid] = (scorer.get("goals", 0) + goals90[pid] * PRIOR_MATCHES) / (played90 + PRIOR_MATCHES)
+            assists90[pid] = (scorer.get("assists", 0) + assists90[pid] * PRIOR_MATCHES) / (played90 + PRIOR_MATCHES)
+            appearances = max(scorer.get("appearances", 0), 1)
+            minutes[pid] = min(played90 / appearances, 1.0)
+
+        team = self.player_team
+        attack_factor = self.xg_for[team] / league_xg  # (players, gameweeks), summed over doubles
+        rule = RULES[lines]
+        points = minutes[:, None] * (
+            attack_factor * (goals90 * rule[:, STATS.index("goals")] + assists90 * rule[:, STATS.index("assists")])[:, None]
+            + self.clean_sheet[team] * rule[:, STATS.index("clean_sheets")][:, None]
+            + self.fixture_count[team] * (YELLOWS_PER_90[lines] * rule[:, STATS.index("yellow_cards")])[:, None]
+        )
+        return points.astype(np.float32)
+
+    def projected_total(self, gameweeks: Optional[int] = None) -> np.ndarray:
+        """Projected points per player over the first ``gameweeks`` rounds (all by default)."""
+        return self.projected[:, :gameweeks].sum(axis=1)
+
+    def projected_for(self, players: pd.DataFrame, gameweeks: Optional[int] = None) -> np.ndarray:
+        """
+        projected_total aligned to another players frame by name and club
+        (names alone repeat across clubs); 0 for unknown players.
+        """
+        totals = dict(zip(zip(self.players["name"], self.players["team"]), self.projected_total(gameweeks)))
+        return np.array([totals.get(key, 0.0) for key in zip(players["name"], players["team"])], dtype=np.float64)
+
+    def difficulty_frame(self, teams: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Team x gameweek difficulty as a labelled frame, for display."""
+        rows = np.arange(len(self.teams)) if teams is None else np.array(
+            [self.team_index[team_id(t)] for t in teams if team_id(t) in self.team_index], dtype=np.int64)
+        return pd.DataFrame(self.difficulty[rows], columns=[f"GW{g}" for g in self.gameweeks],
+                            index=[team_display_name(int(t)) for t in self.teams[rows]])
+
+
+_cache: Dict[tuple, ProjectionEngine] = {}
+
+
+def load_projection_engine(gameweeks: int = GAMEWEEKS) -> ProjectionEngine:
+    """
+    Process-wide engine per data version: the modification times of the
+    fixtures, players and top-scorer files and of the result files.
+    """
+    versions = tuple(os.path.getmtime(p) if os.path.exists(p) else 0.0
+                     for p in (FIXTURES_FILE, PLAYERS_FILE, TOP_SCORERS_FILE))
+    key = (gameweeks, versions, results_files_version())
+    if key not in _cache:
+        raw = _load_json(PLAYERS_FILE)
+        players = pd.DataFrame({
+            "name": [p.get("Player", "Unknown") for p in raw],
+            "position": [p.get("Position", "Unknown") for p in raw],
+            "team": [p.get("Club", "Unknown") for p in raw],
+            "overall": [p.get("Overall", 60) for p in raw],
+        })
+        _cache.clear()
+        _cache[key] = ProjectionEngine(_load_json(FIXTURES_FILE), players, _load_json(TOP_SCORERS_FILE),
+                                       load_dixon_coles(), gameweeks)
+    return _cache[key]
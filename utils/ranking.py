@@ -0,0 +1,195 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# Sublists are split once they grow past twice this size. Inserts shift at most
+# a couple of thousand references, which is far cheaper than a full re-sort.
+_LOAD = 1000
+
+
+def leaderboard_points(stats: Dict) -> int:
+    """3 points for a win, 1 for a draw."""
+    return stats.get("wins", 0) * 3 + stats.get("draws", 0)
+
+
+def leaderboard_goal_diff(stats: Dict) -> int:
+    return stats.get("goals_for", 0) - stats.get("goals_against", 0)
+
+
+def ranking_key(username: str, stats: Dict) -> Tuple[int, int, int, str]:
+    """
+    Sort key for a leaderboard entry: points, goal difference and wins
+    (all descending), with the username as a stable tie-breaker.
+    """
+    return (
+        -leaderboard_points(stats),
+        -leaderboard_goal_diff(stats),
+        -stats.get("wins", 0),
+        username,
+    )
+
+
+class RankedLeaderboard:
+    """
+    Keeps leaderboard users ordered by (points, goal difference, wins).
+
+    Entries live in a list of short sorted sublists with a Fenwick tree over
+    the sublist lengths, so an update is a couple of bisects plus an
+    O(log n) count adjustment, and top-K, page and rank-of-user queries never
+    sort the whole table. A lock makes updates and queries safe to share
+    across sessions.
+    """
+
+    def __init__(self, leaderboard: Optional[Dict[str, Dict]] = None):
+        self._lists: List[List[Tuple]] = []
+        self._maxes: List[Tuple] = []
+        self._tree: List[int] = []
+        self._keys: Dict[str, Tuple] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if leaderboard:
+            self.load(leaderboard)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._keys
+
+    def load(self, leaderboard: Dict[str, Dict]) -> None:
+        """Bulk-load a whole leaderboard dict with a single sort."""
+        stats = dict(leaderboard)
+        keys = {name: ranking_key(name, entry) for name, entry in stats.items()}
+        ordered = sorted(keys.values())
+        with self._lock:
+            self._stats, self._keys = stats, keys
+            self._lists = [ordered[i:i + _LOAD] for i in range(0, len(ordered), _LOAD)]
+            self._maxes = [sub[-1] for sub in self._lists]
+            self._rebuild_tree()
+
+    def update(self, username: str, stats: Dict) -> None:
+        """Insert or move a user after their stats changed."""
+        key = ranking_key(username, stats)
+        with self._lock:
+            if username in self._keys:
+                self._discard(self._keys[username])
+            self._keys[username] = key
+            self._stats[username] = stats
+            self._insert(key)
+
+    def remove(self, username: str) -> None:
+        with self._lock:
+            if username in self._keys:
+                self._discard(self._keys.pop(username))
+                del self._stats[username]
+
+    def stats(self, username: str) -> Optional[Dict]:
+        return self._stats.get(username)
+
+    def rank(self, username: str) -> Optional[int]:
+        """1-based rank of a user, or None if they have not played."""
+        with self._lock:
+            key = self._keys.get(username)
+            if key is None:
+                return None
+            pos = bisect_left(self._maxes, key)
+            return self._prefix(pos) + bisect_left(self._lists[pos], key) + 1
+
+    def top(self, k: int = 10) -> List[Tuple[int, str, Dict]]:
+        """The first ``k`` entries as (rank, username, stats) tuples."""
+        return self.slice(0, k)
+
+    def page(self, page: int, page_size: int = 25) -> List[Tuple[int, str, Dict]]:
+        """Entries on a 1-based page of ``page_size`` rows."""
+        start = max(page - 1, 0) * page_size
+        return self.slice(start, start + page_size)
+
+    def page_count(self, page_size: int = 25) -> int:
+        return max((len(self) + page_size - 1) // page_size, 1)
+
+    def slice(self, start: int, stop: int) -> List[Tuple[int, str, Dict]]:
+        """Entries with 0-based ranks in ``[start, stop)``."""
+        with self._lock:
+            stop = min(stop, len(self))
+            if start >= stop:
+                return []
+            pos, offset = self._locate(start)
+            rows = []
+            rank = start + 1
+            while rank <= stop and pos < len(self._lists):
+                sub = self._lists[pos]
+                for key in sub[offset:offset + (stop - rank + 1)]:
+                    rows.append((rank, key[-1], self._stats[key[-1]]))
+                    rank += 1
+                pos, offset = pos + 1, 0
+            return rows
+
+    # -- internals ---------------------------------------------------------
+
+    def _insert(self, key: Tuple) -> None:
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            insort(self._lists[pos], key)
+        if len(self._lists[pos]) > 2 * _LOAD:
+            sub = self._lists[pos]
+            self._lists[pos:pos + 1] = [sub[:_LOAD], sub[_LOAD:]]
+            self._maxes[pos:pos + 1] = [sub[_LOAD - 1], sub[-1]]
+            self._rebuild_tree()
+        else:
+            self._add(pos, 1)
+
+    def _discard(self, key: Tuple) -> None:
+        pos = bisect_left(self._maxes, key)
+        sub = self._lists[pos]
+        del sub[bisect_left(sub, key)]
+        if not sub:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._rebuild_tree()
+            return
+        self._maxes[pos] = sub[-1]
+        self._add(pos, -1)
+
+    def _rebuild_tree(self) -> None:
+        tree = [0] * (len(self._lists) + 1)
+        for i, sub in enumerate(self._lists, start=1):
+            tree[i] += len(sub)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add(self, pos: int, delta: int) -> None:
+        i = pos + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, pos: int) -> int:
+        """Number of entries in sublists before ``pos``."""
+        total = 0
+        while pos > 0:
+            total += self._tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Map a 0-based rank to (sublist, offset) by descending the tree."""
+        pos = 0
+        step = 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= index:
+                pos = nxt
+                index -= self._tree[nxt]
+            step >>= 1
+        return pos, index
@@ -0,0 +1,136 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from utils.team_names import team_id
+
+MOCK_RESULTS_FILE = "data/spl_mock_data.csv"
+H2H_FILE = "data/all_h2h.json"
+
+COLUMNS = ["date", "season", "competition", "home_team", "away_team", "home_id", "away_id",
+           "home_goals", "away_goals", "venue", "source"]
+
+
+def parse_score(score: str):
+    """Parse an API score string such as "2 - 2" into (home_goals, away_goals)."""
+    try:
+        home, away = str(score).split("-")
+        return int(home), int(away)
+    except (TypeError, ValueError):
+        return None
+
+
+def _season_of(dates: pd.Series) -> pd.Series:
+    """SPL seasons run August to May and are named after their starting year."""
+    return (dates.dt.year - (dates.dt.month < 7).astype(int)).astype(int)
+
+
+def _load_mock_results(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    dates = pd.to_datetime(df["Date"] + " " + df["Time"].fillna("00:00"), format="%d.%m.%Y %H:%M", utc=True)
+    return pd.DataFrame({
+        "date": dates,
+        "season": _season_of(dates),
+        "competition": "Pro League",
+        "home_team": df["Team1"],
+        "away_team": df["Team2"],
+        "home_goals": df["Score1"].astype(int),
+        "away_goals": df["Score2"].astype(int),
+        "venue": None,
+        "source": "spl_mock_data",
+    })
+
+
+def _load_h2h_results(path: str) -> pd.DataFrame:
+    with open(path, "r", encoding="utf-8") as f:
+        meetings = json.load(f)
+    rows = []
+    for m in meetings:
+        score = parse_score(m.get("score"))
+        if score is None:
+            continue
+        rows.append({
+            "date": m["date"],
+            "season": m.get("season"),
+            "competition": m.get("league", "Pro League"),
+            "home_team": m["home_team"],
+            "away_team": m["away_team"],
+            "home_goals": score[0],
+            "away_goals": score[1],
+            "venue": m.get("venue"),
+            "source": "all_h2h",
+        })
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["date"] = pd.to_datetime(df["date"], utc=True)
+    return df
+
+
+def results_from_records(records: Iterable[Dict], source: str = "fixtures") -> pd.DataFrame:
+    """
+    Completed fixtures in the Fixtures-tab shape ({"date", "home", "away",
+    "home_score", "away_score", ...}) as a results frame.
+    """
+    rows = [
+        {
+            "date": r["date"],
+            "season": None,
+            "competition": r.get("competition", "Pro League"),
+            "home_team": r.get("home", r.get("home_team")),
+            "away_team": r.get("away", r.get("away_team")),
+            "home_goals": int(r.get("home_score", r.get("home_goals"))),
+            "away_goals": int(r.get("away_score", r.get("away_goals"))),
+            "venue": r.get("venue"),
+            "source": source,
+        }
+        for r in records
+        if r.get("home_score", r.get("home_goals")) is not None
+    ]
+    df = pd.DataFrame(rows, columns=[c for c in COLUMNS if c not in ("home_id", "away_id")])
+    if not df.empty:
+        df["date"] = pd.to_datetime(df["date"], utc=True)
+        df["season"] = _season_of(df["date"])
+    return df
+
+
+def load_results(extra: Optional[List[pd.DataFrame]] = None,
+                 mock_path: str = MOCK_RESULTS_FILE, h2h_path: str = H2H_FILE) -> pd.DataFrame:
+    """
+    Every known historical result in one frame, sorted by date, with
+    canonical team ids and duplicates (the same match listed by two sources)
+    removed.
+    """
+    frames = []
+    if os.path.exists(mock_path):
+        frames.append(_load_mock_results(mock_path))
+    if os.path.exists(h2h_path):
+        frames.append(_load_h2h_results(h2h_path))
+    frames += [f for f in (extra or []) if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    ids = {name: team_id(name) for name in pd.unique(df[["home_team", "away_team"]].values.ravel())}
+    df["home_id"] = df["home_team"].map(ids).astype("int64")
+    df["away_id"] = df["away_team"].map(ids).astype("int64")
+    df["season"] = df["season"].fillna(_season_of(df["date"])).astype(int)
+
+    df["_day"] = df["date"].dt.floor("D")
+    df = df.drop_duplicates(subset=["_day", "home_id", "away_id"], keep="first").drop(columns="_day")
+    return df.sort_values("date", kind="stable").reset_index(drop=True)[COLUMNS]
+
+
+def results_files_version(mock_path: str = MOCK_RESULTS_FILE, h2h_path: str = H2H_FILE) -> tuple:
+    """
+    Modification times of the result files load_results() reads (0 when
+    missing): a stat per file, for caches that must not re-parse them.
+    """
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else 0.0 for p in (mock_path, h2h_path))
+
+
+def results_version(results: pd.DataFrame) -> str:
+    """Cheap content hash used to key caches built from a results frame."""
+    hashed = pd.util.hash_pandas_object(results[["date", "home_id", "away_id", "home_goals", "away_goals"]], index=False)
+    return f"{len(results)}-{int(hashed.sum()) & 0xFFFFFFFFFFFF:012x}"
@@ -0,0 +1,129 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.event_stream import iter_json_array
+from utils.load_event_probabilities import parse_minute
+from utils.scenario_loader import ScenarioPackWriter, compress_scenario
+
+# Below this many fixtures the process pool costs more than it saves
+PARALLEL_THRESHOLD = 200
+
+EVENT_TYPES = {
+    "goal": "goal",
+    "card": "card",
+    "subst": "substitution",
+    "var": "var",
+}
+
+
+def _describe(event_type: str, detail: str, player: str, team: str, score: Tuple[int, int]) -> str:
+    if event_type == "goal":
+        kind = "" if detail in ("", "Normal Goal") else f" ({detail})"
+        return f"GOAL! {player} scores for {team}{kind}. {score[0]}-{score[1]}"
+    if event_type == "card":
+        return f"{detail or 'Card'} for {player} ({team})"
+    if event_type == "substitution":
+        return f"Substitution for {team}: {player}"
+    if event_type == "var":
+        return f"VAR check: {detail}"
+    return detail or event_type
+
+
+def fixture_to_scenario(fixture: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert one fixture from an API-style events file into a ScenarioManager
+    scenario: integer minutes, normalised event types and a running score in
+    each goal description.
+    """
+    home = fixture.get("home_team", "Home")
+    away = fixture.get("away_team", "Away")
+
+    raw_events = []
+    for order, event in enumerate(fixture.get("events", [])):
+        minute, added = parse_minute(event.get("time", event.get("minute", 0)))
+        raw_events.append((minute, added, order, event))
+    raw_events.sort(key=lambda item: item[:3])
+
+    score = [0, 0]
+    timeline = []
+    for minute, added, _, event in raw_events:
+        event_type = EVENT_TYPES.get(str(event.get("type", "")).lower(), "unknown")
+        detail = event.get("detail") or ""
+        if event_type == "goal" and detail != "Missed Penalty":
+            score[0 if event.get("team") == home else 1] += 1
+        player = event.get("player") or "Unnamed Player"
+        team = event.get("team") or "Unknown Team"
+        description = _describe(event_type, detail, player, team, tuple(score))
+        if event_type == "card":
+            event_type = "red_card" if "Red" in detail else "yellow_card"
+        timeline.append({
+            "minute": minute,
+            "added_time": added,
+            "type": event_type,
+            "player": player,
+            "team": team,
+            "description": description,
+        })
+
+    return {
+        "fixture_id": fixture.get("fixture_id"),
+        "date": fixture.get("date"),
+        "venue": fixture.get("venue"),
+        "team_1": home,
+        "team_2": away,
+        "starting_score": "0-0",
+        "starting_momentum": home,
+        "real_result": f"{score[0]}-{score[1]}",
+        "timeline": timeline,
+    }
+
+
+def _compile_one(fixture: Dict[str, Any]) -> Tuple[str, bytes, Dict[str, Any]]:
+    """Worker step: normalise and compress one fixture."""
+    scenario = fixture_to_scenario(fixture)
+    blob, meta = compress_scenario(scenario)
+    return str(scenario["fixture_id"]), blob, meta
+
+
+def compile_fixtures(fixtures: Iterable[Dict[str, Any]], pack_path: str,
+                     workers: Optional[int] = None) -> int:
+    """
+    Compile fixtures into one scenario pack keyed by fixture id. Conversion
+    and compression run in a process pool; the parent only appends blobs.
+    """
+    fixtures = list(fixtures)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with ScenarioPackWriter(pack_path) as writer:
+        if workers <= 1 or len(fixtures) < PARALLEL_THRESHOLD:
+            for scenario_id, blob, meta in map(_compile_one, fixtures):
+                writer.add_compressed(scenario_id, blob, meta)
+        else:
+            chunksize = max(len(fixtures) // (workers * 4), 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for scenario_id, blob, meta in pool.map(_compile_one, fixtures, chunksize=chunksize):
+                    writer.add_compressed(scenario_id, blob, meta)
+    return len(fixtures)
+
+
+def compile_events_file(events_path: str = "data/events_sample.json",
+                        pack_path: str = "data/scenarios.pack",
+                        workers: Optional[int] = None) -> int:
+    """Compile every fixture of an events file into a scenario pack."""
+    return compile_fixtures(iter_json_array(events_path), pack_path, workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile fixture events into a ScenarioManager pack")
+    parser.add_argument("events", nargs="?", default="data/events_sample.json")
+    parser.add_argument("pack", nargs="?", default="data/scenarios.pack")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = compile_events_file(args.events, args.pack, args.workers)
+    print(f"Compiled {count} fixtures into {args.pack} in {time.perf_counter() - start:.2f}s")
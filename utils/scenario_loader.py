@@ -1,13 +1,71 @@
 import json
-from typing import Dict, List, Any, Optional
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+PACK_MAGIC = b"SPLSCNP1"
+_HEADER = struct.Struct("<8sQ")  # magic, offset of the index
+
+
+class ScenarioEvent:
+    """A timeline event normalised once at load time."""
+
+    __slots__ = ("minute", "type", "player", "team", "description")
+
+    def __init__(self, minute: int, type: str, player: str, team: str, description: str):
+        self.minute = minute
+        self.type = type
+        self.player = player
+        self.team = team
+        self.description = description
+
+    @classmethod
+    def from_raw(cls, event: Dict[str, Any]) -> "ScenarioEvent":
+        """
+        Ensure every event has the fields needed for commentary generation.
+        """
+        return cls(
+            event.get("minute", 0),
+            event.get("type", "unknown"),  # e.g., goal, card, foul
+            event.get("player", "Unnamed Player"),
+            event.get("team", "Unknown Team"),
+            event.get("description", ""),  # Optional free text
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "minute": self.minute,
+            "type": self.type,
+            "player": self.player,
+            "team": self.team,
+            "description": self.description,
+        }
 
 
 class ScenarioManager:
-    def __init__(self, filepath: str):
-        with open(filepath, "r", encoding="utf-8") as f:
-            self.scenario: Dict[str, Any] = json.load(f)
+    def __init__(self, filepath: Optional[str] = None, scenario: Optional[Dict[str, Any]] = None):
+        if scenario is None:
+            with open(filepath, "r", encoding="utf-8") as f:
+                scenario = json.load(f)
+        self.scenario: Dict[str, Any] = scenario
+        # Stable sort keeps the authored order of events within the same minute
+        self.events: List[ScenarioEvent] = sorted(
+            (ScenarioEvent.from_raw(event) for event in scenario.get("timeline", [])),
+            key=lambda event: event.minute,
+        )
+        self._minutes = [event.minute for event in self.events]
         self.current_index = 0
 
+    @classmethod
+    def from_dict(cls, scenario: Dict[str, Any]) -> "ScenarioManager":
+        return cls(scenario=scenario)
+
+    @classmethod
+    def from_pack(cls, pack_path: str, scenario_id: str) -> "ScenarioManager":
+        with ScenarioPack(pack_path) as pack:
+            return cls(scenario=pack.load(scenario_id))
+
     def get_match_metadata(self) -> Dict[str, str]:
         return {
             "team_1": self.scenario["team_1"],
@@ -18,33 +76,130 @@ class ScenarioManager:
         }
 
     def get_next_event(self) -> Optional[Dict[str, Any]]:
-        if self.current_index >= len(self.scenario["timeline"]):
+        if self.current_index >= len(self.events):
             return None
-        event = self._normalize_event(self.scenario["timeline"][self.current_index])
+        event = self.events[self.current_index].to_dict()
         self.current_index += 1
         return event
 
+    def events_between(self, from_minute: int, to_minute: int) -> List[ScenarioEvent]:
+        """Events with from_minute <= minute <= to_minute, found by bisection in O(log n + k)."""
+        lo = bisect_left(self._minutes, from_minute)
+        hi = bisect_right(self._minutes, to_minute, lo)
+        return self.events[lo:hi]
+
     def get_events_in_range(self, from_minute: int, to_minute: int) -> List[Dict[str, Any]]:
-        return [
-            self._normalize_event(event)
-            for event in self.scenario["timeline"]
-            if from_minute <= event["minute"] <= to_minute
-        ]
+        return [event.to_dict() for event in self.events_between(from_minute, to_minute)]
 
     def get_all_events(self) -> List[Dict[str, Any]]:
-        return [self._normalize_event(event) for event in self.scenario["timeline"]]
+        return [event.to_dict() for event in self.events]
 
     def reset(self):
         self.current_index = 0
 
-    def _normalize_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Ensure every event has the fields needed for commentary generation.
-        """
-        return {
-            "minute": event.get("minute", 0),
-            "type": event.get("type", "unknown"),  # e.g., goal, card, foul
-            "player": event.get("player", "Unnamed Player"),
-            "team": event.get("team", "Unknown Team"),
-            "description": event.get("description", ""),  # Optional free text
-        }
+
+class ScenarioPackWriter:
+    """
+    Writes many scenarios into one pack file: a fixed header, one
+    zlib-compressed JSON blob per scenario, and a compressed index of
+    {scenario_id: [offset, length, metadata]} at the end.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(PACK_MAGIC, 0))
+        self._index: Dict[str, list] = {}
+
+    def add(self, scenario_id: str, scenario: Dict[str, Any]) -> None:
+        blob, meta = compress_scenario(scenario)
+        self.add_compressed(scenario_id, blob, meta)
+
+    def add_compressed(self, scenario_id: str, blob: bytes, meta: Optional[Dict[str, Any]] = None) -> None:
+        self._index[str(scenario_id)] = [self._file.tell(), len(blob), meta or {}]
+        self._file.write(blob)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(zlib.compress(json.dumps(self._index, ensure_ascii=False).encode("utf-8")))
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(PACK_MAGIC, index_offset))
+        self._file.close()
+
+    def __enter__(self) -> "ScenarioPackWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def compress_scenario(scenario: Dict[str, Any], level: int = 6) -> Tuple[bytes, Dict[str, Any]]:
+    """Compressed pack blob plus the small metadata kept in the pack index."""
+    meta = {key: scenario[key] for key in ("team_1", "team_2", "date", "real_result") if key in scenario}
+    blob = zlib.compress(json.dumps(scenario, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), level)
+    return blob, meta
+
+
+def write_scenario_pack(path: str, scenarios: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    """Write (scenario_id, scenario) pairs into a pack file; returns how many were written."""
+    count = 0
+    with ScenarioPackWriter(path) as writer:
+        for scenario_id, scenario in scenarios:
+            writer.add(scenario_id, scenario)
+            count += 1
+    return count
+
+
+class ScenarioPack:
+    """
+    Random-access reader for a scenario pack. Only the index is read on
+    open; each scenario is decompressed the first time it is requested.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        magic, index_offset = _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{path} is not a scenario pack")
+        self._file.seek(index_offset)
+        self.index: Dict[str, list] = json.loads(zlib.decompress(self._file.read()).decode("utf-8"))
+        self._managers: Dict[str, ScenarioManager] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, scenario_id) -> bool:
+        return str(scenario_id) in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def keys(self) -> List[str]:
+        return list(self.index)
+
+    def metadata(self, scenario_id) -> Dict[str, Any]:
+        return self.index[str(scenario_id)][2]
+
+    def load(self, scenario_id) -> Dict[str, Any]:
+        offset, length, _ = self.index[str(scenario_id)]
+        self._file.seek(offset)
+        return json.loads(zlib.decompress(self._file.read(length)).decode("utf-8"))
+
+    def manager(self, scenario_id) -> ScenarioManager:
+        """ScenarioManager for one scenario, built on first use and then reused."""
+        key = str(scenario_id)
+        if key not in self._managers:
+            self._managers[key] = ScenarioManager(scenario=self.load(key))
+        return self._managers[key]
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ScenarioPack":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
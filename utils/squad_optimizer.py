@@ -0,0 +1,270 @@
+import argparse
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+BUDGET = 100_000_000
+SQUAD_QUOTAS = {"Goalkeeper": 2, "Defender": 5, "Midfielder": 5, "Forward": 3}
+MAX_PER_CLUB = 3
+# Prices are rounded UP to this unit for the knapsack, so every squad the
+# optimiser returns fits the real budget; optimality is on that price grid.
+PRICE_UNIT = 50_000
+
+
+class InfeasibleSquadError(ValueError):
+    """No squad satisfies the budget, quotas, club limit, locks and exclusions."""
+
+
+def _prune_dominated(costs: np.ndarray, values: np.ndarray, clubs: np.ndarray, need: int,
+                     full_clubs: int) -> np.ndarray:
+    """
+    Indices of one position's candidates worth keeping. A player is dropped
+    when cheaper-or-equal, better-or-equal players exist at ``need +
+    full_clubs`` or more distinct clubs: in any squad containing him, at most
+    need - 1 of those are already picked and at most ``full_clubs`` other
+    clubs are at their limit, so one of them can always be swapped in without
+    losing value. With thousands of players this leaves a few dozen per
+    position.
+    """
+    if len(costs) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((np.arange(len(costs)), -values, costs))
+    club_codes, club_index = np.unique(clubs, return_inverse=True)
+    club_best = np.full(len(club_codes), -np.inf)
+    threshold = need + full_clubs
+    keep = []
+    for i in order:
+        if np.count_nonzero(club_best >= values[i]) < threshold:
+            keep.append(i)
+        if values[i] > club_best[club_index[i]]:
+            club_best[club_index[i]] = values[i]
+    return np.sort(np.array(keep, dtype=np.int64))
+
+
+def _position_table(costs: np.ndarray, values: np.ndarray, need: int, budget: int):
+    """
+    Cardinality knapsack for one position: best[k, b] is the best value of
+    exactly k players costing at most b units; ``take`` records decisions for
+    reconstruction.
+    """
+    best = np.full((need + 1, budget + 1), -np.inf)
+    best[0] = 0.0
+    take = np.zeros((len(costs), need + 1, budget + 1), dtype=bool)
+    for i, (c, v) in enumerate(zip(costs, values)):
+        if c > budget:
+            continue
+        for k in range(min(need, i + 1), 0, -1):
+            candidate = best[k - 1, :budget + 1 - c] + v
+            current = best[k, c:]
+            better = candidate > current
+            if better.any():
+                best[k, c:] = np.where(better, candidate, current)
+                take[i, k, c:] = better
+    return best, take
+
+
+def _reconstruct(take: np.ndarray, costs: np.ndarray, need: int, budget: int) -> List[int]:
+    chosen = []
+    k, b = need, budget
+    for i in range(len(costs) - 1, -1, -1):
+        if k == 0:
+            break
+        if take[i, k, b]:
+            chosen.append(i)
+            k -= 1
+            b -= costs[i]
+    return chosen
+
+
+class _Relaxation:
+    """
+    Knapsack relaxation of the squad problem without the club limit, for a
+    branch-and-bound node given by banned and forced players. Per-position
+    tables are cached, since sibling nodes usually differ in one position only.
+    """
+
+    def __init__(self, groups: Dict[str, Dict], budget: int):
+        self.groups = groups
+        self.budget = budget
+        self.cache: Dict[tuple, tuple] = {}
+        self.members = {name: frozenset(g["pool"].tolist()) for name, g in groups.items()}
+        self.cost_value = {
+            int(i): (int(c), float(v))
+            for g in groups.values() for i, c, v in zip(g["pool"], g["costs"], g["values"])
+        }
+
+    def _table(self, name: str, banned: frozenset, forced: frozenset):
+        key = (name, banned, forced)
+        if key not in self.cache:
+            group = self.groups[name]
+            mask = np.array([i not in banned and i not in forced for i in group["pool"]], dtype=bool)
+            need = group["need"] - len(forced)
+            idx, costs = group["pool"][mask], group["costs"][mask]
+            best, take = _position_table(costs, group["values"][mask], need, self.budget)
+            self.cache[key] = (best[need], idx, costs, take, need)
+        return self.cache[key]
+
+    def solve(self, banned: frozenset, forced: frozenset):
+        """(value, chosen pool indices) of the best squad honouring the node's bans and forced picks, or None."""
+        forced_cost = sum(self.cost_value[i][0] for i in forced)
+        forced_value = sum(self.cost_value[i][1] for i in forced)
+        budget = self.budget - forced_cost
+        if budget < 0:
+            return None
+
+        combined = np.zeros(budget + 1)
+        splits, tables = [], []
+        for name, group in self.groups.items():
+            members = self.members[name]
+            group_forced = forced & members
+            if len(group_forced) > group["need"]:
+                return None
+            curve, idx, costs, take, need = self._table(name, banned & members, group_forced)
+            curve = curve[:budget + 1]
+            tables.append((idx, costs, take, need))
+
+            merged = np.full(budget + 1, -np.inf)
+            argmax = np.zeros(budget + 1, dtype=np.int64)
+            for spent in range(budget + 1):
+                if not np.isfinite(curve[spent]) or (spent and curve[spent] == curve[spent - 1]):
+                    continue  # only budgets where this position's value actually improves
+                candidate = combined[:budget + 1 - spent] + curve[spent]
+                better = candidate > merged[spent:]
+                merged[spent:] = np.where(better, candidate, merged[spent:])
+                argmax[spent:][better] = spent
+            combined = merged
+            splits.append(argmax)
+
+        if not np.isfinite(combined[budget]):
+            return None
+
+        chosen = sorted(forced)
+        remaining = budget
+        for (idx, costs, take, need), argmax in zip(reversed(tables), reversed(splits)):
+            spent = int(argmax[remaining])
+            chosen += [int(idx[i]) for i in _reconstruct(take, costs, need, spent)]
+            remaining -= spent
+        return float(combined[budget]) + forced_value, chosen
+
+
+def optimise_squad(players: pd.DataFrame, objective: Union[str, Sequence[float]] = "overall",
+                   budget: float = BUDGET, quotas: Optional[Dict[str, int]] = None,
+                   max_per_club: int = MAX_PER_CLUB, locked: Iterable[Tuple[str, str]] = (),
+                   excluded: Iterable[Tuple[str, str]] = (), price_unit: int = PRICE_UNIT) -> pd.DataFrame:
+    """
+    Highest-value squad from ``players`` (columns name, position, team,
+    price; see hacl3.load_players_data) under the budget, position quotas
+    and per-club limit. ``objective`` is a column name or one value per row
+    (e.g. projected points). Locked players are always included; excluded
+    players never are. Both are given as (name, club) pairs, since a few
+    names are listed at two clubs.
+
+    Solved exactly by branch-and-bound: each node is a knapsack relaxation
+    without the club limit; a club over the limit branches on which of its
+    chosen players to drop.
+    """
+    quotas = dict(quotas or SQUAD_QUOTAS)
+    values_all = (players[objective] if isinstance(objective, str) else pd.Series(objective, index=players.index))
+    values_all = values_all.astype(float).to_numpy()
+    names = players["name"].to_numpy()
+    positions = players["position"].to_numpy()
+    clubs = players["team"].to_numpy()
+    prices = players["price"].to_numpy(dtype=np.float64)
+
+    locked, excluded = set(locked), set(excluded)
+    if locked & excluded:
+        raise InfeasibleSquadError(f"Players both locked and excluded: {sorted(locked & excluded)}")
+    keys = list(zip(names, clubs))
+    locked_idx = [i for i, key in enumerate(keys) if key in locked]
+    if len(locked_idx) != len(locked):
+        raise InfeasibleSquadError(f"Unknown locked players: {sorted(locked - {keys[i] for i in locked_idx})}")
+
+    # Locked players consume budget, quota and club slots up front
+    spare = budget - prices[locked_idx].sum()
+    club_room = {c: max_per_club for c in set(clubs)}
+    for i in locked_idx:
+        quotas[positions[i]] = quotas.get(positions[i], 0) - 1
+        club_room[clubs[i]] -= 1
+    if spare < 0 or min(quotas.values()) < 0 or min(club_room.values()) < 0:
+        raise InfeasibleSquadError("Locked players already break the budget, quotas or club limit")
+    budget_units = int(spare // price_unit)
+    cost_units = np.ceil(prices / price_unit).astype(np.int64)
+
+    available = np.array([key not in excluded and key not in locked for key in keys], dtype=bool)
+    # Clubs other than a given player's that a full squad can fill to the limit
+    full_clubs = (sum(quotas.values()) + len(locked_idx) - 1) // max_per_club
+    groups = {}
+    for position, need in quotas.items():
+        candidates = np.flatnonzero(available & (positions == position))
+        keep = candidates[_prune_dominated(cost_units[candidates], values_all[candidates], clubs[candidates], need, full_clubs)]
+        groups[position] = {"pool": keep, "costs": cost_units[keep], "values": values_all[keep], "need": need}
+
+    # Cheap necessary condition; without it an impossible club limit would be
+    # proven only by exhausting the branch-and-bound tree
+    seats = sum(min(club_room[c], n) for c, n in zip(*np.unique(clubs[available], return_counts=True)))
+    if seats < sum(quotas.values()):
+        raise InfeasibleSquadError("Not enough clubs to fill the squad under the per-club limit")
+
+    # Best-first branch-and-bound on club-limit violations
+    relaxation = _Relaxation(groups, budget_units)
+    root = relaxation.solve(frozenset(), frozenset())
+    if root is None:
+        raise InfeasibleSquadError("No squad fits the budget and position quotas")
+    heap = [(-root[0], 0, frozenset(), frozenset(), root[1])]
+    counter = 1
+    while heap:
+        _, _, banned, forced, chosen = heapq.heappop(heap)
+        per_club: Dict[str, List[int]] = {}
+        for i in chosen:
+            per_club.setdefault(clubs[i], []).append(i)
+        over = [(c, members) for c, members in per_club.items() if len(members) > club_room[c]]
+        if not over:
+            squad = players.iloc[sorted(locked_idx + chosen)].copy()
+            squad["locked"] = [key in locked for key in zip(squad["name"], squad["team"])]
+            return squad
+        # At least one of room + 1 chosen players from an over-subscribed club
+        # must go. Children partition that: child j keeps the first j, drops the next.
+        club, members = max(over, key=lambda item: len(item[1]) - club_room[item[0]])
+        members = [i for i in members if i not in forced][:club_room[club] + 1 - len(forced & set(members))]
+        for j, dropped in enumerate(members):
+            child_forced = forced | frozenset(members[:j])
+            if sum(clubs[i] == club for i in child_forced) > club_room[club]:
+                break
+            child_banned = banned | {dropped}
+            solved = relaxation.solve(child_banned, child_forced)
+            if solved is not None:
+                heapq.heappush(heap, (-solved[0], counter, child_banned, child_forced, solved[1]))
+                counter += 1
+    raise InfeasibleSquadError("No squad satisfies the per-club limit")
+
+
+def synthetic_pool(n: int, clubs: int = 40, seed: int = 0) -> pd.DataFrame:
+    """Random player pool with a realistic price/quality relationship, for benchmarks."""
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(list(SQUAD_QUOTAS), size=n, p=[0.1, 0.32, 0.33, 0.25])
+    overall = np.clip(rng.normal(66, 7, n), 45, 92).round()
+    price = np.round(np.exp(0.12 * (overall - 60) + rng.normal(13.8, 0.5, n)), -3)
+    return pd.DataFrame({
+        "name": [f"Player {i}" for i in range(n)],
+        "position": positions,
+        "team": [f"Club {c}" for c in rng.integers(0, clubs, n)],
+        "price": price,
+        "overall": overall,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fantasy squad optimiser")
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pool = synthetic_pool(args.players, seed=args.seed)
+    start = time.perf_counter()
+    best = optimise_squad(pool)
+    elapsed = time.perf_counter() - start
+    print(f"{args.players} players -> squad value {best['overall'].sum():.0f}, "
+          f"cost {best['price'].sum() / 1e6:.1f}M, {elapsed * 1000:.0f} ms")
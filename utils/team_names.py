@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List
+
+TEAMS_FILE = "data/teams.json"
+
+# Spellings used by other data files (mock results, hand-written fixtures,
+# standings) that do not normalise to the teams.json name on their own.
+TEAM_ALIASES = {
+    "al taawoun": "al taawon",
+    "al feiha": "al fayha",
+    "al khaleej": "al khaleej saihat",
+    "al qadsiah": "al qadisiya",
+    "dhamk": "damac",
+    "al hazem": "al hazm",
+    "al okhdood": "al akhdoud",
+    "al tai": "al taee",
+}
+
+_SUFFIXES = re.compile(r"\b(saudi|fc|sc|club|jeddah)\b")
+
+
+def normalize_team_name(name: str) -> str:
+    """Lower-case, hyphen-free name with club suffixes removed ("Al-Hilal Saudi FC" -> "al hilal")."""
+    text = str(name).lower().replace("-", " ").replace("'", "")
+    text = _SUFFIXES.sub(" ", text)
+    text = " ".join(text.split())
+    return TEAM_ALIASES.get(text, text)
+
+
+@lru_cache(maxsize=1)
+def _registry() -> Dict[str, Dict]:
+    ids: Dict[str, int] = {}
+    names: Dict[int, str] = {}
+    arabic: Dict[int, str] = {}
+    if os.path.exists(TEAMS_FILE):
+        with open(TEAMS_FILE, "r", encoding="utf-8") as f:
+            for team in json.load(f):
+                english = team["team_name"]["english"]
+                ids[normalize_team_name(english)] = team["team_id"]
+                names[team["team_id"]] = english
+                arabic[team["team_id"]] = team["team_name"].get("arabic_saudi", english)
+    return {"ids": ids, "names": names, "arabic": arabic}
+
+
+def team_id(name: str) -> int:
+    """
+    Stable integer id for a team name. Clubs in teams.json get their API id;
+    anything else (relegated clubs in older results) gets a negative id
+    derived from its normalised name, so it is the same in every process.
+    """
+    key = normalize_team_name(name)
+    known = _registry()["ids"].get(key)
+    if known is not None:
+        return known
+    synthetic = -(zlib.crc32(key.encode("utf-8")) & 0x7FFFFFFF) - 1
+    _registry()["names"].setdefault(synthetic, str(name))
+    return synthetic
+
+
+def team_display_name(tid: int, language: str = "english") -> str:
+    registry = _registry()
+    if language == "arabic_saudi" and tid in registry["arabic"]:
+        return registry["arabic"][tid]
+    return registry["names"].get(tid, str(tid))
+
+
+def find_teams_in_text(text: str) -> List[int]:
+    """Ids of known clubs mentioned in free text, in order of first mention."""
+    normalized = " " + normalize_team_name(re.sub(r"[^\w\s-]", " ", text)) + " "
+    found = []
+    for key, tid in _registry()["ids"].items():
+        pos = normalized.find(f" {key} ")
+        if pos >= 0:
+            found.append((pos, tid))
+    for alias, key in TEAM_ALIASES.items():
+        tid = _registry()["ids"].get(key)
+        pos = normalized.find(f" {alias} ")
+        if tid is not None and pos >= 0 and tid not in {t for _, t in found}:
+            found.append((pos, tid))
+    return [tid for _, tid in sorted(found)]
+
+
+def pair_key(team_a: int, team_b: int) -> tuple:
+    """Order-independent key for a pair of team ids."""
+    return (team_a, team_b) if team_a <= team_b else (team_b, team_a)
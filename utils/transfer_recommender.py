@@ -0,0 +1,237 @@
+import argparse
+import heapq
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.squad_optimizer import MAX_PER_CLUB, _prune_dominated, optimise_squad, synthetic_pool
+
+SUGGESTIONS_PER_SLOT = 3
+TOP_COMBINATIONS = 5
+
+
+class TransferRecommender:
+    """
+    Transfer suggestions for a squad drawn from ``players`` (columns name,
+    position, team, price; see hacl3.load_players_data), scored by an
+    objective column or one value per row, as in optimise_squad.
+
+    Candidates are kept per position, sorted by value, so the best
+    affordable replacement for a slot is the first row of that list passing
+    the budget, club and not-in-squad masks, and only rows worth more than
+    the outgoing player are ever looked at. Every swap is scored as a delta
+    (value in - value out, price in - price out) against the current squad.
+    """
+
+    def __init__(self, players: pd.DataFrame, objective: Union[str, Sequence[float]] = "overall"):
+        self.players = players.reset_index(drop=True)
+        values = self.players[objective] if isinstance(objective, str) else pd.Series(list(objective))
+        self.values = values.astype(float).to_numpy()
+        self.prices = self.players["price"].to_numpy(dtype=np.float64)
+        self.names = self.players["name"].to_numpy()
+        self.club_codes, self.clubs = np.unique(self.players["team"].to_numpy(), return_inverse=True)
+        # Squads are (name, club) pairs: a few names are listed at two clubs
+        self.rows = {key: i for i, key in enumerate(zip(self.names, self.players["team"]))}
+
+        positions = self.players["position"].to_numpy()
+        self.by_position: Dict[str, np.ndarray] = {}
+        for position in np.unique(positions):
+            rows = np.flatnonzero(positions == position)
+            self.by_position[position] = rows[np.lexsort((self.prices[rows], -self.values[rows]))]
+
+    def _squad_state(self, squad: Iterable[Tuple[str, str]], max_per_club: int):
+        rows = np.array([self.rows[key] for key in squad if key in self.rows], dtype=np.int64)
+        in_squad = np.zeros(len(self.players), dtype=bool)
+        in_squad[rows] = True
+        club_counts = np.bincount(self.clubs[rows], minlength=len(self.club_codes))
+        # A squad already over the club limit is not made worse, but not rejected either
+        limits = np.maximum(club_counts, max_per_club)
+        return rows, in_squad, club_counts, limits
+
+    def single_transfers(self, squad: Iterable[Tuple[str, str]], bank: float, per_slot: int = SUGGESTIONS_PER_SLOT,
+                         max_per_club: int = MAX_PER_CLUB) -> pd.DataFrame:
+        """Up to ``per_slot`` value-improving, affordable replacements for every squad player."""
+        rows, in_squad, club_counts, limits = self._squad_state(squad, max_per_club)
+        suggestions = []
+        for out in rows:
+            candidates = self.by_position[self.players.at[out, "position"]]
+            # Only players worth more than the outgoing one: a prefix of the value-sorted list
+            better = candidates[: np.count_nonzero(self.values[candidates] > self.values[out])]
+            counts = club_counts.copy()
+            counts[self.clubs[out]] -= 1
+            ok = (~in_squad[better]) & (self.prices[better] <= bank + self.prices[out]) \
+                & (counts[self.clubs[better]] < limits[self.clubs[better]])
+            for player_in in better[ok][:per_slot]:
+                suggestions.append({
+                    "out": self.names[out],
+                    "in": self.names[player_in],
+                    "position": self.players.at[out, "position"],
+                    "gain": self.values[player_in] - self.values[out],
+                    "cost": self.prices[player_in] - self.prices[out],
+                })
+        frame = pd.DataFrame(suggestions, columns=["out", "in", "position", "gain", "cost"])
+        frame["bank_after"] = bank - frame["cost"]
+        return frame.sort_values(["gain", "cost"], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+    def _options(self, rows: np.ndarray, in_squad: np.ndarray, club_counts: np.ndarray,
+                 max_moves: int, max_per_club: int) -> List[tuple]:
+        """
+        Per slot, (gains, costs, rows in) arrays of options for the
+        combination search, best gain first. Downgrades are kept too, since
+        they can fund an upgrade elsewhere; dominated replacements
+        (cheaper-or-equal and better-or-equal ones exist at enough clubs) are
+        dropped as in optimise_squad.
+        """
+        full_clubs = int(np.count_nonzero(club_counts >= max_per_club))
+        pruned: Dict[str, np.ndarray] = {}
+        for position, candidates in self.by_position.items():
+            free = candidates[~in_squad[candidates]]
+            keep = _prune_dominated(np.ceil(self.prices[free]), self.values[free], self.clubs[free],
+                                    max_moves, full_clubs + max_moves)
+            pruned[position] = free[keep]
+        options = []
+        for out in rows:
+            cand = pruned[self.players.at[out, "position"]]
+            gains = self.values[cand] - self.values[out]
+            order = np.argsort(-gains, kind="stable")
+            options.append((gains[order], self.prices[cand[order]] - self.prices[out], cand[order]))
+        return options
+
+    def combinations(self, squad: Iterable[Tuple[str, str]], bank: float, max_moves: int = 2,
+                     top: int = TOP_COMBINATIONS, max_per_club: int = MAX_PER_CLUB) -> List[Dict]:
+        """
+        Best sets of up to ``max_moves`` simultaneous transfers by total gain
+        that keep the bank non-negative and the club limit.
+
+        Depth-first over slots in order with branch-and-bound. At each node a
+        slot's options are masked in one vectorised step down to those that
+        could still beat the ``top``-th result found so far (gain plus the
+        best single-slot gains still available) and that the bank could
+        cover once the remaining moves free all they can. Each survivor is
+        then checked against the best move the leftover money can buy, looked
+        up on a cost-sorted frontier, so branches that only win by
+        overspending stop early.
+        """
+        rows, in_squad, club_counts, limits = self._squad_state(squad, max_per_club)
+        options = self._options(rows, in_squad, club_counts, max_moves, max_per_club)
+        n = len(rows)
+        best_gain = [float(gains.max(initial=0.0)) for gains, _, _ in options]
+        most_freed = [float((-costs).max(initial=0.0)) for _, costs, _ in options]
+        # suffix[s][m]: sum of the m largest positive values over slots >= s
+        def suffix(values: List[float]) -> List[List[float]]:
+            table = []
+            for s in range(n + 1):
+                tail = sorted((v for v in values[s:] if v > 0), reverse=True)
+                table.append([0.0] + list(np.cumsum(tail[:max_moves])) + [sum(tail[:max_moves])] * max_moves)
+            return table
+        gain_bound, free_bound = suffix(best_gain), suffix(most_freed)
+
+        # frontier[s]: (costs ascending, best gain at or under each cost) over
+        # slots >= s, so the best single move still affordable is a binary search
+        frontier = []
+        for s in range(n + 1):
+            gains = np.concatenate([o[0] for o in options[s:]] + [np.zeros(0)])
+            costs = np.concatenate([o[1] for o in options[s:]] + [np.zeros(0)])
+            order = np.argsort(costs, kind="stable")
+            frontier.append((costs[order], np.append(np.maximum.accumulate(gains[order]), -np.inf)))
+
+        def bound(s: int, moves_left: int, money: np.ndarray) -> np.ndarray:
+            """Most gain ``moves_left`` moves from slots >= s can add with each ``money`` to spend."""
+            if not moves_left:
+                return np.zeros(len(money))
+            costs, gains = frontier[s]
+            # The best move under the budget, once the other moves free all they can;
+            # index -1 (nothing affordable) reads the trailing -inf
+            best = gains[np.searchsorted(costs, money + free_bound[s][moves_left - 1], side="right") - 1]
+            return np.clip(best + gain_bound[s][moves_left - 1], 0.0, gain_bound[s][moves_left])
+
+        results: List[tuple] = []  # min-heap of (gain, -cost, counter, moves)
+        counter = 0
+        counts = club_counts.copy()
+        used = set()
+
+        def search(start: int, moves: List[tuple], gain: float, spent: float) -> None:
+            nonlocal counter
+            if moves and gain > 0 and spent <= bank and (counts <= limits).all():
+                entry = (gain, -spent, counter, list(moves))
+                counter += 1
+                if len(results) < top:
+                    heapq.heappush(results, entry)
+                elif entry[:2] > results[0][:2]:
+                    heapq.heapreplace(results, entry)
+            remaining = max_moves - len(moves)
+            if not remaining:
+                return
+            for s in range(start, n):
+                gains, costs, players_in = options[s]
+                threshold = results[0][0] if len(results) == top else 0.0
+                later_gain, later_free = gain_bound[s + 1][remaining - 1], free_bound[s + 1][remaining - 1]
+                eligible = np.flatnonzero((gains > threshold - gain - later_gain)
+                                          & (costs <= bank - spent + later_free))
+                if not len(eligible):
+                    continue
+                reachable = gains[eligible] + bound(s + 1, remaining - 1, bank - spent - costs[eligible])
+                keep = gain + reachable > threshold
+                eligible, reachable = eligible[keep], reachable[keep]
+                if not len(eligible):
+                    continue
+                out = rows[s]
+                counts[self.clubs[out]] -= 1
+                for i, best in zip(eligible.tolist(), reachable.tolist()):
+                    option_gain, cost, player_in = float(gains[i]), float(costs[i]), int(players_in[i])
+                    threshold = results[0][0] if len(results) == top else 0.0
+                    if gain + option_gain + later_gain <= threshold:
+                        break  # options are sorted by gain, so no later one can do better
+                    if gain + best <= threshold:
+                        continue
+                    club = self.clubs[player_in]
+                    # A club may go over the limit mid-search if a later move takes one of its players out
+                    if player_in in used or counts[club] >= limits[club] + remaining - 1:
+                        continue
+                    counts[club] += 1
+                    used.add(player_in)
+                    moves.append((out, player_in))
+                    search(s + 1, moves, gain + option_gain, spent + cost)
+                    moves.pop()
+                    used.discard(player_in)
+                    counts[club] -= 1
+                counts[self.clubs[out]] += 1
+
+        search(0, [], 0.0, 0.0)
+        combinations = []
+        for gain, neg_spent, _, moves in sorted(results, reverse=True):
+            combinations.append({
+                "moves": [(self.names[o], self.names[i]) for o, i in moves],
+                "gain": gain,
+                "cost": -neg_spent,
+                "bank_after": bank + neg_spent,
+            })
+        return combinations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transfer suggestions on a synthetic pool")
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--moves", type=int, default=3)
+    args = parser.parse_args()
+
+    pool = synthetic_pool(args.players)
+    # A deliberately mediocre squad: the best one on a 70M budget, with 100M to spend
+    squad = optimise_squad(pool, budget=70_000_000)
+    bank = 100_000_000 - squad["price"].sum()
+    recommender = TransferRecommender(pool)
+
+    start = time.perf_counter()
+    keys = list(zip(squad["name"], squad["team"]))
+    singles = recommender.single_transfers(keys, bank)
+    single_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    combos = recommender.combinations(keys, bank, max_moves=args.moves)
+    combo_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(singles)} single-transfer suggestions in {single_ms:.1f} ms")
+    print(f"Best {args.moves}-move combinations in {combo_ms:.1f} ms:")
+    for combo in combos:
+        moves = ", ".join(f"{o} -> {i}" for o, i in combo["moves"])
+        print(f"  +{combo['gain']:.0f}  ({combo['cost'] / 1e6:+.1f}M)  {moves}")
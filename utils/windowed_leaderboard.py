@@ -0,0 +1,242 @@
+import glob
+import json
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+WINDOWS_FILE = "leaderboard_windows.json"
+WINDOWS_LOG_PATTERN = "leaderboard_windows.{generation}.jsonl"
+
+# Order of the counters stored per user inside each bucket.
+FIELDS = ("wins", "draws", "losses", "goals_for", "goals_against", "matches_played")
+
+WINDOW_DAYS = {
+    "week": 7,
+    "month": 30,
+}
+
+
+def season_start(today: date, month: int = 8) -> date:
+    """First day of the SPL season containing ``today`` (seasons start in August)."""
+    year = today.year if today.month >= month else today.year - 1
+    return date(year, month, 1)
+
+
+def _week_start(ordinal: int) -> int:
+    """Ordinal of the Monday on or before the given day ordinal."""
+    return ordinal - date.fromordinal(ordinal).weekday()
+
+
+def _add(bucket: Dict[str, List[int]], username: str, counts: List[int]) -> None:
+    row = bucket.setdefault(username, [0] * len(FIELDS))
+    for i, value in enumerate(counts):
+        row[i] += value
+
+
+class WindowedLeaderboard:
+    """
+    Per-user match results aggregated into day and week buckets.
+
+    Recent results live in day buckets; once a day falls out of
+    ``day_retention`` it is folded into its week bucket, and weeks older than
+    ``week_retention`` are dropped (the all-time table keeps the totals).
+    Weekly, monthly and season boards are a sum over a handful of buckets.
+
+    Each result is appended to a delta log as one JSON line; the buckets are
+    only rewritten as a snapshot when the day rolls over or every
+    ``save_every`` results. As in leaderboard.ScoreLog, a snapshot starts a
+    new log generation first, so a crash never loses or double-counts a
+    result. One lock guards the buckets, which are shared across sessions.
+    """
+
+    def __init__(self, path: str = WINDOWS_FILE, day_retention: int = 35, week_retention: int = 53,
+                 log_pattern: str = WINDOWS_LOG_PATTERN, save_every: int = 1000):
+        self.path = path
+        self.log_pattern = log_pattern
+        self.day_retention = day_retention
+        self.week_retention = week_retention
+        self.save_every = save_every
+        self.days: Dict[int, Dict[str, List[int]]] = {}
+        self.weeks: Dict[int, Dict[str, List[int]]] = {}
+        self.compacted_through = 0
+        self.generation = 0
+        self._log = None
+        self._log_entries = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def record(self, username: str, result: str, goals_for: int, goals_against: int,
+               when: Optional[datetime] = None) -> None:
+        """Add one match result to its day's bucket and append it to the delta log."""
+        when = when or datetime.now()
+        today = when.date().toordinal()
+        counts = [
+            int(result == "win"),
+            int(result == "draw"),
+            int(result not in ("win", "draw")),
+            goals_for,
+            goals_against,
+            1,
+        ]
+        with self._lock:
+            _add(self.days.setdefault(today, {}), username, counts)
+            if self._log is None:
+                self._log = open(self._log_path(self.generation), "a", encoding="utf-8")
+            self._log.write(json.dumps([today, username, counts], ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._log.flush()
+            self._log_entries += 1
+            if today > self.compacted_through:
+                self._compact(today)
+                self._save()
+            elif self._log_entries >= self.save_every:
+                self._save()
+
+    def compact(self, today: Optional[int] = None) -> None:
+        """Fold expired day buckets into weeks and drop expired weeks."""
+        with self._lock:
+            self._compact(today)
+
+    def _compact(self, today: Optional[int] = None) -> None:
+        today = today or date.today().toordinal()
+        day_cutoff = today - self.day_retention
+        for ordinal in [d for d in self.days if d < day_cutoff]:
+            week = self.weeks.setdefault(_week_start(ordinal), {})
+            for username, counts in self.days.pop(ordinal).items():
+                _add(week, username, counts)
+
+        week_cutoff = _week_start(today) - 7 * self.week_retention
+        for ordinal in [w for w in self.weeks if w < week_cutoff]:
+            del self.weeks[ordinal]
+        self.compacted_through = today
+
+    def board(self, window: str = "week", today: Optional[date] = None) -> Dict[str, Dict]:
+        """
+        Aggregated stats per user for ``week`` (last 7 days), ``month``
+        (last 30 days) or ``season``, in the same shape as leaderboard.json.
+        """
+        today = today or date.today()
+        end = today.toordinal()
+        totals: Dict[str, List[int]] = {}
+        last_seen: Dict[str, int] = {}
+        with self._lock:
+            buckets = []
+            if window == "season":
+                # Weeks are counted whole, so the season starts on the Monday on or before 1 August.
+                start = _week_start(season_start(today).toordinal())
+                buckets += [(w + 6, b) for w, b in self.weeks.items() if w >= start]
+            else:
+                start = end - WINDOW_DAYS[window] + 1
+            buckets += [(d, b) for d, b in self.days.items() if start <= d <= end]
+
+            for ordinal, bucket in buckets:
+                for username, counts in bucket.items():
+                    _add(totals, username, counts)
+                    last_seen[username] = min(max(last_seen.get(username, 0), ordinal), end)
+
+        return {
+            username: {
+                **dict(zip(FIELDS, counts)),
+                "last_played": date.fromordinal(last_seen[username]).isoformat(),
+            }
+            for username, counts in totals.items()
+        }
+
+    def save(self) -> None:
+        """Snapshot the buckets and start a new, empty delta log."""
+        with self._lock:
+            self._save()
+
+    # -- internals ---------------------------------------------------------
+
+    def _save(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        saved = self.generation
+        self.generation += 1
+        self._log_entries = 0
+
+        payload = {
+            "generation": saved,
+            "compacted_through": self.compacted_through,
+            "days": {str(k): v for k, v in self.days.items()},
+            "weeks": {str(k): v for k, v in self.weeks.items()},
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self._log_path(saved)):
+            os.remove(self._log_path(saved))
+
+    def _log_path(self, generation: int) -> str:
+        return self.log_pattern.format(generation=generation)
+
+    def _log_generations(self) -> List[int]:
+        pattern = re.escape(self.log_pattern).replace(r"\{generation\}", r"(\d+)")
+        generations = []
+        for path in glob.glob(self.log_pattern.format(generation="*")):
+            match = re.fullmatch(pattern, path)
+            if match:
+                generations.append(int(match.group(1)))
+        return sorted(generations)
+
+    def _replay(self, generation: int) -> int:
+        """Apply one log generation's deltas to the buckets; returns how many were read."""
+        path = self._log_path(generation)
+        applied = 0
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                data = data[:data.rfind(b"\n") + 1]  # torn final line from a crash mid-write
+                f.truncate(len(data))
+        for line in data.decode("utf-8").splitlines():
+            ordinal, username, counts = json.loads(line)
+            _add(self.days.setdefault(ordinal, {}), username, counts)
+            applied += 1
+        return applied
+
+    def _load(self) -> None:
+        payload = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                payload = {}
+        self.compacted_through = payload.get("compacted_through", 0)
+        self.days = {int(k): v for k, v in payload.get("days", {}).items()}
+        self.weeks = {int(k): v for k, v in payload.get("weeks", {}).items()}
+        # Files written before the delta log existed have no generation
+        saved = payload.get("generation", -1)
+
+        live = []
+        for generation in self._log_generations():
+            if generation <= saved:
+                os.remove(self._log_path(generation))  # already in the snapshot
+            else:
+                live.append(generation)
+        self.generation = live[-1] if live else saved + 1
+        for generation in live:
+            self._log_entries += self._replay(generation)
+        if self.compacted_through:
+            self._compact(self.compacted_through)
+        if len(live) > 1:
+            # Only a crash mid-save leaves several live logs; fold them into a fresh snapshot
+            self._save()
+            for generation in live[:-1]:
+                os.remove(self._log_path(generation))
+
+
+def window_range(window: str, today: Optional[date] = None) -> str:
+    """Human readable date range covered by a board."""
+    today = today or date.today()
+    if window == "season":
+        start = season_start(today)
+    else:
+        start = today - timedelta(days=WINDOW_DAYS[window] - 1)
+    return f"{start:%d %b} - {today:%d %b %Y}"